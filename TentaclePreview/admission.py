@@ -0,0 +1,108 @@
+import threading
+import time
+from typing import Any, Dict
+
+
+class AdmissionGate:
+    """Limits concurrent proxied requests to one tentacle.
+
+    Up to `max_in_flight` requests run at once; up to `max_queue` more wait at most `queue_timeout`
+    seconds for a slot. Everything beyond that is shed right away, so an overloaded dev server
+    can't make the proxy pile up threads.
+    """
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 64, queue_timeout: float = 10.0) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    def acquire(self) -> bool:
+        """Takes a slot, waiting in the queue if needed; returns False if the request must be shed"""
+        with self._cond:
+            if self.in_flight < self.max_in_flight and not self.queued:
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+
+            if self.queued >= self.max_queue:
+                self.shed_queue_full += 1
+                return False
+
+            self.queued += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_flight >= self.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed_timeout += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.queued -= 1
+
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "admitted": self.admitted,
+                "shed_queue_full": self.shed_queue_full,
+                "shed_timeout": self.shed_timeout,
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+            }
+
+
+class AdmissionControl:
+    """One AdmissionGate per tentacle, created on first request"""
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 64, queue_timeout: float = 10.0,
+                 retry_after: int = 2) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._gates: Dict[str, AdmissionGate] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "AdmissionControl":
+        return cls(
+            max_in_flight=config.get("max_in_flight", 8),
+            max_queue=config.get("max_queue", 64),
+            queue_timeout=config.get("queue_timeout_seconds", 10.0),
+            retry_after=config.get("retry_after_seconds", 2),
+        )
+
+    def gate(self, name: str) -> AdmissionGate:
+        gate = self._gates.get(name)
+        if gate is None:
+            with self._lock:
+                gate = self._gates.setdefault(name, AdmissionGate(self.max_in_flight, self.max_queue, self.queue_timeout))
+        return gate
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            self._gates.pop(name, None)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            gates = dict(self._gates)
+        return {name: gate.stats() for name, gate in gates.items()}
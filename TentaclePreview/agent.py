@@ -0,0 +1,255 @@
+"""Cluster agent: builds and runs the tentacles a coordinator assigns to it.
+
+    python -m TentaclePreview.agent config.json --agent-id agent-1 --data-dir agents/agent-1
+
+The agent has no web server of its own: it reports to the coordinator (`cluster.coordinator_url`)
+and the coordinator proxies previews straight to the tentacle ports at `cluster.advertise_host`.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import requests
+
+from TentaclePreview import output
+from TentaclePreview import state
+from TentaclePreview import tentacle_preview as tentacle
+from TentaclePreview.tentacle import Tentacle
+
+MAX_OUTBOX = 10000  # events kept while the coordinator is unreachable
+EVENT_BATCH_DELAY = 0.1  # lets events of one burst go out in one request
+RETRY_DELAY = 1.0
+
+
+class Agent:
+    """Heartbeats to the coordinator, runs what it is assigned and forwards status and log events"""
+
+    def __init__(self, agent_id: str, coordinator_url: str, capacity: int, advertise_host: str,
+                 token: str = "", heartbeat_interval: float = 2.0) -> None:
+        self.agent_id = agent_id
+        self.coordinator_url = coordinator_url.rstrip("/")
+        self.capacity = capacity
+        self.advertise_host = advertise_host
+        self.heartbeat_interval = heartbeat_interval
+
+        self._session = requests.Session()
+        if token:
+            self._session.headers["X-Cluster-Token"] = token
+
+        self._lock = threading.Lock()
+        self._outbox: List[Dict[str, Any]] = []
+        self._outbox_ready = threading.Event()
+        self._resync_all = False  # set when events had to be dropped
+        self._wanted: Set[str] = set()  # branches assigned to us
+        self._saved_states: Dict[str, Dict[str, Any]] = {}
+        self._connected: Optional[bool] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "Agent":
+        capacity = config.get("capacity", "auto")
+        if capacity == "auto":
+            capacity = os.cpu_count() or 1
+        return cls(
+            agent_id=config.get("agent_id") or socket.gethostname(),
+            coordinator_url=config.get("coordinator_url", "http://127.0.0.1:5000"),
+            capacity=int(capacity),
+            advertise_host=config.get("advertise_host", "127.0.0.1"),
+            token=config.get("token", ""),
+            heartbeat_interval=config.get("heartbeat_interval_seconds", 2.0),
+        )
+
+    # --- events ---
+
+    def forward_logs(self, name, log_type, logs, stream=False):
+        self._send({"type": "logs", "name": name, "log_type": log_type, "logs": logs})
+
+    def forward_status_delta(self, delta: Dict[str, Any]) -> None:
+        for status in delta["changed"]:
+            self._send({"type": "status", "name": status["name"], "status": self._public_status(status)})
+
+    def _public_status(self, status: Dict[str, Any]) -> Dict[str, Any]:
+        """Status as the coordinator needs it: with a URL it can reach"""
+        status = dict(status)
+        if status.get("url"):
+            status["url"] = f"{self.advertise_host}:{status['url'].rpartition(':')[2]}"
+        return status
+
+    def _send(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._outbox) >= MAX_OUTBOX:
+                self._outbox.clear()
+                self._resync_all = True
+            self._outbox.append(event)
+        self._outbox_ready.set()
+
+    def _sender_loop(self) -> None:
+        while not self._stop.is_set():
+            self._outbox_ready.wait()
+            time.sleep(EVENT_BATCH_DELAY)
+            with self._lock:
+                batch, self._outbox = self._outbox, []
+                self._outbox_ready.clear()
+            if not batch:
+                continue
+
+            try:
+                response = self._session.post(f"{self.coordinator_url}/api/cluster/events",
+                                              json={"agent_id": self.agent_id, "events": batch}, timeout=10)
+                if response.status_code == 409:
+                    continue  # the coordinator doesn't know us: the next heartbeat registers and resyncs
+                response.raise_for_status()
+            except requests.RequestException:
+                with self._lock:
+                    if len(batch) + len(self._outbox) > MAX_OUTBOX:
+                        self._outbox.clear()
+                        self._resync_all = True
+                    else:
+                        self._outbox[:0] = batch
+                    self._outbox_ready.set()
+                time.sleep(RETRY_DELAY)
+
+    def _resync(self, names: List[str]) -> None:
+        """Sends everything the coordinator may have missed about these tentacles"""
+        for name in names:
+            tenty = tentacle.get_tenty_by_name(name)
+            if tenty is None:
+                continue
+            self._send({"type": "status", "name": name,
+                        "status": self._public_status(tentacle.tentacle_status(tenty, tentacle.queue_info(name)))})
+            self.forward_logs(name, "build", tenty.get_logs("build"))
+            self._send({"type": "logs", "name": name, "log_type": "start",
+                        "logs": {"lines": list(tenty.start_output), "offset": 0}})
+
+    # --- assignments ---
+
+    def heartbeat(self) -> None:
+        _, statuses = tentacle.STATUS_BOARD.snapshot()
+        response = self._session.post(f"{self.coordinator_url}/api/cluster/heartbeat", json={
+            "agent_id": self.agent_id,
+            "capacity": self.capacity,
+            "tentacles": [self._public_status(status) for status in statuses],
+        }, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+
+        self._reconcile(set(data["assigned"]))
+        for command in data["commands"]:
+            self._run_command(command)
+
+        resync = data["resync"]
+        with self._lock:
+            if self._resync_all:
+                resync = [tenty.name for tenty in tentacle.TENTACLES_LIST]
+                self._resync_all = False
+        self._resync(resync)
+
+    def _reconcile(self, assigned: Set[str]) -> None:
+        for name in sorted(assigned - self._wanted):
+            output.log(f"Branch '{name}' assigned to this agent", "info")
+            saved = self._saved_states.pop(name, None)
+            tentacle.SCHEDULER.submit(name, lambda n=name, s=saved: tentacle.create_tentacle(n, s), reason="assigned")
+
+        for name in sorted(self._wanted - assigned):
+            output.log(f"Branch '{name}' is no longer assigned to this agent, removing it", "warning")
+            tentacle.remove_branch(name, reason="unassigned")
+
+        self._wanted = assigned
+
+    def _run_command(self, command: Dict[str, Any]) -> None:
+        name = command["name"]
+        if name not in self._wanted:
+            return
+        if command["action"] == "restart":
+            tentacle.restart_tentacle(name, bool(command.get("clean", False)))
+        elif command["action"] == "update":
+            tentacle.update_tentacle(name)
+        else:
+            output.log(f"Unknown command from coordinator: {command['action']}", "warning")
+
+    # --- main loop ---
+
+    def run(self) -> None:
+        self._saved_states = state.load_state(tentacle.CONFIG.get("state_file", "tentacle_state.json"))
+        threading.Thread(target=self._sender_loop, name="agent-events", daemon=True).start()
+
+        output.log(f"Agent '{self.agent_id}' reporting to {self.coordinator_url} "
+                   f"(capacity {self.capacity})", "header")
+        while not self._stop.is_set():
+            try:
+                self.heartbeat()
+                if self._connected is not True:
+                    output.log("Connected to the coordinator", "success")
+                self._connected = True
+            except (requests.RequestException, ValueError, KeyError) as e:
+                if self._connected is not False:
+                    output.log(f"Coordinator is unreachable: {e}", "warning")
+                self._connected = False
+            self._stop.wait(self.heartbeat_interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._outbox_ready.set()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Runs tentacles assigned by a TentaclePreview coordinator")
+    parser.add_argument("config", nargs="?", default="./config.json")
+    parser.add_argument("--agent-id", help="defaults to cluster.agent_id, then to the host name")
+    parser.add_argument("--coordinator", help="coordinator URL, defaults to cluster.coordinator_url")
+    parser.add_argument("--capacity", help="how many tentacles this agent runs, defaults to cluster.capacity")
+    parser.add_argument("--advertise-host", help="host the coordinator reaches tentacles at")
+    parser.add_argument("--data-dir", help="keeps branches, state and logs of this agent under this directory, "
+                                           "so several agents can share a host")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    cluster = dict(config.get("cluster", {}))
+    cluster["role"] = "agent"
+    for key, value in (("agent_id", args.agent_id), ("coordinator_url", args.coordinator),
+                       ("capacity", args.capacity), ("advertise_host", args.advertise_host)):
+        if value is not None:
+            cluster[key] = value
+
+    overrides: Dict[str, Any] = {"cluster": cluster}
+    if args.data_dir:
+        data_dir = Path(args.data_dir)
+        overrides.update({
+            "branches_dir": str(data_dir / "branches"),
+            "state_file": str(data_dir / "tentacle_state.json"),
+            "logs_dir": str(data_dir / "tentacle_logs"),
+            "log_search": {**config.get("log_search", {}), "dir": str(data_dir / "log_store")},
+        })
+
+    output.log("Initializing Tentacle Preview agent...", "header")
+    tentacle.init_globals(args.config, overrides)
+    tentacle.connect_github()  # no web server to keep responsive, so right away
+
+    agent = Agent.from_config(tentacle.CONFIG["cluster"])
+    Tentacle.set_default_host(tentacle.CONFIG["cluster"].get("bind_host", agent.advertise_host))
+    Tentacle.set_broadcast_callbacks(agent.forward_logs, lambda name, *_: tentacle.refresh_status([name]))
+    tentacle.STATUS_BOARD.on_change = agent.forward_status_delta
+    tentacle.SCHEDULER.on_change = tentacle.refresh_status
+
+    signal.signal(signal.SIGINT, lambda *_: agent.stop())
+    signal.signal(signal.SIGTERM, lambda *_: agent.stop())
+
+    agent.run()
+
+    output.log("Agent is shutting down", "warning")
+    if tentacle.CONFIG.get("detach_on_shutdown", False):
+        tentacle.detach_tentacles()
+    else:
+        tentacle.stop_tentacles()
+    output.flush()
+
+
+if __name__ == "__main__":
+    main()
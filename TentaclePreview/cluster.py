@@ -0,0 +1,304 @@
+import hmac
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from TentaclePreview import output
+from TentaclePreview.tentacle import Tentacle, parse_build_entry, render_build_entry
+
+
+class RemoteTentacle:
+    """Coordinator-side stand-in for a tentacle that runs on an agent.
+
+    Holds what the agent last reported (status, build and start logs), so the status board, the
+    dashboard and the proxy use it like a local Tentacle. Its `url` points at the agent.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.agent_id: Optional[str] = None
+        self.url: Optional[str] = None
+        self.is_build_success: Optional[bool] = None
+        self.is_start_success: Optional[bool] = None
+        self.last_commit: str = ""
+        self.head_sha: Optional[str] = None
+        self.queue: Optional[Dict[str, Any]] = None  # the agent's build queue entry
+        self.build_output: List[Dict[str, Any]] = []
+        self.start_output: List[str] = []
+        self.last_active: float = time.time()
+
+    def get_logs(self, log_type):
+        if log_type == "build":
+            return [render_build_entry(entry) for entry in self.build_output]
+        if log_type == "start":
+            return self.start_output
+        return []
+
+    def touch(self):
+        self.last_active = time.time()
+
+    def clear_files(self):
+        pass  # the files are on the agent, which deletes them once the branch is no longer assigned to it
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self.is_start_success)
+
+    def _broadcast_status(self):
+        if Tentacle._broadcast_status:
+            Tentacle._broadcast_status(self.name, self.is_build_success, self.is_start_success)
+
+    def apply_status(self, agent_id: str, status: Dict[str, Any]) -> None:
+        before = (self.agent_id, self.url, self.is_build_success, self.is_start_success, self.head_sha, self.queue)
+        self.agent_id = agent_id
+        self.url = status.get("url")
+        self.is_build_success = status.get("is_build_success")
+        self.is_start_success = status.get("is_start_success")
+        self.last_commit = status.get("last_commit") or ""
+        self.head_sha = status.get("commit")
+        self.queue = status.get("queue")
+        if before != (self.agent_id, self.url, self.is_build_success, self.is_start_success, self.head_sha, self.queue):
+            self._broadcast_status()
+
+    def apply_logs(self, log_type: str, logs: Any) -> bool:
+        """Returns False if start log lines were lost on the way and the agent has to resend them all"""
+        if log_type == "build" and isinstance(logs, dict):
+            # a change of the build log of the agent, see Tentacle._broadcast_build_change
+            index = logs["index"]
+            if "entry" in logs:
+                entry = parse_build_entry(logs["entry"])
+                if index < len(self.build_output):
+                    self.build_output[index] = entry
+                elif index == len(self.build_output):
+                    self.build_output.append(entry)
+            elif index < len(self.build_output):
+                entry = self.build_output[index]
+                if "status" in logs:
+                    entry["status"] = logs["status"]
+                if "lines" in logs:
+                    del entry["lines"][logs["offset"]:]  # a resent batch replaces what we have
+                    entry["lines"].extend(logs["lines"])
+            if Tentacle._broadcast_logs:
+                Tentacle._broadcast_logs(self.name, "build", logs, stream=True)
+            return True
+
+        if log_type == "build":
+            self.build_output = [parse_build_entry(entry) for entry in logs]
+            if Tentacle._broadcast_logs:
+                Tentacle._broadcast_logs(self.name, "build", self.get_logs("build"), stream=False)
+            return True
+
+        offset = logs.get("offset")
+        if offset is None:
+            offset = len(self.start_output)
+        if offset > len(self.start_output):
+            return False
+
+        # offset 0 is a restarted process; lines we already have (a resent batch) are replaced
+        del self.start_output[offset:]
+        self.start_output.extend(logs["lines"])
+        if Tentacle._broadcast_logs:
+            Tentacle._broadcast_logs(self.name, "start", {"lines": logs["lines"], "offset": offset}, stream=True)
+        return True
+
+    def unassigned(self) -> None:
+        """Its agent is gone: nothing is known to run until the next agent reports"""
+        self.agent_id = None
+        self.url = None
+        self.is_start_success = None
+        self.queue = None
+        self._broadcast_status()
+
+    def __str__(self) -> str:
+        return f"RemoteTentacle({self.name}, on agent:{self.agent_id}, url:{self.url})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class _Agent:
+    def __init__(self, agent_id: str, capacity: int) -> None:
+        self.id = agent_id
+        self.capacity = capacity
+        self.last_seen = time.monotonic()
+        self.assigned: Set[str] = set()
+        self.commands: List[Dict[str, Any]] = []  # delivered with the next heartbeat response
+        self.resync: Set[str] = set()  # branches whose full logs the agent has to resend
+
+    @property
+    def free(self) -> int:
+        return self.capacity - len(self.assigned)
+
+
+class ClusterCoordinator:
+    """Places branches on agents by free capacity and keeps the RemoteTentacles in sync with them.
+
+    Agents poll: each heartbeat reports the tentacles an agent runs and returns the branches it should
+    run and the commands queued for it. An agent that misses heartbeats for `agent_timeout` seconds is
+    dropped and its branches go to the other agents. After a coordinator restart, branches stay where
+    agents already run them; placing the rest waits one timeout, so every agent had a chance to report.
+    """
+
+    def __init__(self, agent_timeout: float = 10.0, token: str = "") -> None:
+        self.agent_timeout = agent_timeout
+        self.token = token
+        self.tentacles: Callable[[str], Optional[RemoteTentacle]] = lambda name: None  # looks up a branch
+
+        self._lock = threading.Lock()
+        self._agents: Dict[str, _Agent] = {}
+        self._owners: Dict[str, str] = {}  # branch -> agent id
+        self._branches: Dict[str, None] = {}  # every branch that should run, in the order it was added
+        self._started = time.monotonic()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ClusterCoordinator":
+        if not config.get("token"):
+            # anyone could register an agent and have the coordinator proxy previews to any host:port
+            raise ValueError("cluster.token must be set when running as coordinator")
+        return cls(
+            agent_timeout=config.get("agent_timeout_seconds", 10.0),
+            token=config.get("token", ""),
+        )
+
+    def check_token(self, token: Optional[str]) -> bool:
+        return not self.token or hmac.compare_digest(token or "", self.token)
+
+    def start(self) -> None:
+        threading.Thread(target=self._loop, name="cluster-coordinator", daemon=True).start()
+
+    def _loop(self) -> None:
+        while True:
+            time.sleep(self.agent_timeout / 4)
+            try:
+                self.expire()
+            except Exception as e:
+                output.log(f"Cluster check failed: {e}", "error")
+
+    def assign(self, name: str) -> None:
+        with self._lock:
+            self._branches[name] = None
+            self._place_pending()
+
+    def unassign(self, name: str) -> None:
+        with self._lock:
+            self._branches.pop(name, None)
+            owner = self._owners.pop(name, None)
+            if owner in self._agents:
+                self._agents[owner].assigned.discard(name)
+
+    def request(self, name: str, action: str, **args) -> bool:
+        """Queues a command (e.g. "restart", "update") for the agent running `name`"""
+        with self._lock:
+            agent = self._agents.get(self._owners.get(name))
+            if agent is None:
+                return False
+            agent.commands.append({"name": name, "action": action, **args})
+            return True
+
+    def heartbeat(self, agent_id: str, capacity: int, statuses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            agent = self._agents.get(agent_id)
+            if agent is None:
+                agent = self._agents[agent_id] = _Agent(agent_id, capacity)
+                output.log(f"Agent '{agent_id}' joined with capacity {capacity}", "success")
+            agent.capacity = capacity
+            agent.last_seen = time.monotonic()
+
+            for status in statuses:
+                name = status["name"]
+                if name in self._branches and name not in self._owners:
+                    # already running there (e.g. the coordinator restarted): keep it
+                    self._own(agent, name)
+                    agent.resync.add(name)
+
+            self._place_pending()
+
+            owned = [status for status in statuses if self._owners.get(status["name"]) == agent_id]
+            response = {
+                "assigned": sorted(agent.assigned),
+                "commands": agent.commands,
+                "resync": sorted(agent.resync),
+            }
+            agent.commands = []
+            agent.resync = set()
+
+        for status in owned:
+            tenty = self.tentacles(status["name"])
+            if tenty is not None:
+                tenty.apply_status(agent_id, status)
+        return response
+
+    def apply_events(self, agent_id: str, events: List[Dict[str, Any]]) -> bool:
+        """Applies status and log events of an agent; returns False if the agent is unknown"""
+        with self._lock:
+            agent = self._agents.get(agent_id)
+            if agent is None:
+                return False
+            owned = set(agent.assigned)
+
+        lost = set()
+        for event in events:
+            name = event.get("name")
+            tenty = self.tentacles(name) if name in owned else None
+            if tenty is None:
+                continue  # moved to another agent in the meantime
+            if event["type"] == "status":
+                tenty.apply_status(agent_id, event["status"])
+            elif event["type"] == "logs" and not tenty.apply_logs(event["log_type"], event["logs"]):
+                lost.add(name)
+
+        if lost:
+            with self._lock:
+                agent.resync.update(lost)
+        return True
+
+    def expire(self) -> None:
+        now = time.monotonic()
+        orphaned = []
+        with self._lock:
+            for agent in list(self._agents.values()):
+                if now - agent.last_seen <= self.agent_timeout:
+                    continue
+                output.log(f"Agent '{agent.id}' missed its heartbeats, reassigning {len(agent.assigned)} branches",
+                           "warning")
+                del self._agents[agent.id]
+                for name in agent.assigned:
+                    self._owners.pop(name, None)
+                    orphaned.append(name)
+            self._place_pending()
+
+        for name in orphaned:
+            tenty = self.tentacles(name)
+            if tenty is not None:
+                tenty.unassigned()
+
+    def _own(self, agent: _Agent, name: str) -> None:
+        self._owners[name] = agent.id
+        agent.assigned.add(name)
+
+    def _place_pending(self) -> None:
+        if time.monotonic() - self._started < self.agent_timeout:
+            return  # agents that already run branches have not all reported yet
+
+        for name in self._branches:
+            if name in self._owners:
+                continue
+            candidates = [agent for agent in self._agents.values() if agent.free > 0]
+            if not candidates:
+                return
+            agent = max(candidates, key=lambda a: (a.free, a.capacity, a.id))
+            self._own(agent, name)
+            output.log(f"Branch '{name}' assigned to agent '{agent.id}'", "info")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "agents": [{
+                    "id": agent.id,
+                    "capacity": agent.capacity,
+                    "assigned": sorted(agent.assigned),
+                    "last_seen_seconds_ago": round(now - agent.last_seen, 1),
+                } for agent in self._agents.values()],
+                "pending": [name for name in self._branches if name not in self._owners],
+            }
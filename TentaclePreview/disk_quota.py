@@ -0,0 +1,221 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from TentaclePreview import output
+from TentaclePreview.filesystem_utils import safe_rmtree
+
+TRASH_DIR_NAME = ".trash"
+
+
+def directory_size(path: str | Path) -> int:
+    """Bytes used on disk by a directory tree; symlinks are not followed"""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    # st_blocks counts what the file really takes (sparse files, small files in full blocks)
+                    total += stat.st_blocks * 512 if hasattr(stat, "st_blocks") else stat.st_size
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return total
+
+
+class Trash:
+    """Makes deleting a directory instant for the caller: it is renamed into the trash directory
+    (same filesystem, so the rename is atomic) and removed by a background thread."""
+
+    def __init__(self, trash_dir: str | Path) -> None:
+        self.trash_dir = Path(trash_dir)
+        self.trash_dir.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[Path]" = queue.Queue()
+
+        threading.Thread(target=self._worker, name="trash-collector", daemon=True).start()
+
+        # leftovers of a previous run that stopped before they were removed
+        for leftover in self.trash_dir.iterdir():
+            self._queue.put(leftover)
+
+    def discard(self, path: str | Path) -> bool:
+        path = Path(path)
+        if not path.exists():
+            return True
+
+        target = self.trash_dir / f"{path.name}-{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(path, target)
+        except OSError as e:
+            # e.g. a file still open on Windows: fall back to deleting in place
+            output.log(f"Cannot move {path} to trash ({e}), deleting it in place", "warning")
+            return safe_rmtree(str(path))
+
+        self._queue.put(target)
+        return True
+
+    def _worker(self) -> None:
+        while True:
+            path = self._queue.get()
+            try:
+                if path.is_dir() and not path.is_symlink():
+                    if not safe_rmtree(str(path)):
+                        output.log(f"Failed to delete {path} from trash", "error")
+                else:
+                    path.unlink(missing_ok=True)
+            except OSError as e:
+                output.log(f"Failed to delete {path} from trash: {e}", "error")
+            finally:
+                self._queue.task_done()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for queued deletions; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+
+class DiskQuota:
+    """Keeps `branches_dir` under a size budget by evicting least recently used stopped tentacles.
+
+    Eviction happens in two passes over the stopped tentacles, oldest first: the first one drops
+    build outputs (the checkout stays, so only the build has to run again), the second one drops
+    whole working trees. Running and queued tentacles are never touched: a tentacle is claimed from the
+    scheduler before it is measured and evicted, so no build can start on it meanwhile.
+
+    Sizes are kept per entry of `branches_dir`; a check re-measures only the entries that changed
+    since the last one, `branches_dir` is walked in full on every `check_interval`.
+    """
+
+    def __init__(self, branches_dir: str | Path, budget_mb: float, check_interval: float = 600) -> None:
+        self.branches_dir = Path(branches_dir)
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.check_interval = check_interval
+
+        self.tentacles: Callable[[], List[Any]] = list  # returns the current tentacles
+        self.is_busy: Callable[[str], bool] = lambda name: False  # e.g. queued or building
+        self.claim: Callable[[str], bool] = lambda name: True  # keeps builds off a tentacle until release
+        self.release: Callable[[str], None] = lambda name: None
+
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self.last_usage: Optional[int] = None
+
+        self._sizes: Dict[str, int] = {}  # bytes by entry of branches_dir
+        self._changed: Set[str] = set()
+        self._changed_lock = threading.Lock()
+        self._full_scan = True
+
+    @classmethod
+    def from_config(cls, branches_dir: str | Path, config: Dict[str, Any]) -> "DiskQuota":
+        return cls(
+            branches_dir=branches_dir,
+            budget_mb=config.get("budget_mb", 20480),
+            check_interval=config.get("check_interval_seconds", 600),
+        )
+
+    def start(self) -> None:
+        threading.Thread(target=self._loop, name="disk-quota", daemon=True).start()
+
+    def request_check(self, name: Optional[str] = None) -> None:
+        """Asks for a check soon (e.g. after a build of tentacle `name`), without blocking the caller"""
+        if name is not None:
+            with self._changed_lock:
+                self._changed.add(self._entry(name))
+        self._wakeup.set()
+
+    @staticmethod
+    def _entry(name: str) -> str:
+        """Entry of branches_dir holding the tree of tentacle `name` ("feature/x" lives in "feature")"""
+        return Path(name).parts[0]
+
+    def _loop(self) -> None:
+        while True:
+            if not self._wakeup.wait(self.check_interval):
+                self._full_scan = True
+            self._wakeup.clear()
+            try:
+                self.enforce()
+            except Exception as e:
+                output.log(f"Disk quota check failed: {e}", "error")
+
+    def _measure(self, entry: os.DirEntry) -> int:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                return directory_size(entry.path)
+            return entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            return 0
+
+    def usage(self) -> int:
+        """Bytes used by branches_dir: entries that changed are measured again, the others are cached"""
+        with self._changed_lock:
+            changed, self._changed = self._changed, set()
+        full_scan, self._full_scan = self._full_scan, False
+
+        try:
+            entries = {entry.name: entry for entry in os.scandir(self.branches_dir) if entry.name != TRASH_DIR_NAME}
+        except OSError:
+            return 0
+
+        sizes = {}
+        for name, entry in entries.items():
+            if full_scan or name in changed or name not in self._sizes:
+                sizes[name] = self._measure(entry)
+            else:
+                sizes[name] = self._sizes[name]
+        self._sizes = sizes  # entries gone since the last check drop out
+        return sum(sizes.values())
+
+    def _candidates(self) -> List[Any]:
+        stopped = [tenty for tenty in self.tentacles() if not tenty.is_running and not self.is_busy(tenty.name)]
+        return sorted(stopped, key=lambda tenty: tenty.last_active)
+
+    def enforce(self) -> int:
+        """Evicts until usage fits the budget; returns the number of bytes freed"""
+        with self._lock:
+            usage = self.usage()
+            self.last_usage = usage
+            if usage <= self.budget:
+                return 0
+
+            output.log(f"Branches use {usage / 2 ** 20:.0f} MB of {self.budget / 2 ** 20:.0f} MB, evicting...", "warning")
+            freed = 0
+
+            for outputs_only in (True, False):
+                for tenty in self._candidates():
+                    if usage - freed <= self.budget:
+                        break
+                    if not self.claim(tenty.name):
+                        continue  # queued or building since the candidates were listed
+                    try:
+                        if tenty.is_running:
+                            continue
+                        evicted = tenty.evict(outputs_only=outputs_only)  # measures what it deletes
+                    finally:
+                        self.release(tenty.name)
+                    entry = self._entry(tenty.name)
+                    self._sizes[entry] = max(0, self._sizes.get(entry, 0) - evicted)
+                    freed += evicted
+
+            self.last_usage = usage - freed
+            if usage - freed > self.budget:
+                output.log(f"Still over disk budget after evicting every stopped tentacle "
+                           f"({(usage - freed) / 2 ** 20:.0f} MB)", "warning")
+            else:
+                output.log(f"Evicted {freed / 2 ** 20:.0f} MB of tentacle files", "success")
+            return freed
@@ -1,7 +1,10 @@
+import functools
 import os
+import re
 import stat
 import shutil
 import time
+from typing import Iterable
 from TentaclePreview import output
 
 
@@ -25,4 +28,37 @@ def safe_rmtree(path: str, max_attempts: int = 3, delay: float = 0.2) -> bool:
             output.log(f"Attempt {attempt + 1} failed to delete {path}: {e}", "warning")
             if attempt < max_attempts - 1:
                 time.sleep(delay)
-    return False
\ No newline at end of file
+    return False
+
+
+@functools.lru_cache(maxsize=256)
+def _glob_regex(pattern: str) -> re.Pattern:
+    pattern = pattern.strip().removeprefix("./")
+    if pattern.endswith("/"):
+        pattern += "**"
+
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex)
+
+
+def path_matches(path: str, patterns: Iterable[str]) -> bool:
+    """Matches a repo-relative posix path against globs: `*` stays within a directory, `**` crosses them,
+    and a trailing `/` matches everything below a directory."""
+    return any(_glob_regex(pattern).fullmatch(path) for pattern in patterns)
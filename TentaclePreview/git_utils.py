@@ -1,26 +1,56 @@
-from typing import List, Literal
+import re
+from typing import TYPE_CHECKING, Dict, List, Literal
 
-from github.Branch import Branch
-from github.Repository import Repository
+if TYPE_CHECKING:  # GitPython and PyGithub are slow to import, they load once the server is up
+    from github.Branch import Branch
+    from github.Repository import Repository
 
 
-def get_filtered_github_repo_branches(repo: Repository,
+def branch_filter(filter_mode: Literal["exclude", "include"] = "exclude",
+                  filter_branches: List[str] | None = None):
+    """Predicate on branch names for the `filter_mode`/`filter_branches` config"""
+    if not filter_branches:
+        return lambda name: True
+
+    match filter_mode:
+        case "exclude":
+            return lambda name: name not in filter_branches
+        case "include":
+            return lambda name: name in filter_branches
+        case _:
+            raise ValueError(f"Invalid filter mode: {filter_mode}")
+
+
+def get_filtered_github_repo_branches(repo: "Repository",
                                       filter_mode: Literal["exclude", "include"] = "exclude",
-                                      filter_branches: List[str] | None = None) -> List[Branch]:
-    if filter_branches:
-        match filter_mode:
-            case "exclude":
-                branch_filter = lambda branch: branch.name not in filter_branches
-            case "include":
-                branch_filter = lambda branch: branch.name in filter_branches
-            case _:
-                raise ValueError(f"Invalid filter mode: {filter_mode}")
-
-    branches = list(repo.get_branches())
+                                      filter_branches: List[str] | None = None) -> List["Branch"]:
+    is_included = branch_filter(filter_mode, filter_branches)
 
     # TODO maybe storage branch names only
     # branches = [branch.name for branch in branches]
-    if filter_branches:
-        branches = list(filter(branch_filter, branches))
+    return [branch for branch in repo.get_branches() if is_included(branch.name)]
+
+
+def authenticated_clone_url(repo: "Repository") -> str:
+    """HTTPS clone URL with the API token in it, so private repositories can be cloned and listed"""
+    result = repo.clone_url
+    if repo.requester.auth:
+        result = result.replace("https://", f"https://{repo.requester.auth.token}@")
+    return result
+
+
+def hide_credentials(text: str) -> str:
+    """Strips tokens from URLs in git error messages before they are logged"""
+    return re.sub(r"(\w+://)[^@/\s]+@", r"\1***@", text)
+
+
+def ls_remote_heads(url: str) -> Dict[str, str]:
+    """Branch name -> head commit of every branch of the remote, in a single `git ls-remote`"""
+    from git import Git
 
-    return branches
+    heads = {}
+    for line in Git().ls_remote("--heads", url).splitlines():
+        sha, _, ref = line.partition("\t")
+        if ref.startswith("refs/heads/"):
+            heads[ref.removeprefix("refs/heads/")] = sha
+    return heads
@@ -0,0 +1,399 @@
+import collections
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote, unquote
+
+from TentaclePreview import output
+
+SYSTEM_SOURCE = "system"
+
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+
+def trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def regex_literals(pattern: str) -> List[str]:
+    """Literal substrings every match of `pattern` must contain (best effort, may return nothing).
+
+    Only literals outside of groups count: a group may be optional, repeated or a lookaround, so
+    nothing inside one is required.
+    """
+    if "|" in pattern or re.match(r"\(\?[a-zA-Z]*x", pattern):  # alternation, verbose mode
+        return []
+
+    runs: List[str] = []
+    current = ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            if escaped.isalnum() or depth:  # \d, \w, \b... are classes, not literals
+                runs.append(current)
+                current = ""
+            else:
+                current += escaped
+            i += 2
+            continue
+        if char == "[":
+            runs.append(current)
+            current = ""
+            end = pattern.find("]", i + 2)
+            i = end if end != -1 else len(pattern)
+        elif char == "(":
+            runs.append(current)
+            current = ""
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif depth:
+            pass
+        elif char in "?*{":
+            current = current[:-1]  # the previous char is optional
+            runs.append(current)
+            current = ""
+            if char == "{":
+                i = pattern.find("}", i) if "}" in pattern[i:] else len(pattern)
+        elif char in _REGEX_META:
+            runs.append(current)
+            current = ""
+        else:
+            current += char
+        i += 1
+    runs.append(current)
+    return [run for run in runs if len(run) >= 3]
+
+
+class _Segment:
+    """One append-only file of `time<TAB>stream<TAB>text` lines plus its trigram index"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.min_ts: Optional[float] = None
+        self.max_ts: Optional[float] = None
+        self.lines = 0
+        self.size = path.stat().st_size if path.exists() else 0
+        self.sealed = False
+        self._trigrams: Optional[Set[str]] = None
+
+    @property
+    def meta_path(self) -> Path:
+        return self.path.with_suffix(".meta")
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_suffix(".tri")
+
+    def overlaps(self, since: Optional[float], until: Optional[float]) -> bool:
+        if self.min_ts is None:
+            return False
+        if since is not None and self.max_ts < since:
+            return False
+        if until is not None and self.min_ts > until:
+            return False
+        return True
+
+    def add(self, first_ts: float, last_ts: float, text: str, lines: int = 1) -> None:
+        if self.min_ts is None:
+            self.min_ts = first_ts
+        self.max_ts = max(self.max_ts or last_ts, last_ts)
+        self.lines += lines
+        self._trigrams.update(trigrams(text))
+
+    def trigram_set(self) -> Set[str]:
+        if self._trigrams is None:
+            try:
+                self._trigrams = set(json.loads(self.index_path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                self._trigrams = None
+                return set()
+        return self._trigrams
+
+    def seal(self) -> None:
+        self.meta_path.write_text(json.dumps({"min_ts": self.min_ts, "max_ts": self.max_ts, "lines": self.lines}))
+        self.index_path.write_text(json.dumps(sorted(self._trigrams or ())), encoding="utf-8")
+        self.sealed = True
+        self._trigrams = None  # loaded back lazily by searches
+
+    def rebuild(self) -> None:
+        """Recovers an unsealed segment left over from a previous run"""
+        self._trigrams = set()
+        for ts, _stream, text in _read_lines(self.path):
+            self.add(ts, ts, text)
+
+    def load_meta(self) -> bool:
+        try:
+            meta = json.loads(self.meta_path.read_text())
+        except (OSError, ValueError):
+            return False
+        self.min_ts, self.max_ts, self.lines = meta["min_ts"], meta["max_ts"], meta["lines"]
+        self.sealed = True
+        return True
+
+    def delete(self) -> None:
+        for path in (self.path, self.meta_path, self.index_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _read_lines(path: Path):
+    with open(path, "r", encoding="utf-8", errors="replace", newline="\n") as f:
+        for raw in f:
+            parts = raw.rstrip("\n").split("\t", 2)
+            if len(parts) != 3:
+                continue
+            try:
+                yield float(parts[0]), parts[1], parts[2]
+            except ValueError:
+                continue
+
+
+class _Source:
+    def __init__(self, name: str, directory: Path) -> None:
+        self.name = name
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.segments: List[_Segment] = []
+        self.file = None
+
+
+class LogStore:
+    """On-disk log segments per tentacle (and for system logs) with a trigram index for fast search.
+
+    Only the active segment's index lives in memory; sealed segments keep their index next to the
+    data and are loaded on demand by searches.
+    """
+
+    def __init__(self, root: str | Path, segment_size_mb: float = 4, retention_mb: float = 64,
+                 index_cache_size: int = 64) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_size = int(segment_size_mb * 1024 * 1024)
+        self.retention = int(retention_mb * 1024 * 1024)
+        self.index_cache_size = index_cache_size
+
+        self._lock = threading.Lock()
+        self._sources: Dict[str, _Source] = {}
+        self._index_cache: Deque[_Segment] = collections.deque()
+
+        for directory in sorted(self.root.iterdir()):
+            if directory.is_dir():
+                self._load_source(unquote(directory.name), directory)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "LogStore":
+        return cls(
+            root=config.get("dir", "log_store"),
+            segment_size_mb=config.get("segment_size_mb", 4),
+            retention_mb=config.get("retention_mb_per_tentacle", 64),
+        )
+
+    def _load_source(self, name: str, directory: Path) -> _Source:
+        source = _Source(name, directory)
+        for path in sorted(directory.glob("*.log")):
+            segment = _Segment(path)
+            if not segment.load_meta():
+                segment.rebuild()
+                if segment.lines:
+                    segment.seal()
+            if segment.lines:
+                source.segments.append(segment)
+            else:
+                segment.delete()
+        self._sources[name] = source
+        return source
+
+    def _source(self, name: str) -> _Source:
+        source = self._sources.get(name)
+        if source is None:
+            with self._lock:
+                source = self._sources.get(name)
+                if source is None:
+                    directory = self.root / quote(name, safe="")
+                    directory.mkdir(parents=True, exist_ok=True)
+                    source = _Source(name, directory)
+                    self._sources[name] = source
+        return source
+
+    def _open_segment(self, source: _Source) -> _Segment:
+        number = int(source.segments[-1].path.stem) + 1 if source.segments else 1
+        segment = _Segment(source.directory / f"{number:08d}.log")
+        segment._trigrams = set()
+        source.segments.append(segment)
+        source.file = open(segment.path, "a", encoding="utf-8", newline="\n")
+        return segment
+
+    def _rotate(self, source: _Source) -> None:
+        source.file.close()
+        source.file = None
+        source.segments[-1].seal()
+
+        total = sum(segment.size for segment in source.segments)
+        while len(source.segments) > 1 and total > self.retention:
+            oldest = source.segments.pop(0)
+            total -= oldest.size
+            oldest.delete()
+
+    def append(self, source_name: str, stream: str, lines: Iterable[str], ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        self.append_records(source_name, [(ts, stream, line) for line in lines])
+
+    def append_records(self, source_name: str, records: List[Tuple[float, str, str]]) -> None:
+        """Appends (time, stream, text) records in one write"""
+        if not records:
+            return
+
+        texts = [text.replace("\n", " ") for _, _, text in records]
+        data = "".join(f"{ts:.3f}\t{stream}\t{text}\n" for (ts, stream, _), text in zip(records, texts))
+        source = self._source(source_name)
+
+        with source.lock:
+            if source.file is None:
+                segment = self._open_segment(source)
+            else:
+                segment = source.segments[-1]
+
+            source.file.write(data)
+            segment.size += len(data.encode("utf-8"))
+            # one pass over the whole batch: the few extra trigrams spanning lines are harmless
+            segment.add(records[0][0], records[-1][0], "\n".join(texts), len(records))
+
+            if segment.size >= self.segment_size:
+                self._rotate(source)
+
+    def flush(self) -> None:
+        for source in list(self._sources.values()):
+            with source.lock:
+                if source.file is not None:
+                    source.file.flush()
+
+    def close(self) -> None:
+        for source in list(self._sources.values()):
+            with source.lock:
+                if source.file is not None:
+                    self._rotate(source)
+
+    def delete_source(self, source_name: str) -> None:
+        source = self._sources.pop(source_name, None)
+        if source is None:
+            return
+        with source.lock:
+            if source.file is not None:
+                source.file.close()
+                source.file = None
+            for segment in source.segments:
+                segment.delete()
+            source.segments.clear()
+        try:
+            source.directory.rmdir()
+        except OSError:
+            pass
+
+    def _segment_trigrams(self, segment: _Segment) -> Set[str]:
+        """Index of a sealed segment, kept in a small LRU cache instead of memory for all segments"""
+        with self._lock:
+            index = segment.trigram_set()
+            if segment in self._index_cache:
+                self._index_cache.remove(segment)
+            self._index_cache.append(segment)
+            while len(self._index_cache) > self.index_cache_size:
+                evicted = self._index_cache.popleft()
+                if evicted.sealed:
+                    evicted._trigrams = None
+            return index
+
+    def _may_contain(self, source: _Source, segment: _Segment, required: Set[str]) -> bool:
+        if not required:
+            return True
+        with source.lock:
+            if not segment.sealed:
+                return required <= segment._trigrams
+        return required <= self._segment_trigrams(segment)
+
+    def search(self, query: str, regex: bool = False, ignore_case: bool = False,
+               sources: Optional[List[str]] = None, since: Optional[float] = None, until: Optional[float] = None,
+               context: int = 2, limit: int = 200) -> Dict[str, Any]:
+        started = time.perf_counter()
+        flags = re.IGNORECASE if ignore_case else 0
+        pattern = re.compile(query if regex else re.escape(query), flags)
+
+        required = set()
+        for literal in (regex_literals(query) if regex else [query]):
+            required |= trigrams(literal)
+
+        self.flush()
+
+        candidates = []
+        with self._lock:
+            selected = [self._sources[name] for name in (sources or self._sources) if name in self._sources]
+        for source in selected:
+            with source.lock:
+                segments = list(source.segments)
+            for segment in segments:
+                if segment.overlaps(since, until) and self._may_contain(source, segment, required):
+                    candidates.append((source.name, segment))
+
+        # newest segments first, so a hit limit keeps the most recent matches
+        candidates.sort(key=lambda item: item[1].max_ts, reverse=True)
+
+        results: List[Dict[str, Any]] = []
+        scanned = 0
+        for source_name, segment in candidates:
+            if len(results) >= limit:
+                break
+            scanned += 1
+            results.extend(self._scan(source_name, segment, pattern, since, until, context, limit - len(results)))
+
+        results.sort(key=lambda result: result["time"], reverse=True)
+        return {
+            "query": query,
+            "regex": regex,
+            "results": results,
+            "truncated": len(results) >= limit,
+            "segments_scanned": scanned,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    @staticmethod
+    def _scan(source_name: str, segment: _Segment, pattern: re.Pattern, since: Optional[float],
+              until: Optional[float], context: int, limit: int) -> List[Dict[str, Any]]:
+        """The last `limit` matches of the segment, oldest first"""
+        matches: Deque[Dict[str, Any]] = collections.deque(maxlen=limit)
+        before: Deque[str] = collections.deque(maxlen=context)
+        waiting_for_after: List[Dict[str, Any]] = []
+
+        try:
+            for ts, stream, text in _read_lines(segment.path):
+                for match in waiting_for_after:
+                    match["after"].append(text)
+                waiting_for_after = [m for m in waiting_for_after if len(m["after"]) < context]
+
+                in_range = (since is None or ts >= since) and (until is None or ts <= until)
+                if in_range and pattern.search(text):
+                    match = {
+                        "source": source_name,
+                        "stream": stream,
+                        "time": ts,
+                        "text": text,
+                        "before": list(before),
+                        "after": [],
+                    }
+                    matches.append(match)  # pushes out the oldest one once `limit` is reached
+                    if context:
+                        waiting_for_after.append(match)
+
+                before.append(text)
+        except OSError as e:
+            output.log(f"Failed to read log segment {segment.path}: {e}", "warning")
+
+        return list(matches)
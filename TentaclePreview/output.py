@@ -1,6 +1,10 @@
+import atexit
 import enum
 import json
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
 from typing import List, Literal, Callable, Any, Dict
 
@@ -12,19 +16,39 @@ class LogType(enum.Enum):
     ERROR = "error"
     HEADER = "header"
 
+_last_formatted: tuple[int, str] = (-1, "")
+
+
+def format_time(created: float) -> str:
+    """Formats a unix timestamp, reusing the result for entries logged within the same second"""
+    global _last_formatted
+
+    second = int(created)
+    cached_second, text = _last_formatted
+    if second != cached_second:
+        text = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+        _last_formatted = (second, text)
+    return text
+
+
 class LogEntry:
-    def __init__(self, message: str, log_type: LogType) -> None:
+    __slots__ = ("message", "log_type", "created", "kwargs")
+
+    def __init__(self, message: str, log_type: LogType, created: float | None = None, **kwargs: Any) -> None:
         if not isinstance(log_type, LogType):
             raise TypeError("type must be of type LogType")
 
         if not isinstance(message, str):
             raise TypeError("message must be of type str")
 
-        self.message = message
-
         self.message = message
         self.log_type = log_type
-        self.time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.created = time.time() if created is None else created  # formatted only when rendered
+        self.kwargs = kwargs
+
+    @property
+    def time(self) -> str:
+        return format_time(self.created)
 
     def __json__(self):
         return {
@@ -35,7 +59,17 @@ class LogEntry:
 
 ENABLED_LOG_LEVELS: List[Literal["all", "info", "success", "warning", "error", "progressbar"]] | str = "all"
 
-on_log_event: List[Callable[[LogEntry, dict[str, Any]], None]] = []
+# Handlers run on the dispatcher thread and receive batches of entries
+on_log_event: List[Callable[[List[LogEntry]], None]] = []
+
+LOG_QUEUE_SIZE = 10_000
+LOG_BATCH_SIZE = 500
+
+_queue: "queue.Queue[LogEntry]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_dropped = 0  # entries lost to a full queue, reported by the dispatcher
+_dropped_lock = threading.Lock()
+_dispatcher: threading.Thread | None = None
+_dispatcher_lock = threading.Lock()
 
 COLORS = {
     "info": "\033[36m",
@@ -56,18 +90,29 @@ PREFIXES = {
 }
 
 
-def default_log(log_entry :LogEntry, **kwargs :dict[str, Any]) -> None:
-    prefix = PREFIXES.get(log_entry.log_type.value, "ℹ️ [INFO]")
-    color = COLORS.get(log_entry.log_type.value, "\033[36m")
+def default_log(entries: List[LogEntry]) -> None:
+    lines = []
+    for log_entry in entries:
+        prefix = PREFIXES.get(log_entry.log_type.value, "ℹ️ [INFO]")
+        color = COLORS.get(log_entry.log_type.value, "\033[36m")
+        line = f"{color}{prefix} [{log_entry.time}] {log_entry.message}{COLORS['reset']}"
 
-    print(f"{color}{prefix} [{log_entry.time}] {log_entry.message}{COLORS['reset']}", **kwargs)
+        if log_entry.kwargs:
+            sys.stdout.write("".join(lines))
+            lines.clear()
+            print(line, **log_entry.kwargs)
+        else:
+            lines.append(line + "\n")
+
+    sys.stdout.write("".join(lines))
+    sys.stdout.flush()
 
 
 on_log_event.append(default_log)
 
 
 def log(message: str, log_type: LogType | Literal["info", "success", "warning", "error", "header"] = LogType.INFO, **kwargs: Any) -> None:
-    global ENABLED_LOG_LEVELS, COLORS, PREFIXES
+    global ENABLED_LOG_LEVELS, COLORS, PREFIXES, _dropped
 
     if isinstance(log_type, str):
         log_type = LogType(log_type)
@@ -76,10 +121,62 @@ def log(message: str, log_type: LogType | Literal["info", "success", "warning",
         if log_type.value not in ENABLED_LOG_LEVELS:
             return
 
-    log_entry = LogEntry(message, log_type)
+    log_entry = LogEntry(message, log_type, **kwargs)
+
+    if _dispatcher is None:
+        _start_dispatcher()
+
+    try:
+        _queue.put_nowait(log_entry)
+    except queue.Full:  # a slow handler must never block the thread that logs
+        with _dropped_lock:
+            _dropped += 1
+
+
+def _start_dispatcher() -> None:
+    global _dispatcher
+
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = threading.Thread(target=_dispatch_loop, name="log-dispatcher", daemon=True)
+            _dispatcher.start()
+
+
+def _dispatch_loop() -> None:
+    global _dropped
+
+    while True:
+        batch = [_queue.get()]
+        try:
+            while len(batch) < LOG_BATCH_SIZE:
+                batch.append(_queue.get_nowait())
+        except queue.Empty:
+            pass
+        taken = len(batch)
+
+        if _dropped:
+            with _dropped_lock:
+                dropped, _dropped = _dropped, 0
+            batch.append(LogEntry(f"Log queue overflow: {dropped} messages dropped", LogType.WARNING))
+
+        for handler in list(on_log_event):
+            try:
+                handler(batch)
+            except Exception as e:
+                sys.stderr.write(f"Log handler {getattr(handler, '__name__', handler)} failed: {e}\n")
+
+        for _ in range(taken):
+            _queue.task_done()
+
+
+def flush(timeout: float = 2.0) -> None:
+    """Waits until queued entries reach every handler (e.g. before exit)"""
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.01)
+
 
-    for event in on_log_event:
-        event(log_entry, **kwargs)
+atexit.register(flush)
 
 
 anim = ['\\ ', '| ', '/ ', '- ']
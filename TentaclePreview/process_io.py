@@ -0,0 +1,279 @@
+import codecs
+import os
+import selectors
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from TentaclePreview import output
+
+LinesCallback = Callable[[List[str]], None]
+ExitCallback = Callable[[Optional[int]], None]
+
+CHUNK_SIZE = 64 * 1024
+POLL_INTERVAL = 0.2  # for log files and processes without a pidfd
+
+
+class LineReader:
+    """Turns chunks of bytes into complete lines, keeping the unfinished tail for the next chunk"""
+
+    def __init__(self) -> None:
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+
+    def feed(self, data: bytes) -> List[str]:
+        text = self._partial + self._decoder.decode(data)
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        return [line.rstrip("\r") for line in lines]
+
+    def finish(self) -> List[str]:
+        rest = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        return [rest.rstrip("\r")] if rest else []
+
+
+class _Watch:
+    """Everything read from one process: its pipes (or log file) and its exit"""
+
+    def __init__(self, process, on_lines: LinesCallback, on_exit: Optional[ExitCallback]) -> None:
+        self.process = process
+        self.on_lines = on_lines
+        self.on_exit = on_exit
+        self.readers: Dict[int, LineReader] = {}  # open pipe fd -> reader
+        self.pipes: Dict[int, object] = {}  # fd -> file object, closed on EOF
+        self.file = None  # followed log file
+        self.file_reader: Optional[LineReader] = None
+        self.pidfd: Optional[int] = None
+        self.exited = False
+
+
+class OutputMultiplexer:
+    """Reads the output of every tentacle process on a single thread.
+
+    Pipes and pidfds are registered with a selector; log files (which are always "readable") and
+    processes without a pidfd are polled every `poll_interval`. Callbacks run on this thread and
+    must not block.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, poll_interval: float = POLL_INTERVAL) -> None:
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._pending: List[_Watch] = []
+        self._watches: List[_Watch] = []
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+
+        self._thread = threading.Thread(target=self._loop, name="tentacle-output", daemon=True)
+        self._thread.start()
+
+    def watch_pipes(self, process, on_lines: LinesCallback, on_exit: Optional[ExitCallback] = None) -> None:
+        """Follows `process.stdout`/`process.stderr` (opened in binary mode) until EOF"""
+        watch = _Watch(process, on_lines, on_exit)
+        for stream in (process.stdout, process.stderr):
+            if stream is not None:
+                fd = stream.fileno()
+                os.set_blocking(fd, False)
+                watch.pipes[fd] = stream
+                watch.readers[fd] = LineReader()
+        self._add(watch)
+
+    def watch_file(self, path: Path, process, on_lines: LinesCallback, on_exit: Optional[ExitCallback] = None) -> None:
+        """Like `tail -f`: follows a log file the process writes to until the process is gone"""
+        watch = _Watch(process, on_lines, on_exit)
+        watch.file = open(path, "rb")
+        watch.file_reader = LineReader()
+        self._add(watch)
+
+    def _add(self, watch: _Watch) -> None:
+        watch.pidfd = _open_pidfd(watch.process.pid)
+        with self._lock:
+            self._pending.append(watch)
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except BlockingIOError:
+            pass  # already woken up
+
+    def _register_pending(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        for watch in pending:
+            for fd in watch.pipes:
+                self._selector.register(fd, selectors.EVENT_READ, (watch, fd))
+            if watch.pidfd is not None:
+                self._selector.register(watch.pidfd, selectors.EVENT_READ, (watch, None))
+            self._watches.append(watch)
+
+    def _needs_polling(self) -> bool:
+        return any(watch.file is not None or (watch.pidfd is None and not watch.exited) for watch in self._watches)
+
+    def _loop(self) -> None:
+        while True:
+            self._register_pending()
+            timeout = self.poll_interval if self._needs_polling() else None
+
+            for key, _ in self._selector.select(timeout):
+                if key.data is None:
+                    try:
+                        while os.read(self._wakeup_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+
+                watch, fd = key.data
+                try:
+                    if fd is None:
+                        self._process_exited(watch)
+                    else:
+                        self._read_pipe(watch, fd)
+                except Exception as e:
+                    output.log(f"Error reading tentacle output: {e}", "error")
+
+            for watch in list(self._watches):
+                try:
+                    if watch.file is not None:
+                        self._read_file(watch)
+                    if watch.pidfd is None and not watch.exited and watch.process.poll() is not None:
+                        self._process_exited(watch)
+                except Exception as e:
+                    output.log(f"Error reading tentacle output: {e}", "error")
+                self._cleanup(watch)
+
+    def _read_pipe(self, watch: _Watch, fd: int) -> None:
+        if fd not in watch.readers:
+            return  # closed by _process_exited earlier in the same select round
+        try:
+            data = os.read(fd, self.chunk_size)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+
+        reader = watch.readers[fd]
+        if data:
+            lines = reader.feed(data)
+        else:
+            lines = reader.finish()
+            self._selector.unregister(fd)
+            watch.pipes.pop(fd).close()
+            del watch.readers[fd]
+
+        if lines:
+            watch.on_lines(lines)
+
+    def _read_file(self, watch: _Watch) -> None:
+        lines: List[str] = []
+        while True:
+            data = watch.file.read(self.chunk_size)
+            if not data:
+                break
+            lines.extend(watch.file_reader.feed(data))
+
+        if watch.exited:
+            # the process is gone and the file is drained: nothing more will arrive
+            lines.extend(watch.file_reader.finish())
+            watch.file.close()
+            watch.file = None
+
+        if lines:
+            watch.on_lines(lines)
+
+    def _process_exited(self, watch: _Watch) -> None:
+        if watch.pidfd is not None:
+            self._selector.unregister(watch.pidfd)
+            os.close(watch.pidfd)
+            watch.pidfd = None
+
+        watch.exited = True
+        returncode = watch.process.poll()  # reaps our own children, so no zombies are left behind
+
+        # deliver the last output before reporting the exit
+        for fd in list(watch.pipes):
+            self._read_pipe(watch, fd)
+        if watch.file is not None:
+            self._read_file(watch)
+
+        if watch.on_exit is not None:
+            watch.on_exit(returncode)
+
+    def _cleanup(self, watch: _Watch) -> None:
+        if watch.exited and not watch.pipes and watch.file is None:
+            self._watches.remove(watch)
+
+
+def _open_pidfd(pid: int) -> Optional[int]:
+    """A descriptor that becomes readable when the process exits (Linux 5.3+), None elsewhere"""
+    if not hasattr(os, "pidfd_open"):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        return None
+
+
+class ThreadedOutputReader:
+    """Fallback for platforms where pipes can't be selected (Windows): a thread per stream"""
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, poll_interval: float = POLL_INTERVAL) -> None:
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+
+    def watch_pipes(self, process, on_lines: LinesCallback, on_exit: Optional[ExitCallback] = None) -> None:
+        streams = [stream for stream in (process.stdout, process.stderr) if stream is not None]
+        for stream in streams:
+            threading.Thread(target=self._read_stream, args=(stream, on_lines), daemon=True).start()
+        if on_exit is not None:
+            threading.Thread(target=lambda: on_exit(process.wait()), daemon=True).start()
+
+    def watch_file(self, path: Path, process, on_lines: LinesCallback, on_exit: Optional[ExitCallback] = None) -> None:
+        threading.Thread(target=self._follow_file, args=(path, process, on_lines, on_exit), daemon=True).start()
+
+    def _read_stream(self, stream, on_lines: LinesCallback) -> None:
+        reader = LineReader()
+        try:
+            for data in iter(lambda: stream.read1(self.chunk_size), b""):
+                lines = reader.feed(data)
+                if lines:
+                    on_lines(lines)
+        except (OSError, ValueError):
+            pass
+        finally:
+            rest = reader.finish()
+            if rest:
+                on_lines(rest)
+            stream.close()
+
+    def _follow_file(self, path: Path, process, on_lines: LinesCallback, on_exit: Optional[ExitCallback]) -> None:
+        reader = LineReader()
+        with open(path, "rb") as f:
+            while True:
+                exited = process.poll() is not None
+                lines: List[str] = []
+                for data in iter(lambda: f.read(self.chunk_size), b""):
+                    lines.extend(reader.feed(data))
+                if exited:
+                    lines.extend(reader.finish())
+                if lines:
+                    on_lines(lines)
+                if exited:
+                    break
+                time.sleep(self.poll_interval)
+        if on_exit is not None:
+            on_exit(process.poll())
+
+
+def create_multiplexer():
+    if os.name == "nt":
+        return ThreadedOutputReader()
+    return OutputMultiplexer()
@@ -0,0 +1,201 @@
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+_local = threading.local()
+
+
+class RequestTiming:
+    """Where the time of one request went, phase by phase (seconds)"""
+
+    def __init__(self, method: str, path: str) -> None:
+        self.method = method
+        self.path = path
+        self.tentacle: Optional[str] = None
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.handled: Optional[float] = None  # seconds until the response headers were ready
+        self.phases: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def finish_handling(self) -> None:
+        self.handled = time.perf_counter() - self.started
+
+    def header(self) -> str:
+        """`Server-Timing` value, durations in milliseconds"""
+        metrics = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items()]
+        metrics.append(f"total;dur={(self.handled or 0.0) * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+def begin(method: str, path: str) -> RequestTiming:
+    _local.timing = RequestTiming(method, path)
+    return _local.timing
+
+
+def end() -> None:
+    _local.timing = None
+
+
+def current() -> Optional[RequestTiming]:
+    return getattr(_local, "timing", None)
+
+
+@contextmanager
+def phase(name: str):
+    timing = current()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+@contextmanager
+def upstream():
+    """Times a request to the tentacle until its response headers arrive.
+
+    Opening a new connection counts as `connect` (done by TimedHTTPAdapter), the rest is `ttfb`.
+    """
+    timing = current()
+    if timing is None:
+        yield
+        return
+    connect_before = timing.phases.get("connect", 0.0)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        connect = timing.phases.get("connect", 0.0) - connect_before
+        timing.add("ttfb", time.perf_counter() - started - connect)
+
+
+class SlowRequestLog:
+    """Ring buffer of the last `size` requests that took at least `threshold` seconds"""
+
+    def __init__(self, threshold: float = 1.0, size: int = 200) -> None:
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries: deque = deque(maxlen=size)
+        self.recorded = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SlowRequestLog":
+        return cls(
+            threshold=config.get("slow_request_ms", 1000) / 1000,
+            size=config.get("slow_requests_kept", 200),
+        )
+
+    def finish(self, timing: RequestTiming, status: int) -> None:
+        """Called once the response body is sent"""
+        duration = time.perf_counter() - timing.started
+        if duration < self.threshold:
+            return
+
+        phases = {name: round(seconds * 1000, 1) for name, seconds in timing.phases.items()}
+        if timing.handled is not None:
+            phases["send"] = round((duration - timing.handled) * 1000, 1)  # the body, streamed ones included
+        with self._lock:
+            self._entries.append({
+                "time": timing.started_at,
+                "method": timing.method,
+                "path": timing.path,
+                "tentacle": timing.tentacle,
+                "status": status,
+                "duration_ms": round(duration * 1000, 1),
+                "phases_ms": phases,
+            })
+            self.recorded += 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+
+class _TimedConnection(HTTPConnection):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            timing = current()
+            if timing is not None:
+                timing.add("connect", time.perf_counter() - started)
+
+
+class _TimedConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """Adds the time spent opening connections to the current request timing"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {**self.poolmanager.pool_classes_by_scheme,
+                                                   "http": _TimedConnectionPool}
+
+
+# --- sampling profiler ---
+
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+
+
+def _short_path(filename: str) -> str:
+    index = filename.rfind("site-packages" + os.sep)
+    if index != -1:
+        return filename[index + len("site-packages" + os.sep):]
+    for prefix in (_STDLIB, os.getcwd() + os.sep):
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+def sample_stacks(seconds: float, interval: float = 0.01) -> Dict[str, Any]:
+    """Samples the stacks of every thread but the calling one for `seconds`.
+
+    Stacks are counted in the collapsed format (`thread;outer;...;inner`), the input of flamegraph.pl
+    and speedscope. It's wall-clock time: threads waiting for I/O show up as much as busy ones.
+    """
+    own = threading.get_ident()
+    stacks: Counter = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, f"thread-{thread_id}").replace(";", ","))
+            stacks[";".join(reversed(labels))] += 1
+        samples += 1
+        time.sleep(interval)
+
+    return {"seconds": seconds, "interval": interval, "samples": samples, "stacks": stacks}
+
+
+def collapsed(profile: Dict[str, Any]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].most_common())
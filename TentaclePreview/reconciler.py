@@ -0,0 +1,79 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from TentaclePreview import output
+from TentaclePreview.git_utils import hide_credentials
+
+DELETED_SHA = "0000000000000000000000000000000000000000"
+
+
+class Reconciler:
+    """Catches up on missed webhooks.
+
+    Every `interval` (+ up to `jitter`, so several servers don't poll the remote in lockstep) seconds, the
+    heads of all branches are listed at once and compared with the local tentacles; every difference is
+    replayed as a push event: new branches are created, moved ones updated and gone ones deleted.
+    Branches that are queued or building are left alone, their job will fetch the latest commit anyway.
+    """
+
+    def __init__(self, interval: float = 300, jitter: float = 30) -> None:
+        self.interval = interval
+        self.jitter = jitter
+
+        self.remote_heads: Callable[[], Dict[str, str]] = dict  # branch -> commit on the remote
+        self.local_heads: Callable[[], Dict[str, Optional[str]]] = dict  # branch -> checked out commit, None if unknown
+        self.is_busy: Callable[[str], bool] = lambda name: False
+        self.is_watched: Callable[[str], bool] = lambda name: True  # new branches outside the filter are not created
+        self.on_event: Callable[[str, str], None] = lambda name, after: None  # like a push of `after`
+
+        self.last_run: Optional[float] = None
+        self.last_events = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "Reconciler":
+        return cls(
+            interval=config.get("interval_seconds", 300),
+            jitter=config.get("jitter_seconds", 30),
+        )
+
+    def start(self) -> None:
+        threading.Thread(target=self._loop, name="reconciler", daemon=True).start()
+
+    def _loop(self) -> None:
+        while True:
+            time.sleep(self.interval + random.uniform(0, self.jitter))
+            try:
+                self.reconcile()
+            except Exception as e:
+                output.log(f"Branch reconciliation failed: {hide_credentials(str(e))}", "error")
+
+    def reconcile(self) -> int:
+        """Replays the differences as events; returns how many there were"""
+        remote = self.remote_heads()
+        local = self.local_heads()
+
+        events = []
+        for name, sha in remote.items():
+            if name not in local and self.is_watched(name):
+                events.append((name, sha))
+            elif name in local and local[name] is not None and local[name] != sha:
+                events.append((name, sha))
+        for name in local:
+            if name not in remote:
+                events.append((name, DELETED_SHA))
+
+        events = [(name, after) for name, after in events if not self.is_busy(name)]
+        for name, after in events:
+            if after == DELETED_SHA:
+                output.log(f"Reconciler: branch '{name}' is gone from the remote", "warning")
+            elif name in local:
+                output.log(f"Reconciler: branch '{name}' moved to {after[:7]}", "warning")
+            else:
+                output.log(f"Reconciler: found new branch '{name}'", "warning")
+            self.on_event(name, after)
+
+        self.last_run = time.time()
+        self.last_events = len(events)
+        return len(events)
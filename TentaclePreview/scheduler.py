@@ -0,0 +1,243 @@
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from TentaclePreview import output
+
+PRIORITY_EXPLICIT = 0  # restarted from the dashboard / API
+PRIORITY_VIEWED = 1  # someone looked at this preview recently
+PRIORITY_DEFAULT = 2
+
+DEFAULT_BUILD_SECONDS = 60.0
+
+
+def free_memory_mb() -> Optional[float]:
+    """MemAvailable from /proc/meminfo, None where it can't be read"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def load_average() -> Optional[float]:
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+class BuildJob:
+    _counter = itertools.count()
+
+    def __init__(self, name: str, action: Callable[[], Any], reason: str, explicit: bool) -> None:
+        self.name = name
+        self.action = action
+        self.reason = reason
+        self.explicit = explicit
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.seq = next(BuildJob._counter)
+        self.future: Future = Future()
+
+
+class BuildScheduler:
+    """Runs tentacle builds on a few worker threads, admitting a new build only while the machine has headroom.
+
+    Jobs are keyed by branch name: a branch never builds twice at once, and a second submit for a
+    branch that is still waiting replaces its action instead of queueing another build.
+    """
+
+    def __init__(self, max_parallel: int | str | None = "auto", max_load_per_cpu: float = 1.0,
+                 min_free_memory_mb: float = 512, recent_view_seconds: float = 600,
+                 poll_interval: float = 1.0) -> None:
+        cpu_count = os.cpu_count() or 1
+        if max_parallel in (None, "auto"):
+            max_parallel = max(1, cpu_count // 2)
+
+        self.cpu_count = cpu_count
+        self.max_parallel = int(max_parallel)
+        self.max_load_per_cpu = max_load_per_cpu
+        self.min_free_memory_mb = min_free_memory_mb
+        self.recent_view_seconds = recent_view_seconds
+        self.poll_interval = poll_interval
+
+        self.on_change: Optional[Callable[[], None]] = None
+
+        self._cond = threading.Condition()
+        self._queue: List[BuildJob] = []
+        self._running: Dict[str, BuildJob] = {}
+        self._claimed: Set[str] = set()  # branches something else works on (e.g. eviction), not to be built
+        self._last_viewed: Dict[str, float] = {}
+        self._durations: Dict[str, float] = {}
+        self._throttled = False
+
+        for i in range(self.max_parallel):
+            threading.Thread(target=self._worker, name=f"build-worker-{i}", daemon=True).start()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "BuildScheduler":
+        return cls(
+            max_parallel=config.get("max_parallel", "auto"),
+            max_load_per_cpu=config.get("max_load_per_cpu", 1.0),
+            min_free_memory_mb=config.get("min_free_memory_mb", 512),
+            recent_view_seconds=config.get("recent_view_seconds", 600),
+        )
+
+    def touch(self, name: str) -> None:
+        """Records proxy traffic to a branch; called on every request, so no locking"""
+        self._last_viewed[name] = time.monotonic()
+
+    def submit(self, name: str, action: Callable[[], Any], reason: str = "update", explicit: bool = False) -> Future:
+        with self._cond:
+            queued = next((job for job in self._queue if job.name == name), None)
+            if queued is not None:
+                queued.action = action
+                queued.reason = reason
+                queued.explicit = queued.explicit or explicit
+                future = queued.future
+            else:
+                job = BuildJob(name, action, reason, explicit)
+                self._queue.append(job)
+                future = job.future
+            self._cond.notify_all()
+
+        output.log(f"Queued build of '{name}' ({reason})", "info")
+        self._changed()
+        return future
+
+    def claim(self, name: str) -> bool:
+        """Keeps `name` from being built until `release`; False if it is queued, building or claimed already"""
+        with self._cond:
+            if name in self._running or name in self._claimed or any(job.name == name for job in self._queue):
+                return False
+            self._claimed.add(name)
+            return True
+
+    def release(self, name: str) -> None:
+        with self._cond:
+            self._claimed.discard(name)
+            self._cond.notify_all()
+
+    def _priority(self, job: BuildJob, now: float) -> tuple:
+        if job.explicit:
+            level = PRIORITY_EXPLICIT
+        elif now - self._last_viewed.get(job.name, float("-inf")) <= self.recent_view_seconds:
+            level = PRIORITY_VIEWED
+        else:
+            level = PRIORITY_DEFAULT
+        return level, job.seq
+
+    def _ordered_queue(self) -> List[BuildJob]:
+        now = time.monotonic()
+        return sorted(self._queue, key=lambda job: self._priority(job, now))
+
+    def _has_headroom(self) -> bool:
+        if not self._running:
+            return True  # never stall completely, even on a busy machine
+
+        load = load_average()
+        if load is not None and load / self.cpu_count >= self.max_load_per_cpu:
+            return False
+
+        memory = free_memory_mb()
+        if memory is not None and memory < self.min_free_memory_mb:
+            return False
+
+        return True
+
+    def _next_job(self) -> Optional[BuildJob]:
+        if not self._queue:
+            return None
+
+        admitted = self._has_headroom()
+        if admitted == self._throttled:
+            self._throttled = not admitted
+            if self._throttled:
+                output.log(f"Build queue throttled: load {load_average()}, free memory {free_memory_mb()} MB", "warning")
+        if not admitted:
+            return None
+
+        for job in self._ordered_queue():
+            if job.name not in self._running and job.name not in self._claimed:
+                return job
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait(self.poll_interval)
+                    job = self._next_job()
+                self._queue.remove(job)
+                job.started_at = time.monotonic()
+                self._running[job.name] = job
+            self._changed()
+
+            try:
+                job.future.set_result(job.action())
+            except Exception as e:
+                output.log(f"Build of '{job.name}' failed: {e}", "error")
+                job.future.set_exception(e)
+            finally:
+                duration = time.monotonic() - job.started_at
+                with self._cond:
+                    del self._running[job.name]
+                    previous = self._durations.get(job.name)
+                    self._durations[job.name] = duration if previous is None else 0.7 * previous + 0.3 * duration
+                    self._cond.notify_all()
+                self._changed()
+
+    def _estimate(self, name: str) -> float:
+        if name in self._durations:
+            return self._durations[name]
+        if self._durations:
+            return sum(self._durations.values()) / len(self._durations)
+        return DEFAULT_BUILD_SECONDS
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Queue state by branch name: `state` is "building" or "queued", with position and estimated wait"""
+        now = time.monotonic()
+        result: Dict[str, Dict[str, Any]] = {}
+
+        with self._cond:
+            # when each worker slot frees up, in seconds from now
+            slots = sorted(max(0.0, self._estimate(job.name) - (now - job.started_at))
+                           for job in self._running.values())
+            slots += [0.0] * (self.max_parallel - len(slots))
+
+            for job in self._running.values():
+                result[job.name] = {
+                    "state": "building",
+                    "position": 0,
+                    "estimated_wait": 0,
+                    "reason": job.reason,
+                }
+
+            for position, job in enumerate(self._ordered_queue(), start=1):
+                slots.sort()
+                wait = slots[0]
+                slots[0] = wait + self._estimate(job.name)
+                result[job.name] = {
+                    "state": "queued",
+                    "position": position,
+                    "estimated_wait": round(wait),
+                    "reason": job.reason,
+                }
+
+        return result
+
+    def _changed(self) -> None:
+        if self.on_change is None:
+            return
+        try:
+            self.on_change()
+        except Exception as e:
+            output.log(f"Error broadcasting build queue: {e}", "error")
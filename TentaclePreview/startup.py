@@ -0,0 +1,67 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class StartupProgress:
+    """What the background initialisation is doing, for the health endpoint and the dashboard.
+
+    Phases: "starting" -> "connecting" (GitHub) -> "discovering" (branches) -> "preparing" (clones,
+    adoption and builds of the tentacles) -> "ready". "failed" while a phase is retried.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.phase = "starting"
+        self.detail = ""
+        self.error: Optional[str] = None
+        self.ready_at: Optional[float] = None
+        self.loaded = threading.Event()  # every tentacle of the startup exists (built or not)
+        self.on_change: Optional[Callable[[Dict[str, Any]], None]] = None  # called with the snapshot
+
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def set_phase(self, phase: str, detail: str = "") -> None:
+        with self._lock:
+            self.phase = phase
+            self.detail = detail
+            self.error = None
+        self._notify()
+
+    def fail(self, error: str, detail: str = "") -> None:
+        with self._lock:
+            self.phase = "failed"
+            self.detail = detail
+            self.error = error
+        self._notify()
+
+    def finish(self) -> None:
+        self.loaded.set()
+        with self._lock:
+            self.phase = "ready"
+            self.detail = ""
+            self.ready_at = time.time()
+        self._notify()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "phase": self.phase,
+                "detail": self.detail,
+                "error": self.error,
+                "ready": self.ready,
+                "uptime_seconds": round(time.time() - self.started_at, 1),
+                "startup_seconds": round(self.ready_at - self.started_at, 1) if self.ready_at else None,
+            }
+
+    def _notify(self) -> None:
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(self.snapshot())
+        except Exception:
+            pass
@@ -0,0 +1,150 @@
+import json
+import os
+import signal
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from TentaclePreview import output
+
+STATE_VERSION = 1
+
+
+def load_state(path: str | Path) -> Dict[str, Dict[str, Any]]:
+    """Returns saved tentacle states by branch name, or an empty dict if there is no usable state file"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        output.log(f"Failed to read state file {path}: {e}", "warning")
+        return {}
+
+    if data.get("version") != STATE_VERSION:
+        output.log(f"Ignoring state file {path}: unsupported version {data.get('version')}", "warning")
+        return {}
+
+    return data.get("tentacles", {})
+
+
+def save_state(path: str | Path, tentacles: Dict[str, Dict[str, Any]], detached: bool = False) -> None:
+    """Atomically writes tentacle states, so a crash mid-write never leaves a truncated file behind"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    data = {
+        "version": STATE_VERSION,
+        "saved_at": time.time(),
+        "detached": detached,
+        "tentacles": tentacles,
+    }
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def process_group_alive(pid: Optional[int], pgid: Optional[int], cwd: Optional[str | Path] = None) -> bool:
+    """Checks that `pid` still runs in group `pgid` (and in `cwd`, where /proc allows checking it).
+
+    Guards against adopting an unrelated process that reused the pid after a reboot.
+    """
+    if not pid or not pgid or os.name == "nt":
+        return False
+
+    try:
+        os.kill(pid, 0)
+        if os.getpgid(pid) != pgid or _is_zombie(pid):
+            return False
+    except (ProcessLookupError, PermissionError):
+        return False
+
+    proc_cwd = Path(f"/proc/{pid}/cwd")
+    if cwd is not None and proc_cwd.exists():
+        try:
+            return Path(os.readlink(proc_cwd)).resolve() == Path(cwd).resolve()
+        except OSError:
+            return False
+
+    return True
+
+
+def _is_zombie(pid: int) -> bool:
+    """An exited process stays visible until its parent reaps it; we're no longer its parent"""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat_line = f.read()
+    except OSError:
+        return False
+    # the state field follows the parenthesised command name
+    return stat_line[stat_line.rfind(b")") + 2:][:1] == b"Z"
+
+
+def kill_process_group(pgid: int, timeout: float = 5) -> None:
+    """Terminates a process group we don't own a Popen for (e.g. left over from a previous run)"""
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            os.killpg(pgid, 0)
+        except ProcessLookupError:
+            return
+        time.sleep(0.1)
+
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+class AdoptedProcess:
+    """Minimal `subprocess.Popen` stand-in for a process group started by a previous server run.
+
+    It is not our child, so exit codes are unknown: `poll()` returns 0 once the process is gone.
+    """
+
+    def __init__(self, pid: int, pgid: int) -> None:
+        self.pid = pid
+        self.pgid = pgid
+        self.returncode: Optional[int] = None
+        self.stdout = None
+        self.stderr = None
+
+    def poll(self) -> Optional[int]:
+        if self.returncode is None:
+            try:
+                os.kill(self.pid, 0)
+                if _is_zombie(self.pid):
+                    self.returncode = 0
+            except ProcessLookupError:
+                self.returncode = 0
+            except PermissionError:
+                pass
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(str(self.pid), timeout)
+            time.sleep(0.1)
+        return self.returncode
+
+    def send_signal(self, sig: int) -> None:
+        try:
+            os.killpg(self.pgid, sig)
+        except ProcessLookupError:
+            pass
+
+    def terminate(self) -> None:
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        self.send_signal(signal.SIGKILL)
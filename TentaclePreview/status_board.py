@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+MAX_TOMBSTONES = 1000
+
+
+class StatusBoard:
+    """Cached status of every tentacle, updated when a tentacle changes instead of rebuilt per request.
+
+    Every change bumps `version`, so clients can ask for "what changed since version N" and HTTP
+    responses can be validated with an ETag. `epoch` tells versions of different server runs apart.
+    """
+
+    def __init__(self) -> None:
+        self.epoch = str(int(time.time() * 1000))
+        self.version = 0
+        self.on_change: Optional[Callable[[Dict[str, Any]], None]] = None  # called with the delta
+
+        self._lock = threading.Lock()
+        self._notify_lock = threading.Lock()  # taken before `_lock` is released: listeners get deltas in version order
+        self._statuses: Dict[str, Dict[str, Any]] = {}
+        self._changed_at: Dict[str, int] = {}  # name -> version of its last change
+        self._removed_at: Dict[str, int] = {}  # tombstones, so deltas can report removals
+        self._horizon = 0  # deltas from versions older than this can't list every removal
+
+    @property
+    def etag(self) -> str:
+        return self.etag_for(self.version)
+
+    def etag_for(self, version: int) -> str:
+        return f"{self.epoch}-{version}"
+
+    def update(self, name: str, status: Dict[str, Any]) -> bool:
+        """Stores the status of a tentacle; returns False (and keeps the version) if nothing changed"""
+        with self._lock:
+            if self._statuses.get(name) == status:
+                return False
+            self.version += 1
+            self._statuses[name] = status
+            self._changed_at[name] = self.version
+            self._removed_at.pop(name, None)
+            delta = self._delta(self.version - 1, {name: status}, [])
+            self._notify_lock.acquire()
+
+        self._notify(delta)
+        return True
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            if name not in self._statuses:
+                return
+            self.version += 1
+            del self._statuses[name]
+            del self._changed_at[name]
+            self._removed_at[name] = self.version
+            while len(self._removed_at) > MAX_TOMBSTONES:
+                oldest = min(self._removed_at, key=self._removed_at.get)
+                self._horizon = self._removed_at.pop(oldest)
+            delta = self._delta(self.version - 1, {}, [name])
+            self._notify_lock.acquire()
+
+        self._notify(delta)
+
+    def snapshot(self) -> tuple[int, List[Dict[str, Any]]]:
+        with self._lock:
+            return self.version, list(self._statuses.values())
+
+    def changes_since(self, since: Optional[int], epoch: Optional[str] = None) -> Dict[str, Any]:
+        """Delta from version `since`; a full snapshot if `since` is unknown, too old or not a version at all"""
+        if not isinstance(since, int) or isinstance(since, bool):
+            since = None  # comes straight from clients
+        with self._lock:
+            if since is None or epoch != self.epoch or since > self.version or since < self._horizon:
+                return self._delta(None, dict(self._statuses), [])
+
+            changed = {name: self._statuses[name] for name, version in self._changed_at.items() if version > since}
+            removed = [name for name, version in self._removed_at.items() if version > since]
+            return self._delta(since, changed, removed)
+
+    def _delta(self, base_version: Optional[int], changed: Dict[str, Dict[str, Any]], removed: List[str]) -> Dict[str, Any]:
+        return {
+            "epoch": self.epoch,
+            "version": self.version,
+            "base_version": base_version,
+            "full": base_version is None,
+            "changed": list(changed.values()),
+            "removed": removed,
+        }
+
+    def _notify(self, delta: Dict[str, Any]) -> None:
+        """Releases `_notify_lock`, which the caller took while it still held `_lock`"""
+        try:
+            if self.on_change is not None:
+                self.on_change(delta)
+        except Exception:
+            pass  # a broken listener must not break the tentacle that changed
+        finally:
+            self._notify_lock.release()
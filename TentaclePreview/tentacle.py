@@ -1,3 +1,5 @@
+import hashlib
+import json
 import os
 import platform
 import shutil
@@ -5,28 +7,80 @@ import signal
 import socket
 import subprocess
 import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Literal, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-from git import Repo
-from github.Branch import Branch
-from github.Repository import Repository
-
-from TentaclePreview.filesystem_utils import safe_rmtree
+from TentaclePreview.disk_quota import directory_size
+from TentaclePreview.filesystem_utils import path_matches, safe_rmtree
+from TentaclePreview.git_utils import authenticated_clone_url
 from TentaclePreview.output import log, progress
+from TentaclePreview.process_io import CHUNK_SIZE, LineReader, create_multiplexer
+from TentaclePreview.state import AdoptedProcess, kill_process_group, process_group_alive
+
+if TYPE_CHECKING:  # imported when the first tentacle is created, not at startup
+    from git import Repo
+    from github.Branch import Branch
+    from github.Repository import Repository
+
+
+def render_build_entry(entry: Dict[str, object]) -> Dict[str, object]:
+    """A build log entry as clients get it: the lines of the step joined into `output`"""
+    rendered = {key: value for key, value in entry.items() if key != "lines"}
+    rendered["output"] = "\n".join(entry["lines"])
+    return rendered
+
+
+def parse_build_entry(rendered: Dict[str, object]) -> Dict[str, object]:
+    """The reverse of `render_build_entry`: entries keep a list of lines, so streamed output is appended cheaply"""
+    entry = {key: value for key, value in rendered.items() if key != "output"}
+    output = rendered.get("output") or ""
+    entry["lines"] = output.split("\n") if output else []
+    return entry
 
 
 class Tentacle:
     _broadcast_status = None  # callable(name, build_status, start_status)
     _broadcast_logs = None  # callable(name, log_type, logs_dict, stream=False)
+    _logs_dir: Optional[Path] = None  # if set, processes write to log files and can outlive the server
+    _log_store = None  # LogStore for searchable build/start logs
+    _output_reader_instance = None  # OutputMultiplexer reading all tentacle processes
+    _output_reader_lock = threading.Lock()
+    _trash = None  # Trash for instant deletion of trees; deleted in place if not set
+    _default_host: str = "127.0.0.1"  # interface tentacle servers listen on
+    _build_parallelism: int = 2  # build steps of one tentacle that may run at once
 
     @classmethod
     def set_broadcast_callbacks(cls, logs_callback, status_callback):
         cls._broadcast_logs = logs_callback
         cls._broadcast_status = status_callback
 
-    def __init__(self, remote_repo: Repository, remote_branch: Branch | str, branches_dir: Path,
+    @classmethod
+    def set_log_store(cls, log_store):
+        cls._log_store = log_store
+
+    @classmethod
+    def set_logs_dir(cls, logs_dir: Optional[Path]):
+        cls._logs_dir = Path(logs_dir) if logs_dir is not None else None
+
+    @classmethod
+    def set_trash(cls, trash):
+        cls._trash = trash
+
+    @classmethod
+    def set_default_host(cls, host: str):
+        cls._default_host = host
+
+    @classmethod
+    def set_build_parallelism(cls, parallelism: int):
+        cls._build_parallelism = max(1, int(parallelism))
+
+    def __init__(self, remote_repo: "Repository", remote_branch: "Branch | str", branches_dir: Path,
                  commands: Dict[str, str | List[str]]):
+        from github.Branch import Branch
+        from github.Repository import Repository
+
         if not isinstance(remote_repo, Repository):
             raise TypeError("remote_repo must be of type Repository")
 
@@ -41,14 +95,25 @@ class Tentacle:
         if not {"start", "build"}.issubset(self._commands):
             raise ValueError("'start' and 'build' commands must exist")
 
-        self._local_repo: Optional[Repo] = None
+        self._local_repo: "Optional[Repo]" = None
+        self._head_sha: Optional[str] = None  # cached: reading it from GitPython on every status request is slow
         self._process: Optional[subprocess.Popen] = None
-        self._host: str = "127.0.0.1"
+        self._host: str = Tentacle._default_host
         self._port: int = self._find_free_port()
 
+        self._built_commit: Optional[str] = None
+        self._step_commits: Dict[str, str] = {}  # build step key -> commit it last succeeded at
+        self._fresh_clone: bool = False
+        self._log_file: Optional[Path] = None
+        self._stopping: bool = False
+        self._build_lock = threading.Lock()
+        self._build_processes: Dict[str, subprocess.Popen] = {}  # running build steps by name
+        self._cancel_build: bool = False
+        self.last_active: float = time.time()  # for LRU eviction by the disk quota
+
         self.is_build_success: Optional[bool] = None
         self.is_start_success: Optional[bool] = None
-        self.build_output: List[Dict[Literal["command", "output"], str]] = []
+        self.build_output: List[Dict[str, object]] = []  # entries with "lines", see render_build_entry
         self.start_output: Optional[List[str]] = []
 
         if self.path.exists():
@@ -56,47 +121,67 @@ class Tentacle:
         else:
             self._clone_repo_from_remote()
 
-    def _stream_process_output(self, stream):
-        """Читает stdout/stderr построчно, сохраняет и отправляет в WS"""
-        try:
-            for raw_line in iter(stream.readline, ""):
-                if raw_line is None:
-                    break
-                line = raw_line.rstrip("\n")
-                if not line and stream.closed:
-                    break
-
-                self.start_output.append(line)  # сохраняем в историю
-
-                if Tentacle._broadcast_logs:
-                    try:
-                        Tentacle._broadcast_logs(
-                            self.name,
-                            "start",
-                            {"output": line},
-                            stream=True  # помечаем, что это "живой" вывод
-                        )
-                    except Exception:
-                        pass
-        finally:
+    @classmethod
+    def _output_reader(cls):
+        """One reader thread shared by every tentacle, created on first start"""
+        with cls._output_reader_lock:
+            if cls._output_reader_instance is None:
+                cls._output_reader_instance = create_multiplexer()
+            return cls._output_reader_instance
+
+    def _handle_output_lines(self, lines: List[str]):
+        offset = len(self.start_output)  # index of the first line, so clients can place streamed lines
+        self.start_output.extend(lines)  # сохраняем в историю
+        if Tentacle._log_store is not None:
+            Tentacle._log_store.append(self.name, "start", lines)
+
+        if Tentacle._broadcast_logs:
             try:
-                stream.close()
+                Tentacle._broadcast_logs(
+                    self.name,
+                    "start",
+                    {"lines": lines, "offset": offset},
+                    stream=True  # помечаем, что это "живой" вывод
+                )
             except Exception:
                 pass
 
+    def _handle_process_exit(self, process, returncode: Optional[int]):
+        """Called by the output reader as soon as a tentacle process exits"""
+        if self._process is not process or self._stopping:
+            return  # stopped or restarted on purpose
+
+        self.is_start_success = False
+        self._handle_output_lines([f"Process exited with code {returncode}"])
+        log(f"Tentacle '{self.name}' exited unexpectedly with code {returncode}", "error")
+        if Tentacle._broadcast_status:
+            Tentacle._broadcast_status(self.name, self.is_build_success, self.is_start_success)
+
+    def _watch_process(self, process):
+        reader = Tentacle._output_reader()
+        on_exit = lambda returncode: self._handle_process_exit(process, returncode)
+        if self._log_file is not None:
+            reader.watch_file(self._log_file, process, self._handle_output_lines, on_exit)
+        else:
+            reader.watch_pipes(process, self._handle_output_lines, on_exit)
+
     def get_logs(self, log_type):
         """Возвращает накопленные логи по типу"""
         if log_type == "build":
-            return self.build_output
+            with self._build_lock:
+                return [render_build_entry(entry) for entry in self.build_output]
         if log_type == "start":
             return self.start_output
         return []
 
     def _load_repo_from_path(self):
+        from git import Repo
+
         log(f"Found existing folder for branch '{self.name}'. Attempting to load...")
         try:
             self.local_repo = Repo(self.path)
             self.local_repo.refs[self.name].checkout(True)
+            self._head_sha = self.local_repo.head.commit.hexsha
             if self.update_required:
                 log(f"Updating '{self.name}'")
                 self._fetch_remote()
@@ -107,6 +192,8 @@ class Tentacle:
             raise
 
     def _clone_repo_from_remote(self):
+        from git import Repo
+
         log(f"Cloning branch '{self.name}' from remote...")
         try:
             self.local_repo = Repo.clone_from(
@@ -116,6 +203,9 @@ class Tentacle:
                 depth=1,
                 progress=progress
             )
+            self._fresh_clone = True
+            with self._build_lock:
+                self._step_commits.clear()
             log(f"Successfully cloned branch '{self.name}'.", "success")
         except Exception as e:
             log(f"Failed to clone branch '{self.name}': {e}", "error")
@@ -143,18 +233,74 @@ class Tentacle:
         log(f"Fetching tentacle '{self.name}'...")
         self.local_repo.remote().fetch(progress=progress, force=True)
         self.local_repo.remote().refs[self.name].checkout(True)
+        self._head_sha = self.local_repo.head.commit.hexsha
+
+    def _discard(self, path: Path) -> bool:
+        if Tentacle._trash is not None:
+            return Tentacle._trash.discard(path)
+        return safe_rmtree(str(path))
 
     def clear_files(self):
         log(f"Deleting tentacle '{self.name}' files...", "warning")
-        if self._process is not None:
+        if self.is_running:
             raise RuntimeError("Cannot delete tentacle files while it's running")
 
-        self.local_repo.close()
-        if safe_rmtree(str(self.path)):
+        if self.local_repo is not None:
+            self.local_repo.close()
+            self._local_repo = None
+        with self._build_lock:
+            self._step_commits.clear()
+        if self._discard(self.path):
             log(f"Tentacle '{self.name}' deleted", "success")
         else:
             log(f"Failed to delete tentacle '{self.name}' after multiple attempts!", "error")
 
+    def _build_output_paths(self) -> List[Path]:
+        paths = []
+        for step in self._build_steps():
+            for pattern in step["outputs"]:
+                if any(char in pattern for char in "*?["):
+                    paths.extend(self.path.glob(pattern))
+                elif (self.path / pattern).exists():
+                    paths.append(self.path / pattern)
+        return [path for path in paths if path.resolve().is_relative_to(self.path.resolve())]
+
+    def evict(self, outputs_only: bool = False) -> int:
+        """Frees disk space of a stopped tentacle: declared build outputs only, or the whole working tree.
+
+        Returns the number of bytes freed. The next update rebuilds (and re-clones) what is missing.
+        """
+        if self.is_running:
+            return 0
+
+        targets = self._build_output_paths() if outputs_only else ([self.path] if self.path.exists() else [])
+        if not targets:
+            return 0
+
+        freed = 0
+        for path in targets:
+            freed += directory_size(path) if path.is_dir() else path.stat().st_size
+
+        self._process = None
+        self.is_build_success = None
+        self._built_commit = None
+        if outputs_only:
+            log(f"Evicting build outputs of tentacle '{self.name}' ({freed / 2 ** 20:.0f} MB)", "warning")
+            with self._build_lock:
+                self._step_commits.clear()
+            for path in targets:
+                self._discard(path)
+        else:
+            log(f"Evicting working tree of tentacle '{self.name}' ({freed / 2 ** 20:.0f} MB)", "warning")
+            self.clear_files()
+
+        if Tentacle._broadcast_status:
+            Tentacle._broadcast_status(self.name, self.is_build_success, self.is_start_success)
+        return freed
+
+    def touch(self):
+        self.last_active = time.time()
+
     def _render_command(self, command: str) -> str:
         try:
             return command.format(**self._command_context)
@@ -162,56 +308,298 @@ class Tentacle:
             log(f"Missing context variable in command: {e}", "error")
             raise
 
+    def _build_steps(self) -> List[Dict[str, object]]:
+        """Normalizes `commands.build` into a graph of steps.
+
+        Each step is a command string or {"run": cmd, "inputs": [globs], "outputs": [paths or globs],
+        "needs": [step names]}. A list is a chain: a step needs the one before it unless it lists its
+        own `needs` (and a `name` to be needed by). {"steps": {name: step}} is a graph: a step needs
+        only what it lists, so independent steps can run at the same time.
+        """
+        steps = self._commands.get("build", [])
+        if isinstance(steps, dict) and "steps" in steps:
+            graph = steps["steps"]
+            if not isinstance(graph, dict):
+                raise ValueError("commands.build.steps must map step names to steps")
+            named = [(name, step, []) for name, step in graph.items()]
+        elif isinstance(steps, dict) and "run" not in steps:
+            raise ValueError('commands.build must be a command, a step, a list of steps or {"steps": {name: step}}')
+        else:
+            steps = [steps] if isinstance(steps, (str, dict)) else steps
+            named, previous = [], None
+            for index, step in enumerate(steps):
+                name = (step.get("name") if isinstance(step, dict) else None) or f"step-{index + 1}"
+                named.append((name, step, [previous] if previous else []))
+                if (step if isinstance(step, str) else step.get("run", "")).strip():
+                    previous = name  # empty steps are dropped, so nothing can depend on them
+
+        result = []
+        for name, step, default_needs in named:
+            if isinstance(step, str):
+                step = {"run": step}
+            if not step.get("run", "").strip():
+                continue
+            needs = step.get("needs", default_needs)
+            result.append({
+                "name": name,
+                "run": step["run"],
+                "inputs": list(step["inputs"]) if step.get("inputs") is not None else None,
+                "outputs": list(step.get("outputs", [])),
+                "needs": [needs] if isinstance(needs, str) else list(needs),
+            })
+
+        names = {step["name"] for step in result}
+        for step in result:
+            for need in step["needs"]:
+                if need not in names:
+                    raise ValueError(f"Build step '{step['name']}' needs unknown step '{need}'")
+        return result
+
+    @staticmethod
+    def _step_key(step: Dict[str, object]) -> str:
+        # the step's place in the graph doesn't change what it produces
+        return json.dumps({key: step[key] for key in ("run", "inputs", "outputs")}, sort_keys=True)
+
+    def _changed_files(self, old_commit: str, new_commit: str) -> List[str]:
+        if old_commit == new_commit:
+            return []
+        diff = self.local_repo.git.diff("--name-only", "--no-renames", old_commit, new_commit)
+        return [line for line in diff.splitlines() if line]
+
+    def _outputs_exist(self, outputs: List[str]) -> bool:
+        for pattern in outputs:
+            if any(char in pattern for char in "*?["):
+                if next(self.path.glob(pattern), None) is None:
+                    return False
+            elif not (self.path / pattern).exists():
+                return False
+        return True
+
+    def _plan_step(self, step: Dict[str, object], head: str, diffs: Dict[str, List[str]]) -> tuple[bool, str]:
+        """Returns (must_run, reason). Only steps that declare inputs can be skipped."""
+        if step["inputs"] is None:
+            return True, "no inputs declared"
+
+        previous = self._step_commits.get(self._step_key(step))
+        if previous is None:
+            return True, "no previous successful run"
+
+        if not self._outputs_exist(step["outputs"]):
+            return True, "outputs are missing"
+
+        if previous not in diffs:
+            try:
+                diffs[previous] = self._changed_files(previous, head)
+            except Exception as e:
+                return True, f"cannot diff against {previous[:7]}: {e}"
+
+        changed = [path for path in diffs[previous] if path_matches(path, step["inputs"])]
+        if changed:
+            shown = ", ".join(changed[:5]) + (f" and {len(changed) - 5} more" if len(changed) > 5 else "")
+            return True, f"{len(changed)} changed input(s) since {previous[:7]}: {shown}"
+
+        return False, f"no changes in {', '.join(step['inputs'])} since {previous[:7]}"
+
+    def _store_build_output(self, cmd: str, lines: List[str]):
+        if Tentacle._log_store is not None:
+            Tentacle._log_store.append(self.name, "build", [f"$ {cmd}", *lines])
+
+    def _broadcast_build_change(self, change: Dict[str, object]):
+        """Streams one change of the build log: {"index", "entry"}, {"index", "status"} or {"index", "lines", "offset"}"""
+        if Tentacle._broadcast_logs:
+            try:
+                Tentacle._broadcast_logs(self.name, "build", change, stream=True)
+            except Exception:
+                pass
+
+    def _add_build_entry(self, entry: Dict[str, object]) -> Dict[str, object]:
+        """Adds an entry given with its `output` text; returns the stored entry, which has `lines` instead"""
+        entry = parse_build_entry(entry)
+        with self._build_lock:
+            self.build_output.append(entry)
+            entry["index"] = len(self.build_output) - 1
+            # sent under the lock, so clients get the entries in index order
+            self._broadcast_build_change({"index": entry["index"], "entry": render_build_entry(entry)})
+        return entry
+
+    def _set_build_status(self, entry: Dict[str, object], status: str):
+        with self._build_lock:
+            entry["status"] = status
+        self._broadcast_build_change({"index": entry["index"], "status": status})
+
     def build(self):
         log(f"Building tentacle '{self.name}'...")
 
-        commands = self._commands.get("build", [])
-        if isinstance(commands, str):
-            commands = [commands]
-
         self.is_build_success = True
-        self.build_output.clear()
+        with self._build_lock:
+            self.build_output.clear()
+        self._cancel_build = False
+        if Tentacle._broadcast_logs:
+            Tentacle._broadcast_logs(self.name, "build", [], stream=False)  # entries follow one by one
 
-        for raw_cmd in commands:
-            if not raw_cmd.strip():
-                continue
+        head = self.head_sha
+        diffs: Dict[str, List[str]] = {}
 
-            cmd = self._render_command(raw_cmd)
-            log(f"Running build step: '{cmd}'", log_type="info")
+        try:
+            steps = {step["name"]: step for step in self._build_steps()}
+        except ValueError as e:
+            steps = {}
+            self.is_build_success = False
+            self._add_build_entry({"command": "build", "output": str(e), "status": "failed"})
+            log(f"Invalid build config: {e}", "error")
+
+        done: Dict[str, bool] = {}  # step name -> succeeded
+        running: Dict[Future, str] = {}
+        failed: Optional[str] = None
+
+        with ThreadPoolExecutor(max_workers=Tentacle._build_parallelism,
+                                thread_name_prefix=f"build-{self.name}") as pool:
+            while True:
+                # start every step whose needs succeeded; skipping one may make others ready
+                progress_made = True
+                while failed is None and progress_made:
+                    progress_made = False
+                    for name, step in steps.items():
+                        if name in done or name in running.values() or len(running) >= Tentacle._build_parallelism:
+                            continue
+                        if not all(done.get(need) for need in step["needs"]):
+                            continue
+                        must_run, reason = self._plan_step(step, head, diffs)
+                        if must_run:
+                            running[pool.submit(self._run_build_step, step, head, reason)] = name
+                        else:
+                            self._skip_build_step(step, head, reason)
+                            done[name] = True
+                            progress_made = True
+
+                if not running:
+                    break
 
-            try:
-                result = subprocess.run(
-                    cmd,
-                    cwd=str(self.path),
-                    shell=True,
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                )
-                stdout = result.stdout or ""
-                stderr = result.stderr or ""
-                if stdout.strip():
-                    # log(f"'{cmd}' output:\n{stdout.strip()}", "info")
-                    log(f"'{cmd}' done without errors!", "info")
-                if stderr.strip():
-                    # log(f"'{cmd}' errors:\n{stderr.strip()}", "warning")
-                    log(f"'{cmd}' done with errors!", "warning")
-                self.build_output.append({"command": cmd, "output": stdout + ("\n" + stderr if stderr else "")})
-
-                if Tentacle._broadcast_logs:
-                    Tentacle._broadcast_logs(self.name, "build", self.build_output, stream=False)
-            except subprocess.CalledProcessError as e:
-                self.is_build_success = False
-                out = (e.stdout or "") + ("\n" + (e.stderr or "")) if (e.stdout or e.stderr) else str(e)
-                self.build_output.append({"command": cmd, "output": out})
-                log(f"Build step failed:\n{e.stderr}", "error")
-                break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    done[name] = future.result()
+                    if not done[name] and failed is None:
+                        failed = name
+                        self._cancel_build_steps()
+
+        not_run = [step for name, step in steps.items() if name not in done]
+        reason = f"step '{failed}' failed"
+        if not_run and failed is None:
+            reason = "its needs wait for each other in a cycle"
+            log(f"Build steps {', '.join(step['name'] for step in not_run)} wait for each other in a cycle", "error")
+        for step in not_run:
+            self._add_build_entry({"command": self._render_command(step["run"]), "step": step["name"],
+                                   "output": f"Not run: {reason}", "status": "cancelled"})
+
+        if failed is not None or not_run:
+            self.is_build_success = False
+        self._built_commit = head if self.is_build_success else None
 
         if Tentacle._broadcast_status:
             Tentacle._broadcast_status(self.name, self.is_build_success, self.is_start_success)
         if self.is_build_success:
             log(f"Tentacle '{self.name}' built successfully.", "success")
 
+    def _skip_build_step(self, step: Dict[str, object], head: str, reason: str):
+        cmd = self._render_command(step["run"])
+        log(f"Skipping build step '{cmd}': {reason}", log_type="info")
+        with self._build_lock:
+            self._step_commits[self._step_key(step)] = head
+        self._add_build_entry({"command": cmd, "step": step["name"], "output": f"Skipped: {reason}",
+                               "skipped": True, "status": "skipped"})
+
+    def _run_build_step(self, step: Dict[str, object], head: str, reason: str) -> bool:
+        """Runs one step on a build worker thread, streaming its output; returns whether it succeeded"""
+        cmd = self._render_command(step["run"])
+        key = self._step_key(step)
+        log(f"Running build step: '{cmd}' ({reason})", log_type="info")
+
+        entry = self._add_build_entry({"command": cmd, "step": step["name"], "status": "running"})
+
+        def add_lines(lines: List[str]):
+            with self._build_lock:
+                offset = len(entry["lines"])
+                entry["lines"].extend(lines)
+            self._broadcast_build_change({"index": entry["index"], "lines": lines, "offset": offset})
+
+        is_windows = platform.system() == "Windows"
+        try:
+            with self._build_lock:
+                if self._cancel_build:
+                    raise RuntimeError("cancelled")
+                process = subprocess.Popen(
+                    cmd,
+                    cwd=str(self.path),
+                    shell=True,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if is_windows else 0,
+                    start_new_session=not is_windows  # own group, so cancelling kills it all
+                )
+                self._build_processes[step["name"]] = process
+        except (OSError, RuntimeError) as e:
+            add_lines([str(e)])
+            returncode = None
+        else:
+            reader = LineReader()
+            for data in iter(lambda: process.stdout.read1(CHUNK_SIZE), b""):
+                lines = reader.feed(data)
+                if lines:
+                    add_lines(lines)
+            rest = reader.finish()
+            if rest:
+                add_lines(rest)
+            process.stdout.close()
+            returncode = process.wait()
+            with self._build_lock:
+                self._build_processes.pop(step["name"], None)
+
+        succeeded = returncode == 0
+        self._store_build_output(cmd, entry["lines"])
+        with self._build_lock:
+            if succeeded:
+                self._step_commits[key] = head
+            else:
+                self._step_commits.pop(key, None)
+        if succeeded:
+            self._set_build_status(entry, "success")
+            log(f"'{cmd}' done without errors!", "info")
+        elif self._cancel_build:
+            self._set_build_status(entry, "cancelled")
+            log(f"Build step '{cmd}' cancelled", "warning")
+        else:
+            self._set_build_status(entry, "failed")
+            tail = "\n".join(entry["lines"][-20:])
+            log(f"Build step failed:\n{tail}", "error")
+        return succeeded
+
+    def _cancel_build_steps(self):
+        """Fail fast: kills the process groups of steps still running after another step failed"""
+        with self._build_lock:
+            self._cancel_build = True
+            processes = list(self._build_processes.values())
+
+        is_windows = platform.system() == "Windows"
+        for process in processes:
+            try:
+                if is_windows:
+                    process.send_signal(signal.CTRL_BREAK_EVENT)
+                else:
+                    os.killpg(process.pid, signal.SIGTERM)  # started in a new session: its pid is the group id
+            except OSError:
+                pass
+        for process in processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                log("Build step did not exit gracefully, killing...", "warning")
+                try:
+                    process.kill() if is_windows else os.killpg(process.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+
     def start(self):
         if not self.is_build_success:
             log(f"Build failed. Start cancelled.", "warning")
@@ -219,6 +607,7 @@ class Tentacle:
             return
 
         log(f"Starting tentacle '{self.name}'...")
+        self.touch()
 
         if self._process and self._process.poll() is None:
             log(f"Tentacle '{self.name}' is already running.", log_type="warning")
@@ -239,27 +628,40 @@ class Tentacle:
 
             self.start_output.clear()
 
-            self._process = subprocess.Popen(
-                cmd,
-                cwd=str(self.path),
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if is_windows else 0,
-                preexec_fn=os.setsid if not is_windows else None
-            )
+            if Tentacle._logs_dir is not None:
+                # Output goes to a file instead of pipes: the process must survive the server exiting
+                Tentacle._logs_dir.mkdir(parents=True, exist_ok=True)
+                self._log_file = Tentacle._logs_dir / f"{self.name.replace('/', '_')}.log"
+                with open(self._log_file, "wb") as log_file:
+                    self._process = subprocess.Popen(
+                        cmd,
+                        cwd=str(self.path),
+                        shell=True,
+                        stdin=subprocess.DEVNULL,
+                        stdout=log_file,
+                        stderr=subprocess.STDOUT,
+                        creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if is_windows else 0,
+                        start_new_session=not is_windows
+                    )
+            else:
+                self._log_file = None
+                self._process = subprocess.Popen(
+                    cmd,
+                    cwd=str(self.path),
+                    shell=True,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if is_windows else 0,
+                    start_new_session=not is_windows
+                )
             self.is_start_success = True
             log(f"Tentacle '{self.name}' started.", log_type="success")
 
             if Tentacle._broadcast_status:
                 Tentacle._broadcast_status(self.name, self.is_build_success, self.is_start_success)
 
-            if self._process.stdout:
-                threading.Thread(target=self._stream_process_output, args=(self._process.stdout,), daemon=True).start()
-            if self._process.stderr:
-                threading.Thread(target=self._stream_process_output, args=(self._process.stderr,), daemon=True).start()
+            self._watch_process(self._process)
 
         except Exception as e:
             self.is_start_success = False
@@ -271,6 +673,7 @@ class Tentacle:
     def stop(self):
         log(f"Stopping tentacle '{self.name}'...", log_type="header")
 
+        self._stopping = True
         if self._process and self._process.poll() is None:
             try:
                 is_windows = platform.system() == "Windows"
@@ -299,6 +702,100 @@ class Tentacle:
             Tentacle._broadcast_status(self.name, self.is_build_success, self.is_start_success)
 
         self._process = None
+        self._stopping = False
+
+    def _build_key(self, commit: Optional[str]) -> Optional[str]:
+        """Identifies a build: the same commit built with the same commands gives the same key"""
+        if commit is None:
+            return None
+        payload = json.dumps({"commit": commit, "commands": self._commands}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def to_state(self) -> Dict[str, object]:
+        with self._build_lock:
+            step_commits = dict(self._step_commits)  # build steps update it from their own threads
+        pid = pgid = None
+        if self._process is not None and self._process.poll() is None:
+            pid = self._process.pid
+            try:
+                pgid = os.getpgid(pid) if hasattr(os, "getpgid") else None
+            except ProcessLookupError:
+                pid = None
+
+        return {
+            "commit": self.head_sha,
+            "built_commit": self._built_commit,
+            "build_key": self._build_key(self._built_commit),
+            "port": self._port,
+            "pid": pid,
+            "pgid": pgid,
+            "is_build_success": self.is_build_success,
+            "is_start_success": self.is_start_success,
+            "log_file": str(self._log_file) if self._log_file else None,
+            "step_commits": step_commits,
+            "last_active": self.last_active,
+        }
+
+    def restore_build(self, state: Optional[Dict[str, object]]) -> bool:
+        """Marks the tentacle as built if the saved build matches the checked out commit and commands.
+
+        Otherwise still restores per-step history, so an incremental build can skip unchanged steps.
+        """
+        if not state or self._fresh_clone:
+            return False  # a new checkout has none of the saved build outputs
+
+        with self._build_lock:
+            self._step_commits = dict(state.get("step_commits") or {})
+
+        if not state.get("build_key"):
+            return False
+        if state.get("build_key") != self._build_key(self.head_sha):
+            return False
+
+        self._built_commit = self.head_sha
+        self.is_build_success = True
+        return True
+
+    def adopt(self, state: Optional[Dict[str, object]]) -> bool:
+        """Re-attaches to a process group left running by a previous server run (see `detach`).
+
+        An outdated process (different commit or commands) is stopped instead, and False is returned.
+        """
+        if not state or not state.get("pid"):
+            return False
+
+        pid, pgid = state["pid"], state.get("pgid")
+        if not process_group_alive(pid, pgid, self.path):
+            return False
+
+        if not self.restore_build(state):
+            log(f"Saved process of tentacle '{self.name}' is outdated. Stopping it...", "warning")
+            kill_process_group(pgid)
+            return False
+
+        self._port = state["port"]
+        self._process = AdoptedProcess(pid, pgid)
+        self.is_start_success = True
+        self.start_output.clear()
+
+        log_file = state.get("log_file")
+        self._log_file = Path(log_file) if log_file else None
+        if self._log_file is not None and self._log_file.exists():
+            self._watch_process(self._process)
+        else:
+            log(f"Log file of tentacle '{self.name}' is missing, earlier output is lost.", "warning")
+
+        log(f"Tentacle '{self.name}' re-attached to running process {pid}.", "success")
+        if Tentacle._broadcast_status:
+            Tentacle._broadcast_status(self.name, self.is_build_success, self.is_start_success)
+        return True
+
+    def detach(self) -> Dict[str, object]:
+        """Leaves the process running for the next server run to adopt and returns its state"""
+        state = self.to_state()
+        if state["pid"] is not None and self._log_file is None:
+            log(f"Tentacle '{self.name}' writes to pipes and will not survive detaching.", "warning")
+        return state
 
     @staticmethod
     def _find_free_port() -> int:
@@ -307,13 +804,14 @@ class Tentacle:
             return s.getsockname()[1]
 
     @property
-    def local_repo(self) -> Repo | None:
+    def local_repo(self) -> "Repo | None":
         return self._local_repo
 
     @local_repo.setter
-    def local_repo(self, value: Repo) -> None:
+    def local_repo(self, value: "Repo") -> None:
         self._local_repo = value
         self._local_repo.git.checkout(self.name, force=True)
+        self._head_sha = self._local_repo.head.commit.hexsha
 
     @property
     def path(self) -> Path:
@@ -324,11 +822,7 @@ class Tentacle:
         if self._remote_repo is None:
             return None
 
-        result = self._remote_repo.clone_url
-        if self._remote_repo.requester.auth:
-            result = result.replace("https://", f"https://{self._remote_repo.requester.auth.token}@")
-
-        return result
+        return authenticated_clone_url(self._remote_repo)
 
     @property
     def update_required(self) -> bool:
@@ -364,9 +858,17 @@ class Tentacle:
             return None
         return f"{self._host}:{self._port}"
 
+    @property
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def head_sha(self) -> str | None:
+        return self._head_sha
+
     @property
     def last_commit(self) -> str:
-        return self.local_repo.head.commit.hexsha[:7]
+        return (self._head_sha or "")[:7]
 
     @property
     def _command_context(self) -> Dict[str, str | int]:
@@ -1,60 +1,341 @@
 import json
 import os
-from TentaclePreview.filesystem_utils import safe_rmtree
-from typing import Any, Dict
-
-from github import Github
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict
 
 from TentaclePreview import output
+from TentaclePreview import state
+from TentaclePreview.admission import AdmissionControl
+from TentaclePreview.cluster import ClusterCoordinator, RemoteTentacle
+from TentaclePreview.disk_quota import TRASH_DIR_NAME, DiskQuota, Trash
 from TentaclePreview.git_utils import *
+from TentaclePreview.log_store import SYSTEM_SOURCE, LogStore
+from TentaclePreview.profiling import SlowRequestLog
+from TentaclePreview.reconciler import DELETED_SHA, Reconciler
+from TentaclePreview.scheduler import BuildScheduler
+from TentaclePreview.startup import StartupProgress
+from TentaclePreview.status_board import StatusBoard
 from TentaclePreview.tentacle import Tentacle
 
+if TYPE_CHECKING:  # PyGithub is imported in the background, once the web server is up
+    from github import Github
+    from github.Branch import Branch
+    from github.Repository import Repository
+
 TENTACLES_LIST: List[Tentacle] = []
+_TENTACLES_BY_NAME: Dict[str, Tentacle] = {}
+_TENTACLES_BY_HOST_LABEL: Dict[str, Tentacle] = {}
 SYSTEM_LOGS: List[output.LogEntry] = []
 CONFIG: Dict[str, Any] = {}
-GITHUB_INSTANCE: Github | None = None
-REPO: Repository | None = None
-
-def add_system_log(log_entry: output.LogEntry, **kwargs: dict[str, Any]) -> None:
+GITHUB_INSTANCE: "Github | None" = None
+REPO: "Repository | None" = None
+SCHEDULER: BuildScheduler | None = None
+LOG_STORE: LogStore | None = None
+STATUS_BOARD = StatusBoard()
+TRASH: Trash | None = None
+DISK_QUOTA: DiskQuota | None = None
+ADMISSION: AdmissionControl | None = None
+CLUSTER: ClusterCoordinator | None = None  # set when this server is a cluster coordinator
+RECONCILER: Reconciler | None = None
+SLOW_REQUESTS: SlowRequestLog | None = None
+STARTUP = StartupProgress()
+_INITIALISING: Dict[str, Dict[str, Any] | None] = {}  # branch -> saved state, until its tentacle is loaded
+_STATE_LOCK = threading.Lock()
+
+def add_system_log(entries: List[output.LogEntry]) -> None:
     global SYSTEM_LOGS
-    SYSTEM_LOGS.append(log_entry)
+    SYSTEM_LOGS.extend(entries)
 
-def system_logs_to_json() -> list[Any]:
+def system_logs_to_json(offset: int = 0, limit: int | None = None) -> list[Any]:
     global SYSTEM_LOGS
-    return list(map(lambda log: log.__json__(), SYSTEM_LOGS))
+    end = None if limit is None else offset + limit
+    return list(map(lambda log: log.__json__(), SYSTEM_LOGS[offset:end]))
+
+def store_system_log(entries: List[output.LogEntry]) -> None:
+    global LOG_STORE
+    if LOG_STORE is not None:
+        LOG_STORE.append_records(SYSTEM_SOURCE, [(e.created, e.log_type.value, e.message) for e in entries])
 
 output.on_log_event.append(add_system_log)
+output.on_log_event.append(store_system_log)
 
 def get_tenty_by_name(name: str) -> Tentacle | None:
-    global TENTACLES_LIST
-    return next((t for t in TENTACLES_LIST if t.name == name), None)
+    global _TENTACLES_BY_NAME
+    return _TENTACLES_BY_NAME.get(name)
 
 
-def init_globals(config_path: str) -> None:
-    global CONFIG, GITHUB_INSTANCE, REPO
+def host_label(branch_name: str) -> str:
+    """DNS label of a branch for host routing: `feature/Login_form` -> `feature-login-form`"""
+    label = re.sub(r"[^a-z0-9-]+", "-", branch_name.lower()).strip("-")
+    return label[:63].rstrip("-") or "branch"
+
+
+def _routed_label(host: str) -> str | None:
+    """The branch label of a `<label>.<host_routing.domain>` Host header (port is ignored)"""
+    global CONFIG
+
+    domain = CONFIG.get("host_routing", {}).get("domain", "")
+    label, _, rest = host.partition(":")[0].lower().partition(".")
+    if not domain or rest != domain.lower():
+        return None
+    return label
+
+
+def get_tenty_by_host(host: str) -> Tentacle | None:
+    """Finds the tentacle for a `<branch>.<host_routing.domain>` Host header"""
+    global _TENTACLES_BY_HOST_LABEL
+    label = _routed_label(host)
+    return _TENTACLES_BY_HOST_LABEL.get(label) if label else None
+
+
+def pending_branch_by_host(host: str) -> str | None:
+    """The branch of a `<branch>.<host_routing.domain>` Host header that has no tentacle yet, but is
+    initialising or queued for its first build"""
+    global SCHEDULER
+    label = _routed_label(host)
+    if not label:
+        return None
+    names = list(_INITIALISING) + list(SCHEDULER.snapshot() if SCHEDULER is not None else ())
+    return next((name for name in names if host_label(name) == label), None)
+
+
+def preview_url(tenty: Tentacle) -> str:
+    global CONFIG
+
+    host_routing = CONFIG.get("host_routing", {})
+    if host_routing.get("enabled", False):
+        return f"//{host_label(tenty.name)}.{host_routing['domain']}/"
+    return f"/tentacle/{tenty.name}/"
+
+
+def add_tentacle(tenty: Tentacle) -> None:
+    global TENTACLES_LIST, _TENTACLES_BY_NAME, _TENTACLES_BY_HOST_LABEL
+
+    label = host_label(tenty.name)
+    other = _TENTACLES_BY_HOST_LABEL.get(label)
+    if other is not None and other.name != tenty.name:
+        output.log(f"Branches '{other.name}' and '{tenty.name}' share host name '{label}', "
+                   f"only '{other.name}' is reachable by host", "warning")
+    else:
+        _TENTACLES_BY_HOST_LABEL[label] = tenty
+
+    TENTACLES_LIST.append(tenty)
+    _TENTACLES_BY_NAME[tenty.name] = tenty
+    _INITIALISING.pop(tenty.name, None)
+
+
+def remove_tentacle(tenty: Tentacle) -> None:
+    global TENTACLES_LIST, _TENTACLES_BY_NAME, _TENTACLES_BY_HOST_LABEL
+
+    TENTACLES_LIST.remove(tenty)
+    _TENTACLES_BY_NAME.pop(tenty.name, None)
+    label = host_label(tenty.name)
+    if _TENTACLES_BY_HOST_LABEL.get(label) is tenty:
+        del _TENTACLES_BY_HOST_LABEL[label]
+        # a branch that shared the host name with the removed one takes it over
+        heir = next((other for other in TENTACLES_LIST if host_label(other.name) == label), None)
+        if heir is not None:
+            _TENTACLES_BY_HOST_LABEL[label] = heir
+            output.log(f"Host name '{label}' now routes to branch '{heir.name}'", "info")
+
+
+def tentacle_status(tenty: Tentacle, queue: Dict[str, Any] | None) -> Dict[str, Any]:
+    status = {
+        'name': tenty.name,
+        'url': tenty.url,
+        'is_build_success': tenty.is_build_success,
+        'is_start_success': tenty.is_start_success,
+        'last_commit': tenty.last_commit,
+        'commit': tenty.head_sha,
+        'preview_url': preview_url(tenty),
+        'queue': queue,
+    }
+    if isinstance(tenty, RemoteTentacle):
+        status['queue'] = tenty.queue
+        status['agent'] = tenty.agent_id
+    return status
+
+
+def placeholder_status(name: str, queue: Dict[str, Any] | None) -> Dict[str, Any]:
+    """Status of a branch whose tentacle is still being loaded or cloned at startup"""
+    return {
+        'name': name,
+        'url': None,
+        'is_build_success': None,
+        'is_start_success': None,
+        'last_commit': '',
+        'commit': None,
+        'preview_url': None,
+        'queue': queue,
+        'initialising': True,
+    }
+
+
+def is_initialising(name: str) -> bool:
+    return name in _INITIALISING
+
+
+def refresh_status(names: List[str] | None = None) -> None:
+    """Updates STATUS_BOARD for the given tentacles (all if None); unchanged ones keep their version"""
+    global TENTACLES_LIST, SCHEDULER, STATUS_BOARD
+
+    queue = SCHEDULER.snapshot() if SCHEDULER else {}
+    for tenty in list(TENTACLES_LIST):
+        if names is None or tenty.name in names:
+            STATUS_BOARD.update(tenty.name, tentacle_status(tenty, queue.get(tenty.name)))
+    for name in list(_INITIALISING):
+        if (names is None or name in names) and name not in _TENTACLES_BY_NAME:
+            STATUS_BOARD.update(name, placeholder_status(name, queue.get(name)))
+
+
+def _drop_placeholder(name: str) -> None:
+    _INITIALISING.pop(name, None)
+    if name not in _TENTACLES_BY_NAME:
+        STATUS_BOARD.remove(name)
+
+
+def init_globals(config_path: str, overrides: Dict[str, Any] | None = None) -> None:
+    """Everything that only needs the config and local files; GitHub is connected later by `init`"""
+    global CONFIG, SCHEDULER, LOG_STORE, TRASH, DISK_QUOTA, ADMISSION, CLUSTER, RECONCILER, SLOW_REQUESTS
     # TODO add try catches
     # TODO add custom_commands: Dict["branch_name", "cmd_dict"]
     CONFIG = json.load(open(config_path))
+    CONFIG.update(overrides or {})
 
     output.log(f"Configuration loaded from {config_path}", "success")
 
     output.ENABLED_LOG_LEVELS = CONFIG["enabled_log_levels"]
-    GITHUB_INSTANCE = Github(CONFIG["github_token"])
-    REPO = GITHUB_INSTANCE.get_repo(CONFIG["repo_full_name"])
+
+    if CONFIG.get("detach_on_shutdown", False):
+        if os.name == "nt":
+            output.log("detach_on_shutdown is not supported on Windows, ignoring", "warning")
+            CONFIG["detach_on_shutdown"] = False
+        else:
+            Tentacle.set_logs_dir(Path(CONFIG.get("logs_dir", "tentacle_logs")))
+
+    log_search = CONFIG.get("log_search", {})
+    if log_search.get("enabled", True):
+        LOG_STORE = LogStore.from_config(log_search)
+        Tentacle.set_log_store(LOG_STORE)
+
+    SCHEDULER = BuildScheduler.from_config(CONFIG.get("scheduler", {}))
+    output.log(f"Build scheduler: up to {SCHEDULER.max_parallel} parallel builds", "info")
+    Tentacle.set_build_parallelism(CONFIG.get("scheduler", {}).get("max_parallel_steps", 2))
+
+    admission = CONFIG.get("admission", {})
+    if admission.get("enabled", True):
+        ADMISSION = AdmissionControl.from_config(admission)
+
+    profiling = CONFIG.get("profiling", {})
+    if profiling.get("enabled", True):
+        SLOW_REQUESTS = SlowRequestLog.from_config(profiling)
+        if not profiling.get("admin_token"):
+            output.log("profiling.admin_token is not set: /api/admin/profile and /api/admin/slow-requests are disabled",
+                       "warning")
+
+    # trees are renamed into the trash and deleted in the background
+    TRASH = Trash(Path(CONFIG["branches_dir"]) / TRASH_DIR_NAME)
+    Tentacle.set_trash(TRASH)
+
+    cluster = CONFIG.get("cluster", {})
+    if cluster.get("role", "standalone") == "coordinator":
+        CLUSTER = ClusterCoordinator.from_config(cluster)
+        CLUSTER.tentacles = get_tenty_by_name
+        CLUSTER.start()
+        output.log("Cluster coordinator: tentacles run on agents", "info")
+
+    reconcile = CONFIG.get("reconcile", {})
+    if reconcile.get("enabled", True) and cluster.get("role", "standalone") != "agent":  # agents follow the coordinator
+        RECONCILER = Reconciler.from_config(reconcile)
+        RECONCILER.remote_heads = remote_branch_heads
+        RECONCILER.local_heads = lambda: {tenty.name: tenty.head_sha for tenty in list(TENTACLES_LIST)}
+        RECONCILER.is_busy = _is_busy
+        RECONCILER.is_watched = branch_filter(CONFIG["filter_mode"], CONFIG["filter_branches"])
+        RECONCILER.on_event = apply_branch_event
+
+    disk_quota = CONFIG.get("disk_quota", {})
+    if disk_quota.get("enabled", False) and CLUSTER is not None:
+        output.log("disk_quota applies to agents, not to the coordinator, ignoring", "warning")
+    elif disk_quota.get("enabled", False):
+        DISK_QUOTA = DiskQuota.from_config(CONFIG["branches_dir"], disk_quota)
+        DISK_QUOTA.tentacles = lambda: list(TENTACLES_LIST)
+        DISK_QUOTA.is_busy = lambda name: name in SCHEDULER.snapshot()
+        DISK_QUOTA.claim = SCHEDULER.claim
+        DISK_QUOTA.release = SCHEDULER.release
+        DISK_QUOTA.start()
+        output.log(f"Disk budget for branches: {DISK_QUOTA.budget // 2 ** 20} MB", "info")
+
+
+def connect_github() -> None:
+    """Creates the GitHub client and looks up the repository; these are network calls"""
+    global CONFIG, GITHUB_INSTANCE, REPO
+    from github import Github
+
+    if CONFIG.get("github_api_url"):
+        github = Github(CONFIG["github_token"], base_url=CONFIG["github_api_url"])
+    else:
+        github = Github(CONFIG["github_token"])
+    REPO = github.get_repo(CONFIG["repo_full_name"])
+    GITHUB_INSTANCE = github
 
     output.log(f"Watching repository {CONFIG['repo_full_name']}", "success")
 
 
+def remote_branch_heads() -> Dict[str, str]:
+    """Heads of all branches, in one `git ls-remote` instead of an API call per branch"""
+    global REPO
+    return ls_remote_heads(authenticated_clone_url(REPO))
+
+
+def _is_busy(name: str) -> bool:
+    """Queued or building, here or on its agent"""
+    if SCHEDULER is not None and name in SCHEDULER.snapshot():
+        return True
+    tenty = get_tenty_by_name(name)
+    return isinstance(tenty, RemoteTentacle) and tenty.queue is not None
+
+
+def save_state(detached: bool = False) -> None:
+    global TENTACLES_LIST, CONFIG
+
+    if CLUSTER is not None:
+        return  # agents keep the state of their tentacles
+
+    with _STATE_LOCK:
+        try:
+            # tentacles that are not loaded yet keep their saved state (e.g. the pid of a detached process)
+            states = {name: saved for name, saved in list(_INITIALISING.items()) if saved}
+            states.update({tenty.name: tenty.detach() if detached else tenty.to_state() for tenty in TENTACLES_LIST})
+            state.save_state(CONFIG.get("state_file", "tentacle_state.json"), states, detached)
+        except Exception as e:
+            output.log(f"Failed to save tentacles state: {e}", "error")
+
+
 def delete_tentacle(name: str) -> None:
-    global TENTACLES_LIST
+    global TENTACLES_LIST, LOG_STORE
+
+    if is_initialising(name):
+        _drop_placeholder(name)
 
     tenty = get_tenty_by_name(name)
     if tenty:
-        TENTACLES_LIST.remove(tenty)
+        remove_tentacle(tenty)
+        STATUS_BOARD.remove(name)
+        if ADMISSION is not None:
+            ADMISSION.remove(name)
+        if CLUSTER is not None:
+            CLUSTER.unassign(name)
         tenty.clear_files()
 
+    if LOG_STORE is not None:
+        LOG_STORE.delete_source(name)  # its logs would stay on disk and in search results forever
 
-def clear_redundant_local_branches(remote_branches: List[Branch]) -> None:
+
+def clear_redundant_local_branches(remote_branches: List["Branch"]) -> None:
     global CONFIG
 
     output.log("Clearing redundant local branches", "info")
@@ -66,7 +347,7 @@ def clear_redundant_local_branches(remote_branches: List[Branch]) -> None:
 
     local_branches = [
         name for name in os.listdir(branches_dir)
-        if os.path.isdir(os.path.join(branches_dir, name))
+        if os.path.isdir(os.path.join(branches_dir, name)) and not name.startswith(".")  # e.g. the trash
     ]
 
     remote_branches_names = [br.name for br in remote_branches]
@@ -75,44 +356,118 @@ def clear_redundant_local_branches(remote_branches: List[Branch]) -> None:
         if branch not in remote_branches_names:
             branch_path = os.path.join(branches_dir, branch)
             output.log(f"Attempting to delete local branch {branch}", "info")
-            if safe_rmtree(branch_path):
+            if TRASH.discard(branch_path):
                 output.log(f"Local branch {branch} deleted", "success")
             else:
                 output.log(f"Failed to delete local branch {branch} after multiple attempts", "error")
 
 
-def init_tentacles() -> None:
-    global TENTACLES_LIST, CONFIG, REPO, GITHUB_INSTANCE
+def show_saved_tentacles() -> None:
+    """Lists the tentacles of the last run as initialising before GitHub is even connected"""
+    global CONFIG
+
+    for name, saved in state.load_state(CONFIG.get("state_file", "tentacle_state.json")).items():
+        _INITIALISING.setdefault(name, saved)
+    refresh_status()
+
 
-    branches = get_filtered_github_repo_branches(REPO, CONFIG["filter_mode"], CONFIG["filter_branches"])
+def init_tentacles(branches: List["Branch"]) -> None:
+    global TENTACLES_LIST, CONFIG
+
+    if CLUSTER is not None:
+        output.log(f"Watching {len(branches)} branches, placing them on agents", "success")
+        for branch in branches:
+            add_tentacle(RemoteTentacle(branch.name))
+            CLUSTER.assign(branch.name)
+        refresh_status()
+        return
 
     if CONFIG.get("clear_redundant_local_branches", True):
         clear_redundant_local_branches(branches)
 
     output.log(f"Watching {len(branches)} branches", "success")
 
-    for branch in branches:
-        new_branch_server = Tentacle(remote_repo=REPO, remote_branch=branch, branches_dir=CONFIG["branches_dir"],
-                                     commands=CONFIG["commands"])
-        TENTACLES_LIST.append(new_branch_server)
+    names = {branch.name for branch in branches}
+    for name in list(_INITIALISING):
+        if name not in names:
+            _drop_placeholder(name)  # gone from the remote (or the filter) since the last run
+    for name in names:
+        _INITIALISING.setdefault(name, None)
+    refresh_status()
 
 
-def start_tentacles() -> None:
-    global TENTACLES_LIST
-
-    for tenty in TENTACLES_LIST:
+def _build_and_start(tenty: Tentacle, saved: Dict[str, Any] | None = None) -> None:
+    if tenty.restore_build(saved):
+        output.log(f"Build of tentacle '{tenty.name}' is up to date, skipping build", "info")
+    else:
         tenty.build()
-        tenty.start()
+    tenty.start()
+    save_state()
+    if DISK_QUOTA is not None:
+        DISK_QUOTA.request_check(tenty.name)
+
+
+def load_tentacles(branches: List["Branch"]) -> List[Future]:
+    """Loads or clones the tentacles a few at a time; each one is adopted or queued for a build as soon as it is there.
+
+    Returns the queued builds.
+    """
+    global CONFIG, REPO, SCHEDULER
+
+    jobs: List[Future] = []
+    total, loaded = len(branches), 0
+    counter_lock = threading.Lock()
+
+    def load(branch: "Branch") -> None:
+        nonlocal loaded
+        saved = _INITIALISING.get(branch.name)
+        try:
+            tenty = Tentacle(remote_repo=REPO, remote_branch=branch, branches_dir=CONFIG["branches_dir"],
+                             commands=CONFIG["commands"])
+        except Exception as e:
+            output.log(f"Skipping tentacle '{branch.name}': {hide_credentials(str(e))}", "error")
+            _drop_placeholder(branch.name)  # the reconciler finds the branch missing and creates it later
+            return
 
-    for tenty in TENTACLES_LIST:
-        output.log(str(tenty), "header")
+        if saved and saved.get("last_active"):
+            tenty.last_active = saved["last_active"]
+        adopted = tenty.adopt(saved)
+        add_tentacle(tenty)  # only now: the state file keeps the saved state until then
+        if not adopted:
+            jobs.append(SCHEDULER.submit(tenty.name, lambda: _build_and_start(tenty, saved), reason="startup"))
+        refresh_status([tenty.name])
+
+        with counter_lock:
+            loaded += 1
+            STARTUP.set_phase("preparing", f"Loaded {loaded} of {total} tentacles")
+
+    parallel = CONFIG.get("scheduler", {}).get("max_parallel_clones", 4)
+    with ThreadPoolExecutor(max_workers=max(1, parallel), thread_name_prefix="tentacle-load") as pool:
+        list(pool.map(load, branches))
+    return jobs
 
 
 def stop_tentacles() -> None:
-    global TENTACLES_LIST
+    global TENTACLES_LIST, LOG_STORE
 
     for tenty in TENTACLES_LIST:
-        tenty.stop()
+        if not isinstance(tenty, RemoteTentacle):  # agents keep running theirs
+            tenty.stop()
+
+    save_state()
+    if LOG_STORE is not None:
+        LOG_STORE.close()
+
+
+def detach_tentacles() -> None:
+    """Saves state and leaves tentacle processes running, so the next run can re-attach to them"""
+    global TENTACLES_LIST, LOG_STORE
+
+    save_state(detached=True)
+    running = sum(1 for tenty in TENTACLES_LIST if tenty.is_start_success)
+    output.log(f"Detached from {running} running tentacles", "warning")
+    if LOG_STORE is not None:
+        LOG_STORE.close()
 
 
 def proceed_webhook_event(json_data) -> None:
@@ -122,35 +477,176 @@ def proceed_webhook_event(json_data) -> None:
         output.log(f"Got webhook, but webhook update is disabled in config", "warning")
         return
 
+    if not STARTUP.loaded.is_set():
+        output.log("Got webhook during startup, applying it once the tentacles are loaded", "info")
+        STARTUP.loaded.wait()
+
     output.log(f"Received event from: {json_data.get('repository', {}).get('full_name')}", "header")
     output.log(f"Triggered by: {json_data.get('sender', {}).get('login')}")
 
-    branch_name = json_data["ref"].split("/")[-1]
+    ref = json_data["ref"]
+    if not ref.startswith("refs/heads/"):
+        output.log(f"Ignoring push to {ref}: not a branch", "info")
+        return
+
+    apply_branch_event(ref.removeprefix("refs/heads/"), json_data["after"])
+
+
+def apply_branch_event(branch_name: str, after: str) -> None:
+    """Creates, updates or deletes (`after` is all zeros) the tentacle of a pushed branch"""
+    global CLUSTER, SCHEDULER
+
+    tenty = get_tenty_by_name(branch_name)
+    if after == DELETED_SHA:
+        if CLUSTER is not None:
+            if tenty is not None:
+                delete_tentacle(branch_name)  # an agent stops it once it is no longer assigned
+        elif tenty is not None or is_initialising(branch_name):
+            remove_branch(branch_name)
+        return
+
+    if CLUSTER is not None:
+        if tenty is None:
+            add_tentacle(RemoteTentacle(branch_name))
+            refresh_status([branch_name])
+            CLUSTER.assign(branch_name)
+        else:
+            CLUSTER.request(branch_name, "update")
+        return
+
+    update_tentacle(branch_name)
+
+
+def update_tentacle(branch_name: str) -> Future:
+    """Queues a pull, build and restart of a pushed branch; creates its tentacle if there is none yet"""
+    global SCHEDULER
+    return SCHEDULER.submit(branch_name, lambda: _update_or_create(branch_name), reason="push")
+
+
+def remove_branch(branch_name: str, reason: str = "deleted") -> Future:
+    """Queues stopping and deleting the tentacle of a branch.
 
+    Goes through the scheduler like builds do: it replaces a queued update of the branch and waits for
+    a running one, so no build ends up in a deleted tree or starts a tentacle that is gone.
+    """
+    global SCHEDULER
+    return SCHEDULER.submit(branch_name, lambda: _stop_and_delete(branch_name), reason=reason)
+
+
+def _stop_and_delete(branch_name: str) -> None:
     tenty = get_tenty_by_name(branch_name)
     if tenty is not None:
-        if json_data["after"] == "0000000000000000000000000000000000000000":
-            get_tenty_by_name(branch_name).stop()
-            delete_tentacle(branch_name)
-            return
+        tenty.stop()
+    delete_tentacle(branch_name)
+    save_state()
+
+
+def _update_or_create(branch_name: str, clean: bool = False) -> None:
+    global TENTACLES_LIST, CONFIG, REPO
 
-        tenty.update()
+    # looked up when the job runs: the branch may have been created by an earlier queued job
+    tenty = get_tenty_by_name(branch_name)
+    if tenty is not None:
+        tenty.update(clean)
+        refresh_status([branch_name])
+        save_state()
+        if DISK_QUOTA is not None:
+            DISK_QUOTA.request_check(branch_name)
         return
 
+    create_tentacle(branch_name)
+
+
+def create_tentacle(branch_name: str, saved: Dict[str, Any] | None = None) -> Tentacle:
+    """Clones, builds and starts a new tentacle, or re-attaches to its saved process if that still runs"""
+    global CONFIG, REPO
+
+    tenty = get_tenty_by_name(branch_name)
+    if tenty is not None:
+        return tenty
+
     new_tenty = Tentacle(remote_repo=REPO, remote_branch=branch_name, branches_dir=CONFIG["branches_dir"],
                          commands=CONFIG["commands"])
-    TENTACLES_LIST.append(new_tenty)
-    new_tenty.build()
-    new_tenty.start()
+    add_tentacle(new_tenty)
+    refresh_status([branch_name])
+    if saved and saved.get("last_active"):
+        new_tenty.last_active = saved["last_active"]
+    if new_tenty.adopt(saved):
+        save_state()
+    else:
+        _build_and_start(new_tenty, saved)
+    return new_tenty
+
+
+def restart_tentacle(name: str, clean: bool = False) -> Future | None:
+    """Queues an update of an existing tentacle ahead of webhook and startup builds"""
+    global SCHEDULER
+    if CLUSTER is not None:
+        CLUSTER.request(name, "restart", clean=clean)
+        return None
+    return SCHEDULER.submit(name, lambda: _update_or_create(name, clean), reason="restart", explicit=True)
+
+
+def queue_info(name: str) -> Dict[str, Any] | None:
+    global SCHEDULER
+    if SCHEDULER is None:
+        return None
+    return SCHEDULER.snapshot().get(name)
 
 
 def init_webhook() -> None:
     raise NotImplementedError  # add webhook to GITHUB_INSTANCE
 
 
+def _with_retries(phase: str, detail: str, action):
+    """Runs a startup step until it succeeds, so GitHub being unreachable during a deploy needs no restart"""
+    delay = 5
+    while True:
+        STARTUP.set_phase(phase, detail)
+        try:
+            return action()
+        except Exception as e:
+            error = hide_credentials(str(e))
+            output.log(f"{detail} failed: {error}. Retrying in {delay} s", "error")
+            STARTUP.fail(error, f"{detail} failed, retrying in {delay} s")
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
+
+
 def init():
-    output.log("Git Init Stage", "header")
-    init_tentacles()
+    """The slow part of the startup. Runs in the background: the dashboard answers meanwhile"""
+    global CONFIG, REPO
+
+    try:
+        if CLUSTER is None:
+            show_saved_tentacles()
+
+        _with_retries("connecting", f"Connecting to {CONFIG['repo_full_name']}", connect_github)
+        output.log("Git Init Stage", "header")
+        branches = _with_retries("discovering", "Listing branches", lambda: get_filtered_github_repo_branches(
+            REPO, CONFIG["filter_mode"], CONFIG["filter_branches"]))
+        init_tentacles(branches)
+
+        if CLUSTER is not None:  # agents build and start them
+            STARTUP.finish()
+            if RECONCILER is not None:
+                RECONCILER.start()
+            return
 
-    output.log(f"Tentacles Init Stage", "header")
-    start_tentacles()
+        output.log(f"Tentacles Init Stage", "header")
+        STARTUP.set_phase("preparing", f"Loading {len(branches)} tentacles")
+        jobs = load_tentacles(branches)
+        STARTUP.loaded.set()
+        if RECONCILER is not None:
+            RECONCILER.start()
+
+        STARTUP.set_phase("preparing", f"Building {len(jobs)} tentacles")
+        wait(jobs)
+        save_state()
+        for tenty in TENTACLES_LIST:
+            output.log(str(tenty), "header")
+        STARTUP.finish()
+    except Exception as e:
+        output.log(f"Initialization failed: {e}", "error")
+        STARTUP.fail(str(e))
+        STARTUP.loaded.set()  # don't keep webhooks waiting forever
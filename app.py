@@ -1,8 +1,9 @@
+import hmac
 import re
 import signal
 import sys
 import threading
-from typing import Any
+from datetime import datetime
 from urllib.parse import urlparse
 
 import requests
@@ -10,12 +11,27 @@ from flask import Flask, request, Response, jsonify, render_template
 from flask_socketio import SocketIO, emit
 
 from TentaclePreview import output
+from TentaclePreview import profiling
 from TentaclePreview import tentacle_preview as tentacle
+from TentaclePreview.git_utils import hide_credentials
 from TentaclePreview.output import LogType
 
 app = Flask(__name__, static_folder="tentacle_preview_static")
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+
+def upstream_request(**kwargs) -> requests.Response:
+    """`requests.request` that adds the time spent connecting to the request timing.
+
+    Connections are not reused on purpose: dev servers that write headers and body separately
+    stall on a kept-alive connection until the delayed ACK (~40 ms).
+    """
+    with requests.Session() as session:
+        session.mount("http://", profiling.TimedHTTPAdapter())
+        return session.request(**kwargs)
+
+PROFILE_LOCK = threading.Lock()  # one profile at a time
+
 @app.route('/')
 def main_page():
     return render_template('index.html', repo_name=tentacle.CONFIG.get("repo_full_name"))
@@ -31,18 +47,10 @@ def on_disconnect():
     # output.log('WebSocket: client disconnected', 'info')
 
 @socketio.on('request_status')
-def on_request_status():
-    tentacles = [
-        {
-            'name': t.name,
-            'url': t.url,
-            'is_build_success': t.is_build_success,
-            'is_start_success': t.is_start_success,
-            'last_commit': t.last_commit
-        }
-        for t in tentacle.TENTACLES_LIST
-    ]
-    emit('status_update', {'tentacles': tentacles})
+def on_request_status(data=None):
+    # clients send the last version they have and get only what changed since
+    data = data if isinstance(data, dict) else {}
+    emit('status_delta', tentacle.STATUS_BOARD.changes_since(data.get('since'), data.get('epoch')))
 
 @socketio.on('request_logs')
 def on_request_logs(data):
@@ -64,15 +72,33 @@ def on_request_logs(data):
 
 def broadcast_status_update(name, build_status, start_status):
     try:
-        socketio.emit('status_update', {
-            'tentacle': name,
-            'build_status': build_status,
-            'start_status': start_status
-        })
-        # output.log(f'Broadcast status: {name}, build={build_status}, start={start_status}')
+        tentacle.refresh_status([name])
+    except Exception as e:
+        output.log(f'Error broadcasting status: {e}', 'error')
+
+def broadcast_status_delta(delta):
+    try:
+        socketio.emit('status_delta', delta)
     except Exception as e:
         output.log(f'Error broadcasting status: {e}', 'error')
 
+tentacle.STATUS_BOARD.on_change = broadcast_status_delta
+
+def broadcast_startup(progress):
+    try:
+        socketio.emit('startup_update', progress)
+    except Exception as e:
+        output.log(f'Error broadcasting startup progress: {e}', 'error')
+
+tentacle.STARTUP.on_change = broadcast_startup
+
+def broadcast_queue_update():
+    try:
+        socketio.emit('queue_update', {'queue': tentacle.SCHEDULER.snapshot()})
+        tentacle.refresh_status()
+    except Exception as e:
+        output.log(f'Error broadcasting build queue: {e}', 'error')
+
 def broadcast_logs_update(name, log_type, logs, stream=False):
     try:
         socketio.emit('logs_update', {
@@ -86,35 +112,68 @@ def broadcast_logs_update(name, log_type, logs, stream=False):
         output.log(f'Error broadcasting logs: {e}', 'error')
 
 
-def broadcast_new_system_log(log_entry: output.LogEntry, **kwargs: dict[str, Any]) -> None:
+def broadcast_new_system_log(entries: list[output.LogEntry]) -> None:
     global socketio
 
     try:
         socketio.emit('system_logs_update', {
-            'log_type': log_entry.log_type.value,
-            'message': log_entry.message,
-            'time': log_entry.time,
+            # add_system_log already ran for this batch, so it ends the list
+            'offset': len(tentacle.SYSTEM_LOGS) - len(entries),
+            'logs': [log_entry.__json__() for log_entry in entries],
         })
     except Exception as e:
         print(e)
 
-@app.route('/api/tentacles')
-def api_tentacles():
-    tentacles_data = []
-    for tenty in tentacle.TENTACLES_LIST:
-        tentacles_data.append({
-            'name': tenty.name,
-            'url': tenty.url,
-            'is_build_success': tenty.is_build_success,
-            'is_start_success': tenty.is_start_success,
-            'last_commit': tenty.last_commit
-        })
+@app.route('/api/health')
+def api_health():
+    """Answers as soon as the server is up; `ready` once the startup has loaded and built every tentacle"""
+    progress = tentacle.STARTUP.snapshot()
+    if progress['phase'] == 'failed':
+        status = 'failed'
+    else:
+        status = 'ok' if progress['ready'] else 'initialising'
 
+    _, statuses = tentacle.STATUS_BOARD.snapshot()
     return jsonify({
-        'tentacles': tentacles_data,
-        'total': len(tentacles_data)
-    })
+        'status': status,
+        **progress,
+        'tentacles': {
+            'total': len(statuses),
+            'initialising': sum(1 for t in statuses if t.get('initialising')),
+            'running': sum(1 for t in statuses if t['is_start_success']),
+        }
+    }), 503 if status == 'failed' else 200
 
+@app.route('/api/tentacles')
+def api_tentacles():
+    board = tentacle.STATUS_BOARD
+    etag = board.etag
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        version, tentacles_data = board.snapshot()
+        etag = board.etag_for(version)  # the tag of this body: the board may have changed since the check
+        response = jsonify({
+            'tentacles': tentacles_data,
+            'total': len(tentacles_data),
+            'version': version,
+            'epoch': board.epoch
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def page_args(total: int) -> tuple[int, int] | None:
+    """(offset, limit) from `?offset=&limit=`; only `limit` means the last `limit` lines, nothing means everything"""
+    if 'offset' not in request.args and 'limit' not in request.args:
+        return None
+    limit = max(0, min(int(request.args.get('limit', 1000)), 10000))
+    if 'offset' in request.args:
+        offset = max(0, int(request.args['offset']))
+    else:
+        offset = max(0, total - limit)
+    return offset, limit
 
 @app.route('/api/tentacles/<tentacle_name>/logs/<log_type>')
 def api_tentacle_logs(tentacle_name, log_type):
@@ -127,11 +186,25 @@ def api_tentacle_logs(tentacle_name, log_type):
 
     try:
         logs = target_tentacle.get_logs(log_type)
+        total = len(logs)
+        page = page_args(total)
+        if page is None:
+            return jsonify({
+                'tentacle': tentacle_name,
+                'log_type': log_type,
+                'logs': logs
+            })
+
+        offset, limit = page
         return jsonify({
             'tentacle': tentacle_name,
             'log_type': log_type,
-            'logs': logs
+            'logs': logs[offset:offset + limit],
+            'offset': offset,
+            'total': total
         })
+    except ValueError as e:
+        return jsonify({'error': f'Invalid page: {e}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -147,17 +220,204 @@ def api_tentacle_restart(tentacle_name, clean='false'):
         return jsonify({'error': 'Invalid clean. Must be "true" or "false"'}), 400
 
     try:
-        target_tentacle.update(clean == 'true')
+        tentacle.restart_tentacle(tentacle_name, clean == 'true')
         return jsonify({
             'is_clean': clean,
+            'queue': tentacle.queue_info(tentacle_name)
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/tentacles/<tentacle_name>/admission')
+def api_tentacle_admission(tentacle_name):
+    if tentacle.get_tenty_by_name(tentacle_name) is None:
+        return jsonify({'error': f'Tentacle {tentacle_name} not found'}), 404
+    if tentacle.ADMISSION is None:
+        return jsonify({'error': 'Admission control is disabled in config'}), 404
+    return jsonify({'tentacle': tentacle_name, **tentacle.ADMISSION.gate(tentacle_name).stats()})
+
+@app.route('/api/admission')
+def api_admission():
+    if tentacle.ADMISSION is None:
+        return jsonify({'error': 'Admission control is disabled in config'}), 404
+    return jsonify({'tentacles': tentacle.ADMISSION.stats()})
+
+def tentacle_not_found(branch):
+    if tentacle.is_initialising(branch):
+        return Response(f"Tentacle '{branch}' is initialising, try again later", 503, {'Retry-After': '5'})
+    if tentacle.queue_info(branch) is not None:
+        return Response(f"Tentacle '{branch}' is queued for its first build, try again later", 503, {'Retry-After': '5'})
+    return f"Tentacle for branch '{branch}' not found", 404
+
+def cluster_coordinator():
+    """The coordinator if the request may use the cluster API, else an error response"""
+    cluster = tentacle.CLUSTER
+    if cluster is None:
+        return None, (jsonify({'error': 'This server is not a cluster coordinator'}), 404)
+    if not cluster.check_token(request.headers.get('X-Cluster-Token')):
+        return None, (jsonify({'error': 'Invalid cluster token'}), 403)
+    return cluster, None
+
+@app.route('/api/cluster/heartbeat', methods=['POST'])
+def api_cluster_heartbeat():
+    cluster, error = cluster_coordinator()
+    if error:
+        return error
+
+    data = request.get_json(silent=True) or {}
+    if not data.get('agent_id'):
+        return jsonify({'error': '"agent_id" is required'}), 400
+    try:
+        capacity = int(data.get('capacity', 1))
+    except (TypeError, ValueError):
+        return jsonify({'error': '"capacity" must be a number'}), 400
+    return jsonify(cluster.heartbeat(data['agent_id'], capacity, data.get('tentacles', [])))
+
+@app.route('/api/cluster/events', methods=['POST'])
+def api_cluster_events():
+    cluster, error = cluster_coordinator()
+    if error:
+        return error
+
+    data = request.get_json(silent=True) or {}
+    if not cluster.apply_events(data.get('agent_id'), data.get('events', [])):
+        return jsonify({'error': 'Unknown agent, send a heartbeat first'}), 409
+    return jsonify({'status': 'ok'})
+
+@app.route('/api/cluster')
+def api_cluster():
+    if tentacle.CLUSTER is None:
+        return jsonify({'error': 'This server is not a cluster coordinator'}), 404
+    return jsonify(tentacle.CLUSTER.stats())
+
+def admin_access():
+    """An error response unless the request has the admin token; without a configured token there is no access"""
+    if tentacle.SLOW_REQUESTS is None:
+        return jsonify({'error': 'Profiling is disabled in config'}), 404
+    token = tentacle.CONFIG.get("profiling", {}).get("admin_token", "")
+    if not token:
+        # stack samples and request paths are not for everyone who can reach the dashboard
+        return jsonify({'error': 'Set profiling.admin_token to use the admin endpoints'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    return None
+
+@app.route('/api/admin/slow-requests')
+def api_admin_slow_requests():
+    error = admin_access()
+    if error:
+        return error
+
+    slow_requests = tentacle.SLOW_REQUESTS
+    return jsonify({
+        'threshold_ms': round(slow_requests.threshold * 1000),
+        'recorded': slow_requests.recorded,
+        'requests': slow_requests.snapshot()
+    })
+
+@app.route('/api/admin/profile')
+def api_admin_profile():
+    error = admin_access()
+    if error:
+        return error
+
+    try:
+        seconds = float(request.args.get('seconds', 5))
+        interval_ms = float(request.args.get('interval_ms', 10))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid profile: {e}'}), 400
+    output_format = request.args.get('format', 'collapsed')
+    if output_format not in ['collapsed', 'json']:
+        return jsonify({'error': 'Invalid format. Must be "collapsed" or "json"'}), 400
+
+    seconds = min(max(seconds, 0.1), tentacle.CONFIG.get("profiling", {}).get("max_profile_seconds", 60))
+    interval = min(max(interval_ms, 1), 1000) / 1000
+    if not PROFILE_LOCK.acquire(blocking=False):
+        return jsonify({'error': 'Another profile is running'}), 409
+    try:
+        profile = profiling.sample_stacks(seconds, interval)
+    finally:
+        PROFILE_LOCK.release()
+
+    if output_format == 'collapsed':
+        return Response(profiling.collapsed(profile), mimetype='text/plain')
+    return jsonify({
+        'seconds': profile['seconds'],
+        'interval_ms': profile['interval'] * 1000,
+        'samples': profile['samples'],
+        'stacks': [{'frames': stack.split(';'), 'count': count}
+                   for stack, count in profile['stacks'].most_common()]
+    })
+
 @app.route('/api/tentacles/system-logs')
 def api_system_logs_get():
-    # TODO add line limit as argument
-    return jsonify({"logs": tentacle.system_logs_to_json()})
+    total = len(tentacle.SYSTEM_LOGS)
+    try:
+        page = page_args(total)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid page: {e}'}), 400
+
+    if page is None:
+        return jsonify({"logs": tentacle.system_logs_to_json()})
+
+    offset, limit = page
+    return jsonify({
+        "logs": tentacle.system_logs_to_json(offset, limit),
+        "offset": offset,
+        "total": total
+    })
+
+def parse_time_arg(value: str | None) -> float | None:
+    """Accepts unix timestamps and ISO 8601 dates"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@app.route('/api/logs/search')
+def api_logs_search():
+    if tentacle.LOG_STORE is None:
+        return jsonify({'error': 'Log search is disabled in config'}), 404
+
+    query = request.args.get('q', '')
+    if not query:
+        return jsonify({'error': 'Query parameter "q" is required'}), 400
+
+    try:
+        result = tentacle.LOG_STORE.search(
+            query,
+            regex=request.args.get('regex', 'false').lower() == 'true',
+            ignore_case=request.args.get('ignore_case', 'false').lower() == 'true',
+            sources=request.args.getlist('tentacle') or None,
+            since=parse_time_arg(request.args.get('since')),
+            until=parse_time_arg(request.args.get('until')),
+            context=min(int(request.args.get('context', 2)), 20),
+            limit=min(int(request.args.get('limit', 200)), 1000),
+        )
+    except (re.error, ValueError) as e:
+        return jsonify({'error': f'Invalid search: {e}'}), 400
+
+    return jsonify(result)
+
+@app.route('/api/reconcile', methods=['GET', 'POST'])
+def api_reconcile():
+    reconciler = tentacle.RECONCILER
+    if reconciler is None:
+        return jsonify({'error': 'Reconciliation is disabled in config'}), 404
+
+    if request.method == 'POST':
+        try:
+            reconciler.reconcile()
+        except Exception as e:
+            return jsonify({'error': hide_credentials(str(e))}), 502
+
+    return jsonify({
+        'last_run': reconciler.last_run,
+        'last_events': reconciler.last_events,
+        'interval_seconds': reconciler.interval,
+    })
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
@@ -191,7 +451,7 @@ def inject_base_and_rewrite_paths(content: str, branch: str) -> str:
         return f'{prefix}{quote}{base_href}{path.lstrip("/")}{quote}'
 
     content = re.sub(r'((?:src|href|action)=)("|\')(/[^"\']+)\2', rewrite_paths, content)
-    content = re.sub(r'url\(("|\')(/[^"\']+)\1\)', rewrite_paths, content)
+    content = re.sub(r'(url\()("|\')(/[^"\']+)\2(?=\))', rewrite_paths, content)
 
     return content
 
@@ -206,26 +466,30 @@ def extract_branch_from_referer():
 
 def proxy_request_to(target_url):
     try:
-        resp = requests.request(
-            method=request.method,
-            url=target_url,
-            headers={k: v for k, v in request.headers if k.lower() != 'host'},
-            data=request.get_data(),
-            cookies=request.cookies,
-            allow_redirects=False,
-            stream=True
-        )
-
-        content = resp.content
+        body = request.get_data()  # read first: a slow upload is not the tentacle's time
+        with profiling.upstream():
+            resp = upstream_request(
+                method=request.method,
+                url=target_url,
+                headers={k: v for k, v in request.headers if k.lower() != 'host'},
+                data=body,
+                cookies=request.cookies,
+                allow_redirects=False,
+                stream=True
+            )
+
+        with profiling.phase("read"):
+            content = resp.content
         headers = dict(resp.raw.headers)
         content_type = headers.get("Content-Type", "")
 
         branch = request.view_args.get("branch") or extract_branch_from_referer()
 
         if "text/html" in content_type and branch:
-            text = content.decode("utf-8", errors="ignore")
-            text = inject_base_and_rewrite_paths(text, branch)
-            content = text.encode("utf-8")
+            with profiling.phase("rewrite"):
+                text = content.decode("utf-8", errors="ignore")
+                text = inject_base_and_rewrite_paths(text, branch)
+                content = text.encode("utf-8")
 
         excluded_headers = {
             'content-encoding', 'content-length', 'transfer-encoding',
@@ -241,14 +505,136 @@ def proxy_request_to(target_url):
         return f"Error proxying: {e}", 502
 
 
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailers', 'transfer-encoding', 'upgrade'
+}
+STREAM_THRESHOLD = 1024 * 1024  # larger (or unknown length) responses are streamed
+
+
+def stream_request_to(target_url):
+    """Proxies without touching the body: no decoding, rewriting or re-encoding"""
+    try:
+        body = request.get_data()  # read first: a slow upload is not the tentacle's time
+        with profiling.upstream():
+            resp = upstream_request(
+                method=request.method,
+                url=target_url,
+                headers={k: v for k, v in request.headers
+                         if k.lower() not in HOP_BY_HOP_HEADERS and k.lower() != 'host'},
+                data=body,
+                cookies=request.cookies,
+                allow_redirects=False,
+                stream=True
+            )
+    except requests.exceptions.RequestException as e:
+        return f"Error proxying: {e}", 502
+
+    headers = [(name, value) for name, value in resp.raw.headers.items()
+               if name.lower() not in HOP_BY_HOP_HEADERS]
+
+    length = resp.headers.get('Content-Length', '')
+    if length.isdigit() and int(length) <= STREAM_THRESHOLD:
+        # small bodies go out in one write together with the headers
+        with profiling.phase("read"):
+            body = resp.raw.read(decode_content=False)
+        resp.close()
+        return Response(body, resp.status_code, headers)
+
+    response = Response(resp.raw.stream(64 * 1024, decode_content=False), resp.status_code, headers)
+    response.call_on_close(resp.close)
+    return response
+
+
+def admitted(target_tentacle, proxy, target_url):
+    """Runs `proxy` within the tentacle's request limits, or answers 503 if it is overloaded"""
+    timing = profiling.current()
+    if timing is not None:
+        timing.tentacle = target_tentacle.name
+
+    if target_tentacle.url is None:
+        # a cluster branch that no agent runs yet
+        return Response(f"Tentacle '{target_tentacle.name}' is not running yet, try again later", 503,
+                        {'Retry-After': '5'})
+
+    admission = tentacle.ADMISSION
+    if admission is None:
+        return proxy(target_url)
+
+    gate = admission.gate(target_tentacle.name)
+    with profiling.phase("queue"):
+        acquired = gate.acquire()
+    if not acquired:
+        return Response(f"Tentacle '{target_tentacle.name}' is overloaded, try again later", 503,
+                        {'Retry-After': str(admission.retry_after)})
+
+    try:
+        response = app.make_response(proxy(target_url))
+    except BaseException:
+        gate.release()
+        raise
+    # released once the body is sent, streamed bodies included
+    response.call_on_close(gate.release)
+    return response
+
+
+@app.before_request
+def start_timing():
+    if tentacle.SLOW_REQUESTS is not None:
+        profiling.begin(request.method, request.path)
+
+
+@app.after_request
+def finish_timing(response):
+    """Adds the phases to `Server-Timing` and records the request if it was slow, once the body is sent"""
+    timing = profiling.current()
+    if timing is None:
+        return response
+    profiling.end()
+
+    timing.finish_handling()
+    if tentacle.CONFIG.get("profiling", {}).get("server_timing", True):
+        response.headers.add('Server-Timing', timing.header())  # next to the tentacle's own, if any
+    slow_requests, status = tentacle.SLOW_REQUESTS, response.status_code
+    response.call_on_close(lambda: slow_requests.finish(timing, status))
+    return response
+
+
+@app.before_request
+def route_by_host():
+    """With host_routing enabled, `<branch>.<domain>` requests go straight to the tentacle"""
+    host_routing = tentacle.CONFIG.get("host_routing", {})
+    if not host_routing.get("enabled", False):
+        return None
+
+    with profiling.phase("lookup"):
+        target_tentacle = tentacle.get_tenty_by_host(request.host)
+    if target_tentacle is None:
+        if request.host.partition(":")[0].lower().endswith("." + host_routing["domain"].lower()):
+            branch = tentacle.pending_branch_by_host(request.host)
+            if branch is not None:
+                return tentacle_not_found(branch)  # not ready yet
+            return f"Tentacle for host '{request.host}' not found", 404
+        return None  # the dashboard itself
+
+    tentacle.SCHEDULER.touch(target_tentacle.name)
+    target_tentacle.touch()
+
+    target_url = f"http://{target_tentacle.url}{request.full_path if request.query_string else request.path}"
+    return admitted(target_tentacle, stream_request_to, target_url)
+
+
 @app.route('/tentacle/<branch>/', defaults={'path': ''}, methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"])
 @app.route('/tentacle/<branch>/<path:path>', methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"])
 def proxy_to_tentacle(branch, path=''):
-    target_tentacle = tentacle.get_tenty_by_name(branch)
+    with profiling.phase("lookup"):
+        target_tentacle = tentacle.get_tenty_by_name(branch)
 
     if target_tentacle is None:
-        return f"Tentacle for branch '{branch}' not found", 404
+        return tentacle_not_found(branch)
 
+    tentacle.SCHEDULER.touch(branch)
+    target_tentacle.touch()
     rewritten_path = f"{path}" if path else ""
 
     query = request.query_string.decode()
@@ -256,7 +642,7 @@ def proxy_to_tentacle(branch, path=''):
     if query:
         target_url += f"?{query}"
 
-    return proxy_request_to(target_url)
+    return admitted(target_tentacle, proxy_request_to, target_url)
 
 
 @app.route('/<path:path>', methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"])
@@ -272,9 +658,13 @@ def proxy_static_fallback(path):
         return f"Unknown path: /{path}", 404
 
     branch = match.group(1)
-    target_tentacle = tentacle.get_tenty_by_name(branch)
+    with profiling.phase("lookup"):
+        target_tentacle = tentacle.get_tenty_by_name(branch)
     if not target_tentacle:
-        return f"Tentacle for branch '{branch}' not found", 404
+        return tentacle_not_found(branch)
+
+    tentacle.SCHEDULER.touch(branch)
+    target_tentacle.touch()
 
     # Pass   request to the tentacle without `/tentacle/name`
     query = request.query_string.decode()
@@ -282,13 +672,17 @@ def proxy_static_fallback(path):
     if query:
         target_url += f"?{query}"
 
-    return proxy_request_to(target_url)
+    return admitted(target_tentacle, proxy_request_to, target_url)
 
 
 def graceful_shutdown(*_):
     print()
     output.log("Got shutdown signal", "warning")
-    tentacle.stop_tentacles()
+    if tentacle.CONFIG.get("detach_on_shutdown", False):
+        tentacle.detach_tentacles()
+    else:
+        tentacle.stop_tentacles()
+    output.flush()
     sys.exit(0)
 
 
@@ -308,8 +702,10 @@ if __name__ == '__main__':
             tentacle.init_globals(sys.argv[1])
         else:
             tentacle.init_globals("./config.json")
+        tentacle.SCHEDULER.on_change = broadcast_queue_update
 
-        threading.Thread(target=tentacle.init).start()
+        # GitHub, clones and builds come after the server is up, so the dashboard answers right away
+        threading.Thread(target=tentacle.init, name="startup", daemon=True).start()
 
         web_app_settings = tentacle.CONFIG.setdefault("web_app", {"port": 5000, "host": "0.0.0.0"})
         socketio.run(app, host=web_app_settings["host"], port=web_app_settings["port"], allow_unsafe_werkzeug=True)
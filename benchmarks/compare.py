@@ -0,0 +1,75 @@
+"""Compare two benchmark result files produced by `benchmarks.run`.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Exits with status 1 if any metric regressed by more than the threshold (%).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# metric suffix -> True if higher is better
+DIRECTIONS = {
+    "rps": True,
+    "bytes_per_s": True,
+    "lines_per_s": True,
+    "_ms": False,
+    "_s": False,
+}
+
+
+def higher_is_better(metric: str) -> Optional[bool]:
+    for suffix, direction in DIRECTIONS.items():
+        if metric.endswith(suffix):
+            return direction
+    return None
+
+
+def flatten(report: dict) -> Dict[str, float]:
+    result = {}
+    for scenario, values in report.get("scenarios", {}).items():
+        for key, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                result[f"{scenario}.{key}"] = float(value)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    candidate = json.loads(Path(args.candidate).read_text())
+    old, new = flatten(baseline), flatten(candidate)
+
+    print(f"baseline:  {baseline['meta'].get('commit')}")
+    print(f"candidate: {candidate['meta'].get('commit')}")
+    print(f"{'metric':45} {'baseline':>12} {'candidate':>12} {'change':>9}")
+
+    regressions = []
+    for metric in sorted(old.keys() & new.keys()):
+        before, after = old[metric], new[metric]
+        change = (after - before) / before * 100 if before else 0.0
+        direction = higher_is_better(metric.split(".", 1)[1])
+        flag = ""
+        if direction is not None:
+            worse = -change if direction else change
+            if worse > args.threshold:
+                flag = "  REGRESSION"
+                regressions.append(metric)
+        print(f"{metric:45} {before:12.3f} {after:12.3f} {change:+8.1f}%{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Local stand-ins for the remote side of TentaclePreview.
+
+`LocalRemote` is a bare git repository with N branches, and `FakeGitHub`
+serves the subset of the GitHub REST API used by PyGithub's
+`Github.get_repo`, `Repository.get_branches` and `Repository.get_branch`.
+Branch data is read from the bare repository on every request, so pushing
+to it is immediately visible through the fake API.
+"""
+import json
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import unquote, urlparse
+
+
+def _git(*args: str, cwd: Path) -> str:
+    result = subprocess.run(["git", *args], cwd=str(cwd), check=True, capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+class LocalRemote:
+    def __init__(self, root: Path, branches: int, prefix: str = "bench") -> None:
+        self.root = root
+        self.bare = root / "remote.git"
+        self.work = root / "remote-work"
+        self.prefix = prefix
+
+        self.bare.mkdir(parents=True)
+        _git("init", "--bare", "-q", "-b", "main", str(self.bare), cwd=root)
+
+        self.work.mkdir(parents=True)
+        _git("init", "-q", "-b", "main", cwd=self.work)
+        _git("config", "user.email", "bench@localhost", cwd=self.work)
+        _git("config", "user.name", "bench", cwd=self.work)
+        _git("remote", "add", "origin", str(self.bare), cwd=self.work)
+
+        self._write_marker("main-0")
+        _git("add", "-A", cwd=self.work)
+        _git("commit", "-q", "-m", "initial", cwd=self.work)
+
+        self.branch_names = [f"{prefix}-{i:03d}" for i in range(branches)]
+        for name in self.branch_names:
+            _git("branch", name, cwd=self.work)
+        _git("push", "-q", "origin", "--all", cwd=self.work)
+
+    @property
+    def clone_url(self) -> str:
+        return self.bare.resolve().as_uri()
+
+    def _write_marker(self, marker: str) -> None:
+        (self.work / "marker.txt").write_text(marker + "\n")
+
+    def commit_to_branch(self, branch: str, marker: str) -> str:
+        """Create (or advance) `branch` with a commit whose marker.txt is `marker`. Returns the new sha."""
+        existing = _git("branch", "--list", branch, cwd=self.work)
+        if existing:
+            _git("checkout", "-q", branch, cwd=self.work)
+        else:
+            _git("checkout", "-q", "-b", branch, "main", cwd=self.work)
+        self._write_marker(marker)
+        _git("commit", "-q", "-am", f"marker {marker}", cwd=self.work)
+        _git("push", "-q", "origin", branch, cwd=self.work)
+        return _git("rev-parse", "HEAD", cwd=self.work)
+
+    def heads(self) -> Dict[str, str]:
+        out = _git("for-each-ref", "--format=%(refname:short) %(objectname)", "refs/heads", cwd=self.bare)
+        result = {}
+        for line in out.splitlines():
+            name, sha = line.split(" ", 1)
+            result[name] = sha
+        return result
+
+
+class FakeGitHub:
+    def __init__(self, remote: LocalRemote, full_name: str = "bench/repo", host: str = "127.0.0.1") -> None:
+        self.remote = remote
+        self.full_name = full_name
+        self.requests_served = 0
+        self._server = ThreadingHTTPServer((host, 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _repo_json(self) -> dict:
+        owner, name = self.full_name.split("/", 1)
+        return {
+            "id": 1,
+            "name": name,
+            "full_name": self.full_name,
+            "owner": {"login": owner, "id": 1, "type": "User"},
+            "url": f"{self.url}/repos/{self.full_name}",
+            "clone_url": self.remote.clone_url,
+            "default_branch": "main",
+            "private": False,
+        }
+
+    def _branch_json(self, name: str, sha: str) -> dict:
+        return {
+            "name": name,
+            "commit": {"sha": sha, "url": f"{self.url}/repos/{self.full_name}/commits/{sha}"},
+            "protected": False,
+        }
+
+    def _make_handler(self):
+        fake = self
+        repo_path = f"/repos/{self.full_name}"
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fake.requests_served += 1
+                path = urlparse(self.path).path
+
+                if path == repo_path:
+                    return self._json(200, fake._repo_json())
+
+                if path == f"{repo_path}/branches":
+                    heads = fake.remote.heads()
+                    return self._json(200, [fake._branch_json(n, s) for n, s in sorted(heads.items())])
+
+                if path.startswith(f"{repo_path}/branches/"):
+                    name = unquote(path[len(f"{repo_path}/branches/"):])
+                    sha = fake.remote.heads().get(name)
+                    if sha is None:
+                        return self._json(404, {"message": "Branch not found"})
+                    return self._json(200, fake._branch_json(name, sha))
+
+                return self._json(404, {"message": "Not Found"})
+
+            def _json(self, status: int, payload) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):
+                pass
+
+        return Handler
@@ -0,0 +1,366 @@
+"""Self-contained TentaclePreview benchmark suite.
+
+Builds a local bare repository with N branches, serves a fake GitHub API for
+it, and runs the real `app.py` proxy against stub tentacles
+(`benchmarks/stub_tentacle.py`). No network access or GitHub token needed.
+
+Usage:
+    python -m benchmarks.run --branches 10 --output bench_output.json
+    python -m benchmarks.compare old.json new.json
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from benchmarks.fixtures import FakeGitHub, LocalRemote
+
+STUB = Path(__file__).with_name("stub_tentacle.py").resolve()
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def wait_until(predicate: Callable[[], bool], timeout: float, interval: float = 0.05) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if predicate():
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(interval)
+    return False
+
+
+def stub_command(log_lines: int = 0) -> str:
+    cmd = f'"{sys.executable}" "{STUB}" --host {{host}} --port {{port}}'
+    if log_lines:
+        cmd += f" --log-lines {log_lines}"
+    return cmd
+
+
+def write_config(workspace: Path, remote: LocalRemote, fake: FakeGitHub) -> Path:
+    config = {
+        "repo_full_name": fake.full_name,
+        "github_token": "bench-token",
+        "github_api_url": fake.url,
+        "filter_mode": "include",
+        "filter_branches": remote.branch_names,
+        "branches_dir": str(workspace / "branches"),
+        "state_file": str(workspace / "tentacle_state.json"),
+        "logs_dir": str(workspace / "tentacle_logs"),
+        "log_search": {"dir": str(workspace / "log_store")},
+        "commands": {
+            "start": stub_command(),
+            "build": [f'"{sys.executable}" -c "pass"'],
+        },
+        "host_routing": {"enabled": True, "domain": "preview.localhost"},
+        "webhook_update": True,
+        "auto_add_webhook": False,
+        "clear_redundant_local_branches": True,
+        "enabled_log_levels": ["info", "success", "warning", "error", "header"],
+        "web_app": {"host": "127.0.0.1", "port": 0},
+    }
+    path = workspace / "config.json"
+    path.write_text(json.dumps(config, indent=2))
+    return path
+
+
+def run_load(url: str, total: int, concurrency: int, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    local = threading.local()
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    received = 0
+
+    def one(_):
+        nonlocal errors, received
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        t0 = time.perf_counter()
+        try:
+            resp = session.get(url, headers=headers, timeout=30)
+            ok = resp.status_code == 200
+            size = len(resp.content)
+        except requests.RequestException:
+            ok, size = False, 0
+        elapsed = time.perf_counter() - t0
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+                received += size
+            else:
+                errors += 1
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - t0
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "wall_s": wall,
+        "rps": len(latencies) / wall if wall else 0.0,
+        "bytes_per_s": received / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+class Bench:
+    def __init__(self, args: argparse.Namespace, workspace: Path) -> None:
+        self.args = args
+        self.workspace = workspace
+        self.results: Dict[str, Any] = {}
+
+        self.remote = LocalRemote(workspace, args.branches)
+        self.fake = FakeGitHub(self.remote)
+        self.fake.start()
+        self.config_path = write_config(workspace, self.remote, self.fake)
+
+        # Imported lazily: app.py registers signal handlers and module state on import
+        import app as app_module
+        from TentaclePreview import output
+        from TentaclePreview import tentacle_preview as tentacle
+        from TentaclePreview.tentacle import Tentacle
+
+        self.app_module = app_module
+        self.tentacle = tentacle
+        self.Tentacle = Tentacle
+
+        if not args.verbose:
+            output.on_log_event.remove(output.default_log)
+            logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        output.on_log_event.append(app_module.broadcast_new_system_log)
+        Tentacle.set_broadcast_callbacks(app_module.broadcast_logs_update, app_module.broadcast_status_update)
+
+        self.server = None
+        self.base_url = ""
+
+    def start_proxy(self) -> None:
+        from werkzeug.serving import make_server
+
+        self.server = make_server("127.0.0.1", 0, self.app_module.app, threaded=True)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tentacle_ready(self, name: str, marker: Optional[str] = None) -> bool:
+        tenty = self.tentacle.get_tenty_by_name(name)
+        if tenty is None or not tenty.is_start_success:
+            return False
+        resp = requests.get(f"http://{tenty.url}/", timeout=2)
+        return resp.status_code == 200 and (marker is None or marker in resp.text)
+
+    def cold_start(self) -> None:
+        t0 = time.perf_counter()
+        self.tentacle.init_globals(str(self.config_path))
+        self.tentacle.SCHEDULER.on_change = self.app_module.broadcast_queue_update
+        t_globals = time.perf_counter()
+        self.tentacle.init()
+        t_init = time.perf_counter()
+
+        names = list(self.remote.branch_names)
+        ready = wait_until(lambda: all(self.tentacle_ready(n) for n in names), timeout=self.args.timeout)
+        t_ready = time.perf_counter()
+
+        self.results["cold_start"] = {
+            "branches": len(names),
+            "ready": ready,
+            "init_globals_s": t_globals - t0,
+            "init_s": t_init - t_globals,
+            "ready_wait_s": t_ready - t_init,
+            "total_s": t_ready - t0,
+            "per_branch_s": (t_ready - t0) / max(len(names), 1),
+            "github_api_requests": self.fake.requests_served,
+        }
+
+    def proxy(self) -> None:
+        branch = self.remote.branch_names[0]
+        prefix = f"{self.base_url}/tentacle/{branch}"
+        total, concurrency = self.args.requests, self.args.concurrency
+
+        # warm up connections and the upstream
+        run_load(f"{prefix}/", min(total, 20), concurrency)
+
+        self.results["proxy_html"] = run_load(f"{prefix}/", total, concurrency)
+        self.results["proxy_static"] = run_load(f"{prefix}/static/app.js", total, concurrency)
+        self.results["proxy_static_referer"] = run_load(
+            f"{self.base_url}/static/app.js", total, concurrency, headers={"Referer": f"{prefix}/"}
+        )
+
+        host = {"Host": f"{self.tentacle.host_label(branch)}.preview.localhost"}
+        self.results["proxy_host_html"] = run_load(f"{self.base_url}/", total, concurrency, headers=host)
+        self.results["proxy_host_static"] = run_load(f"{self.base_url}/static/app.js", total, concurrency, headers=host)
+
+        tenty = self.tentacle.get_tenty_by_name(branch)
+        self.results["direct_html"] = run_load(f"http://{tenty.url}/", total, concurrency)
+
+    def _webhook(self, branch: str, sha: str) -> None:
+        payload = {
+            "ref": f"refs/heads/{branch}",
+            "after": sha,
+            "repository": {"full_name": self.fake.full_name},
+            "sender": {"login": "bench"},
+        }
+        resp = requests.post(f"{self.base_url}/webhook", json=payload, timeout=10)
+        resp.raise_for_status()
+
+    def webhook(self) -> None:
+        page_has = lambda url, marker: marker in requests.get(url, timeout=2).text
+
+        # new branch: clone + build + start
+        name = f"{self.remote.prefix}-new"
+        marker = f"{name}-1"
+        sha = self.remote.commit_to_branch(name, marker)
+        t0 = time.perf_counter()
+        self._webhook(name, sha)
+        created = wait_until(lambda: page_has(f"{self.base_url}/tentacle/{name}/", marker), self.args.timeout)
+        t_create = time.perf_counter() - t0
+
+        # existing branch: fetch + rebuild + restart
+        name = self.remote.branch_names[-1]
+        marker = f"{name}-2"
+        sha = self.remote.commit_to_branch(name, marker)
+        t0 = time.perf_counter()
+        self._webhook(name, sha)
+        updated = wait_until(lambda: page_has(f"{self.base_url}/tentacle/{name}/", marker), self.args.timeout)
+        t_update = time.perf_counter() - t0
+
+        self.results["webhook_to_live"] = {
+            "create_ok": created,
+            "create_s": t_create,
+            "update_ok": updated,
+            "update_s": t_update,
+        }
+
+    def log_streaming(self) -> None:
+        lines = self.args.log_lines
+        name = f"{self.remote.prefix}-logs"
+        self.remote.commit_to_branch(name, name)
+
+        commands = dict(self.tentacle.CONFIG["commands"])
+        commands["start"] = stub_command(log_lines=lines)
+        tenty = self.Tentacle(remote_repo=self.tentacle.REPO, remote_branch=name,
+                              branches_dir=Path(self.tentacle.CONFIG["branches_dir"]), commands=commands)
+        tenty.build()
+
+        t0 = time.perf_counter()
+        tenty.start()
+        # +1 for the "listening" line printed after the burst
+        done = wait_until(lambda: len(tenty.start_output) >= lines + 1, self.args.timeout, interval=0.01)
+        elapsed = time.perf_counter() - t0
+        received = len(tenty.start_output)
+
+        tenty.stop()
+        tenty.clear_files()
+
+        self.results["log_streaming"] = {
+            "lines": lines,
+            "received": received,
+            "complete": done,
+            "elapsed_s": elapsed,
+            "lines_per_s": received / elapsed if elapsed else 0.0,
+        }
+
+    def close(self) -> None:
+        try:
+            self.tentacle.stop_tentacles()
+        finally:
+            if self.server is not None:
+                self.server.shutdown()
+            self.fake.stop()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+SCENARIOS = ["cold_start", "proxy", "webhook", "log_streaming"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--branches", type=int, default=5, help="number of branches in the local remote")
+    parser.add_argument("--requests", type=int, default=500, help="requests per proxy scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel clients in proxy scenarios")
+    parser.add_argument("--log-lines", type=int, default=20000, help="lines printed by the log streaming stub")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for a tentacle to go live")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="run only these scenarios (cold_start always runs)")
+    parser.add_argument("--output", default="bench_output.json", help="where to write the JSON results")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary workspace")
+    parser.add_argument("--verbose", action="store_true", help="print TentaclePreview logs to the console")
+    args = parser.parse_args(argv)
+
+    selected = set(args.scenario or SCENARIOS) | {"cold_start"}
+
+    workspace = Path(tempfile.mkdtemp(prefix="tentacle-bench-"))
+    bench = Bench(args, workspace)
+    started = datetime.now(timezone.utc)
+    try:
+        bench.cold_start()
+        bench.start_proxy()
+        if "proxy" in selected:
+            bench.proxy()
+        if "webhook" in selected:
+            bench.webhook()
+        if "log_streaming" in selected:
+            bench.log_streaming()
+    finally:
+        bench.close()
+        if not args.keep:
+            from TentaclePreview.filesystem_utils import safe_rmtree
+            safe_rmtree(str(workspace))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": started.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "keep", "verbose")},
+            "workspace": str(workspace) if args.keep else None,
+        },
+        "scenarios": bench.results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+
+    for name, values in bench.results.items():
+        summary = ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in values.items())
+        print(f"{name}: {summary}")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
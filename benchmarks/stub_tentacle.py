@@ -0,0 +1,89 @@
+"""Tiny HTTP server used as a tentacle `start` command in benchmarks.
+
+Serves an HTML page with root-relative links (so the proxy has to rewrite it)
+and a couple of static assets. The page embeds the content of `marker.txt`
+from the working directory, which lets the benchmark detect that a tentacle
+was rebuilt from a new commit.
+"""
+import argparse
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+HTML_REPEAT = 200
+ASSET_SIZE = 50 * 1024
+
+
+def build_html(marker: str) -> bytes:
+    rows = "\n".join(
+        f'<li><a href="/items/{i}">item {i}</a> <img src="/static/icon.png"></li>'
+        for i in range(HTML_REPEAT)
+    )
+    page = f"""<!DOCTYPE html>
+<html>
+<head>
+<link rel="stylesheet" href="/static/style.css">
+<script src="/static/app.js"></script>
+</head>
+<body style="background: url('/static/bg.png')">
+<h1 id="marker">{marker}</h1>
+<ul>
+{rows}
+</ul>
+</body>
+</html>
+"""
+    return page.encode("utf-8")
+
+
+def make_handler(html: bytes, asset: bytes):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/":
+                self._send(200, "text/html; charset=utf-8", html)
+            elif path == "/static/app.js":
+                self._send(200, "application/javascript", asset)
+            elif path == "/static/style.css":
+                self._send(200, "text/css", b"body { margin: 0; }\n")
+            else:
+                self._send(404, "text/plain", b"not found")
+
+        def _send(self, status: int, content_type: str, body: bytes) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--log-lines", type=int, default=0,
+                        help="print this many lines to stdout before serving")
+    args = parser.parse_args()
+
+    marker_file = Path("marker.txt")
+    marker = marker_file.read_text().strip() if marker_file.exists() else "no-marker"
+
+    for i in range(args.log_lines):
+        sys.stdout.write(f"stub log line {i} lorem ipsum dolor sit amet consectetur\n")
+    sys.stdout.write(f"stub tentacle listening on {args.host}:{args.port}\n")
+    sys.stdout.flush()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(build_html(marker), b"x" * ASSET_SIZE))
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,14 @@ let restartTentacleModal = null;
 let currentTentacle = null;
 let socket = null;
 let wsConnected = false;
+let buildQueue = {};
+let statusVersion = null; // версия последнего применённого снимка статусов
+let statusEpoch = null;
+let startLogView = null;   // VirtualLog открытого тентакля
+let systemLogView = null;
+let buildLogViews = [];
+let buildLogEntries = [];  // command, step and status of each build tab
+const LOG_PAGE_SIZE = 500;
 const FALLBACK_POLL_INTERVAL_MS = 60_000; // резервный пул — 60s
 const ALLOWED_LOG_TYPES = ["info", "success", "warning", "error", "header"];
 const LOG_TYPES_PREFIXES = {
@@ -22,6 +30,11 @@ document.addEventListener("DOMContentLoaded", () => {
     restartTentacleModal = new bootstrap.Modal(document.getElementById("restartModal"));
 
     registerButtonListeners();
+    systemLogView = new VirtualLog(document.getElementById("tentaclePreview-logs-container"), {
+        pageSize: LOG_PAGE_SIZE,
+        loadRange: apiGetSystemLogsPage,
+        renderLine: (log) => getNewLineHtml(log.message, log.log_type, log.time),
+    });
 
     refreshData();
     initWebSocket();
@@ -68,11 +81,8 @@ function refreshLogsButtonOnClick() {
 }
 
 function tentacleLogsToTopButtonOnClick() {
-    scrollToTop('startLogsContainer');
-    const items = document.getElementsByClassName('build-command-content');
-    for (let i = 0; i < items.length; i++) {
-      items[i].scrollTop = 0;
-    }
+    if (startLogView) startLogView.scrollToTop();
+    buildLogViews.forEach(view => view.scrollToTop());
 }
 
 function restartTentacleButtonOnClick(tentacleName, isClean = false) {
@@ -94,25 +104,36 @@ function systemLogsRefreshButtonOnClick() {
 }
 
 function systemLogsToTopButtonOnClick() {
-    scrollToTop('tentaclePreview-logs-container');
+    systemLogView.scrollToTop();
 }
 
 /* HTTP helpers */
 
-async function apiGetSystemLogs() {
-    const resp = await fetch("/api/tentacles/system-logs");
+// offset === null: the last `limit` lines
+function pageQuery(offset, limit) {
+    return offset === null ? `limit=${limit}` : `offset=${offset}&limit=${limit}`;
+}
+
+async function apiGetSystemLogsPage(offset, limit) {
+    const resp = await fetch(`/api/tentacles/system-logs?${pageQuery(offset, limit)}`);
     if (!resp.ok) {
         showNotification(`HTTP Cannot fetch system logs: ${resp.status}`, "danger")
         throw new Error(`HTTP Cannot fetch system logs: ${resp.status}`);
     }
-    return await resp.json();
+    const json = await resp.json();
+    return {lines: json.logs, offset: json.offset, total: json.total};
+}
+
+async function apiGetHealth() {
+    const resp = await fetch("/api/health", {cache: "no-cache"});
+    return await resp.json(); // 503 when the startup failed, with the error in the body
 }
 
 async function apiGetTentacles() {
-    const resp = await fetch("/api/tentacles");
+    // no-cache + ETag: an unchanged list costs a 304 without a body
+    const resp = await fetch("/api/tentacles", {cache: "no-cache"});
     if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
-    const json = await resp.json();
-    return json.tentacles || [];
+    return await resp.json();
 }
 
 async function apiGetLogs(tentacleName, logType) {
@@ -122,6 +143,13 @@ async function apiGetLogs(tentacleName, logType) {
     return json.logs;
 }
 
+async function apiGetLogsPage(tentacleName, logType, offset, limit) {
+    const resp = await fetch(`/api/tentacles/${encodeURIComponent(tentacleName)}/logs/${encodeURIComponent(logType)}?${pageQuery(offset, limit)}`);
+    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+    const json = await resp.json();
+    return {lines: json.logs, offset: json.offset, total: json.total};
+}
+
 async function apiRestartTentacle(tentacleName, isClean) {
     const resp = await fetch(`/api/tentacles/${encodeURIComponent(tentacleName)}/restart/${isClean}`);
     if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
@@ -141,8 +169,13 @@ async function refreshData() {
     }
 
     try {
-        const tentacles = await apiGetTentacles();
-        renderTentacleTable(tentacles);
+        apiGetHealth().then(renderStartup).catch(err => console.warn("health error:", err));
+        const data = await apiGetTentacles();
+        if (data.epoch !== statusEpoch || statusVersion === null || data.version >= statusVersion) {
+            statusEpoch = data.epoch;
+            statusVersion = data.version;
+            renderTentacleTable(data.tentacles || []);
+        }
     } catch (err) {
         console.error("refreshData error:", err);
         showNotification("Error refreshing tentacles: " + err.message, "danger");
@@ -159,47 +192,79 @@ function renderTentacleTable(tentacles) {
     tbody.innerHTML = "";
 
     for (const t of tentacles) {
-        const tr = document.createElement("tr");
-        tr.dataset.tentacle = t.name;
+        tbody.appendChild(renderTentacleRow(t));
+    }
+}
 
-        tr.innerHTML = `
+function renderTentacleRow(t) {
+    const tr = document.createElement("tr");
+    tr.dataset.tentacle = t.name;
+    tr.dataset.buildStatus = String(t.is_build_success);
+    if (t.initialising) tr.dataset.initialising = "";
+    if (t.queue) buildQueue[t.name] = t.queue;
+    else delete buildQueue[t.name];
+
+    tr.innerHTML = `
       <td class="tr-left">
-        <a href="/tentacle/${encodeURIComponent(t.name)}/" class="text-decoration-none fw-bold">
+        <a href="${escapeHtml(t.preview_url || `/tentacle/${encodeURIComponent(t.name)}/`)}" class="text-decoration-none fw-bold">
           <i class="bi bi-box-arrow-up-right"></i> ${escapeHtml(t.name)}
         </a>
       </td>
       <td>
-        <a href="http://${escapeHtml(t.url)}" target="_blank" class="text-muted text-decoration-none">
+        ${t.url ? `<a href="http://${escapeHtml(t.url)}" target="_blank" class="text-muted text-decoration-none">
           <i class="bi bi-globe"></i> ${escapeHtml(t.url)}
-        </a>
+        </a>` : `<span class="text-muted">${"agent" in t ? "waiting for an agent" : ""}</span>`}
+        ${t.agent ? `<span class="badge bg-secondary ms-1" title="Cluster agent"><i class="bi bi-hdd-network"></i> ${escapeHtml(t.agent)}</span>` : ""}
       </td>
-      <td>${renderStatusBadge(t.is_build_success)}</td>
+      <td>${renderBuildCell(t.name, t.is_build_success, t.initialising)}</td>
       <td>${renderStatusBadge(t.is_start_success)}</td>
       <td>
-        <button class="btn btn-sm btn-outline-primary logs-btn" data-tentacle="${escapeHtml(t.name)}">
+        <button class="btn btn-sm btn-outline-primary logs-btn" data-tentacle="${escapeHtml(t.name)}" ${t.initialising ? "disabled" : ""}>
           <i class="bi bi-file-text"></i> Logs
         </button>
-        <button class="btn btn-sm btn-outline-primary restart-btn" data-tentacle="${escapeHtml(t.name)}">
+        <button class="btn btn-sm btn-outline-primary restart-btn" data-tentacle="${escapeHtml(t.name)}" ${t.initialising ? "disabled" : ""}>
           <i class="bi bi-arrow-repeat"></i> Restart
         </button>
       </td>
       <td class="tr-left">${escapeHtml(t.last_commit || "")}</td>
     `;
 
-        tbody.appendChild(tr);
+    tr.querySelector(".logs-btn").addEventListener("click", () => viewLogs(t.name));
+    tr.querySelector(".restart-btn").addEventListener("click", () => showRestartModal(t.name));
+    return tr;
+}
+
+function findTentacleRow(tentacleName) {
+    return document.querySelector(`tr[data-tentacle="${CSS.escape(tentacleName)}"]`);
+}
+
+function applyStatusDelta(delta) {
+    if (delta.full) {
+        statusEpoch = delta.epoch;
+        statusVersion = delta.version;
+        renderTentacleTable(delta.changed);
+        return;
     }
 
-    tbody.querySelectorAll(".logs-btn").forEach(btn => {
-        btn.addEventListener("click", () => {
-            viewLogs(btn.dataset.tentacle);
-        });
-    });
+    if (delta.epoch !== statusEpoch || statusVersion === null || delta.base_version > statusVersion) {
+        // пропустили изменения — запрашиваем всё, что изменилось с нашей версии
+        socket.emit("request_status", {since: statusVersion, epoch: statusEpoch});
+        return;
+    }
+    if (delta.version <= statusVersion) return; // уже применено
 
-    tbody.querySelectorAll(".restart-btn").forEach(btn => {
-        btn.addEventListener("click", () => {
-            showRestartModal(btn.dataset.tentacle);
-        });
-    });
+    const tbody = document.getElementById("tentacles-tbody");
+    for (const name of delta.removed) {
+        delete buildQueue[name];
+        findTentacleRow(name)?.remove();
+    }
+    for (const t of delta.changed) {
+        const row = renderTentacleRow(t);
+        const existing = findTentacleRow(t.name);
+        if (existing) existing.replaceWith(row);
+        else tbody.appendChild(row);
+    }
+    statusVersion = delta.version;
 }
 
 function renderStatusBadge(status) {
@@ -208,20 +273,65 @@ function renderStatusBadge(status) {
     return `<span class="badge status-badge" data-status="warning"><i class="bi bi-clock"></i> WAIT</span>`;
 }
 
-function updateTentacleStatus(tentacleName, buildStatus, startStatus) {
-    const row = document.querySelector(`tr[data-tentacle="${CSS.escape(tentacleName)}"]`);
-    if (!row) return;
-    row.children[2].innerHTML = renderStatusBadge(buildStatus);
-    row.children[3].innerHTML = renderStatusBadge(startStatus);
+function renderQueueBadge(queue) {
+    if (queue.state === "building") {
+        return `<span class="badge status-badge" data-status="info"><i class="bi bi-hammer"></i> BUILDING</span>`;
+    }
+    const title = escapeHtml(`Queued (${queue.reason})`);
+    return `<span class="badge status-badge" data-status="info" title="${title}">
+      <i class="bi bi-hourglass-split"></i> QUEUED #${queue.position} · ~${formatDuration(queue.estimated_wait)}
+    </span>`;
+}
+
+function renderBuildCell(tentacleName, buildStatus, initialising = false) {
+    const queue = buildQueue[tentacleName];
+    if (queue) return renderQueueBadge(queue);
+    if (initialising) {
+        return `<span class="badge status-badge" data-status="info" title="Loading the repository of this branch">
+          <i class="bi bi-arrow-clockwise spin"></i> INITIALISING
+        </span>`;
+    }
+    return renderStatusBadge(buildStatus);
 }
 
-/* Logs UI */
+function updateBuildQueue(queue) {
+    buildQueue = queue || {};
+    document.querySelectorAll("#tentacles-tbody tr[data-tentacle]").forEach(row => {
+        const status = row.dataset.buildStatus === "true" ? true : row.dataset.buildStatus === "false" ? false : null;
+        row.children[2].innerHTML = renderBuildCell(row.dataset.tentacle, status, "initialising" in row.dataset);
+    });
+}
+
+/* Startup progress */
+
+const STARTUP_PHASES = {
+    starting: "Starting",
+    connecting: "Connecting to GitHub",
+    discovering: "Listing branches",
+    preparing: "Preparing tentacles",
+    failed: "Startup problem",
+};
 
-function scrollToTop(divId) {
-    const logsDiv = document.getElementById(divId);
-    logsDiv.scrollTop = 0;
+function renderStartup(progress) {
+    const banner = document.getElementById("startup-banner");
+    if (!banner || !progress) return;
+    if (progress.ready) {
+        banner.classList.add("d-none");
+        return;
+    }
+
+    const failed = progress.phase === "failed";
+    banner.className = `alert ${failed ? "alert-danger" : "alert-info"} py-2 mt-2 mb-0`;
+    const detail = [progress.detail, progress.error].filter(Boolean).join(": ");
+    banner.innerHTML = `
+      ${failed ? '<i class="bi bi-exclamation-triangle"></i>' : '<i class="bi bi-arrow-clockwise spin"></i>'}
+      <strong>${escapeHtml(STARTUP_PHASES[progress.phase] || progress.phase)}</strong>
+      ${detail ? `— ${escapeHtml(detail)}` : ""}
+    `;
 }
 
+/* Logs UI */
+
 function viewLogs(tentacleName) {
     currentTentacle = tentacleName;
     const currentSpan = document.getElementById("current-tentacle");
@@ -251,11 +361,12 @@ function viewLogs(tentacleName) {
   `;
     document.getElementById("buildCommandTabContent").innerHTML = "";
 
-    document.getElementById("start-logs-content").innerHTML = `
-    <div class="text-center py-3">
-      <div class="spinner-border text-primary" role="status"><span class="visually-hidden">Loading...</span></div>
-    </div>
-  `;
+    if (startLogView) startLogView.destroy();
+    startLogView = new VirtualLog(document.getElementById("startLogsContainer"), {
+        pageSize: LOG_PAGE_SIZE,
+        loadRange: (offset, limit) => apiGetLogsPage(tentacleName, "start", offset, limit),
+        emptyText: "No start logs available",
+    });
 
     tentacleLogsModal.show();
 
@@ -263,48 +374,33 @@ function viewLogs(tentacleName) {
     loadLogs(tentacleName, "build");
     loadLogs(tentacleName, "start");
 
-    // Request real-time logs via WS if connected
+    // Request real-time logs via WS if connected (start logs are paged over HTTP and streamed)
     if (socket && wsConnected) {
-        socket.emit("request_logs", {tentacle: tentacleName, log_type: "start"});
         socket.emit("request_logs", {tentacle: tentacleName, log_type: "build"});
     }
 }
 
 async function loadLogs(tentacleName, logType) {
     try {
+        if (logType === "start") {
+            // only the tail; older lines are fetched when scrolled to
+            const page = await apiGetLogsPage(tentacleName, "start", null, LOG_PAGE_SIZE);
+            if (tentacleName === currentTentacle) startLogView.reset(page.total, page.lines, page.offset);
+            return;
+        }
         const logs = await apiGetLogs(tentacleName, logType);
         updateLogsContent(logType, logs);
     } catch (err) {
         console.error(`Error loading ${logType} logs:`, err);
-        const id = logType === "build" ? "buildCommandTabContent" : `${logType}-logs-content`;
+        const id = logType === "build" ? "buildCommandTabContent" : "startLogsContainer";
         const el = document.getElementById(id);
-        if (el) el.innerHTML = `<div class="alert alert-danger">Ошибка: ${escapeHtml(err.message)}</div>`;
+        if (el) el.insertAdjacentHTML("afterbegin", `<div class="alert alert-danger">Ошибка: ${escapeHtml(err.message)}</div>`);
     }
 }
 
 async function reloadSystemLogs() {
-    clearSystemLogs();
-
-    let json = await apiGetSystemLogs();
-    json.logs.forEach(function (log, i, _) {
-        addSystemLogLine(log.message, log.log_type, log.time);
-    });
-}
-
-function clearSystemLogs() {
-    const containerElement = document.getElementById("tentaclePreview-logs-container");
-
-    containerElement.innerHTML = "";
-}
-
-function addSystemLogLine(message, logType, time) {
-    const containerElement = document.getElementById("tentaclePreview-logs-container");
-    if (!message) {
-        return;
-    }
-
-    containerElement.appendChild(getNewLineHtml(message, logType, time));
-    containerElement.scrollTop = containerElement.scrollHeight;
+    const page = await apiGetSystemLogsPage(null, LOG_PAGE_SIZE);
+    systemLogView.reset(page.total, page.lines, page.offset);
 }
 
 function getNewLineHtml(message, logType, time) {
@@ -349,6 +445,9 @@ function updateLogsContent(logType, logs) {
 function updateBuildLogs(logs) {
     const tabsContainer = document.getElementById("buildCommandTabs")
     const contentContainer = document.getElementById("buildCommandTabContent")
+    buildLogViews.forEach(view => view.destroy())
+    buildLogViews = []
+    buildLogEntries = []
 
     if (!logs || !Array.isArray(logs) || logs.length === 0) {
         tabsContainer.innerHTML = `
@@ -372,93 +471,112 @@ function updateBuildLogs(logs) {
     contentContainer.innerHTML = ""
 
     logs.forEach((cmd, idx) => {
-        const commandName = cmd.command || `cmd-${idx}`
-        const output = cmd.output || "(No output)"
-        const tabId = `build-command-${idx}`
         // Preserve active state or default to first tab, but prefer the last tab for new builds
         const isActive =
             logs.length > currentActiveIndex + 1
                 ? idx === logs.length - 1
                 : // If new commands added, show the latest
                 idx === Math.min(currentActiveIndex, logs.length - 1) // Otherwise preserve selection
-
-        const li = document.createElement("li")
-        li.className = "nav-item"
-        li.setAttribute("role", "presentation")
-
-        const btn = document.createElement("button")
-        btn.className = `nav-link ${isActive ? "active" : ""}`
-        btn.id = `${tabId}-tab`
-        btn.type = "button"
-        btn.setAttribute("data-bs-toggle", "tab")
-        btn.setAttribute("data-bs-target", `#${tabId}`)
-        btn.setAttribute("role", "tab")
-        btn.setAttribute("aria-controls", tabId)
-        btn.setAttribute("aria-selected", isActive.toString())
-        btn.title = commandName
-        btn.textContent = commandName
-
-        li.appendChild(btn)
-        tabsContainer.appendChild(li)
-
-        const pane = document.createElement("div")
-        pane.className = `tab-pane fade ${isActive ? "show active" : ""}`
-        pane.id = tabId
-        pane.setAttribute("role", "tabpanel")
-        pane.setAttribute("aria-labelledby", `${tabId}-tab`)
-
-        const contentDiv = document.createElement("div")
-        contentDiv.className = "build-command-content"
-
-        const pre = document.createElement("pre")
-        pre.textContent = output
-
-        contentDiv.appendChild(pre)
-        pane.appendChild(contentDiv)
-        contentContainer.appendChild(pane)
-    })
-
-    // Reinitialize bootstrap tabs after rebuilding
-    const bootstrap = window.bootstrap // Declare the bootstrap variable
-    Array.from(tabsContainer.querySelectorAll('button[data-bs-toggle="tab"]')).forEach((btn) => {
-        // Remove any existing tab instances
-        const existingTab = bootstrap.Tab.getInstance(btn)
-        if (existingTab) {
-            existingTab.dispose()
-        }
-        // Create new tab instance
-        new bootstrap.Tab(btn)
+        addBuildTab(cmd, isActive)
     })
 
     console.log("Build tabs updated, total commands:", logs.length)
 }
 
-function updateStartLogs(logs) {
-    const contentElement = document.getElementById("start-logs-content");
-    if (!logs || !Array.isArray(logs) || logs.length === 0) {
-        contentElement.textContent = "No start logs available";
-        return;
-    }
-
-    contentElement.textContent = logs.join("\n");
-
-    const container = contentElement.parentElement;
-    if (container) container.scrollTop = container.scrollHeight;
+function buildTabLabel(cmd, idx) {
+    const commandName = cmd.command || `cmd-${idx}`
+    const status = cmd.status || (cmd.skipped ? "skipped" : null)
+    return status && status !== "success" ? `${commandName} (${status})` : commandName
 }
 
-function appendStartLogLine(line) {
-    const contentElement = document.getElementById("start-logs-content");
-    if (!contentElement) return;
-
-    // Если внутри есть spinner — очистить и перейти к тексту
-    if (contentElement.querySelector && contentElement.querySelector(".spinner-border")) {
-        contentElement.textContent = "";
+// Appends the tab of one build step; streamed steps come one at a time, so the others keep their views
+function addBuildTab(cmd, isActive) {
+    const tabsContainer = document.getElementById("buildCommandTabs")
+    const contentContainer = document.getElementById("buildCommandTabContent")
+    const idx = buildLogViews.length
+    if (idx === 0) {
+        // "No build commands" placeholder
+        tabsContainer.innerHTML = ""
+        contentContainer.innerHTML = ""
+    }
+    if (isActive) {
+        tabsContainer.querySelectorAll(".nav-link.active").forEach(btn => {
+            btn.classList.remove("active")
+            btn.setAttribute("aria-selected", "false")
+        })
+        contentContainer.querySelectorAll(".tab-pane.active").forEach(pane => pane.classList.remove("show", "active"))
     }
 
-    contentElement.textContent += (contentElement.textContent ? "\n" : "") + line;
+    const commandName = cmd.command || `cmd-${idx}`
+    const output = cmd.output || (cmd.status === "running" ? "" : "(No output)")
+    const tabId = `build-command-${idx}`
+
+    const li = document.createElement("li")
+    li.className = "nav-item"
+    li.setAttribute("role", "presentation")
+
+    const btn = document.createElement("button")
+    btn.className = `nav-link ${isActive ? "active" : ""}`
+    btn.id = `${tabId}-tab`
+    btn.type = "button"
+    btn.setAttribute("data-bs-toggle", "tab")
+    btn.setAttribute("data-bs-target", `#${tabId}`)
+    btn.setAttribute("role", "tab")
+    btn.setAttribute("aria-controls", tabId)
+    btn.setAttribute("aria-selected", isActive.toString())
+    btn.title = cmd.step ? `${cmd.step}: ${commandName}` : commandName
+    btn.textContent = buildTabLabel(cmd, idx)
+
+    li.appendChild(btn)
+    tabsContainer.appendChild(li)
+
+    const pane = document.createElement("div")
+    pane.className = `tab-pane fade ${isActive ? "show active" : ""}`
+    pane.id = tabId
+    pane.setAttribute("role", "tabpanel")
+    pane.setAttribute("aria-labelledby", `${tabId}-tab`)
+
+    const contentDiv = document.createElement("div")
+    contentDiv.className = "build-command-content"
+
+    pane.appendChild(contentDiv)
+    contentContainer.appendChild(pane)
+
+    const view = new VirtualLog(contentDiv)
+    view.setLines(output ? output.split("\n") : [])
+    buildLogViews.push(view)
+    buildLogEntries.push({command: cmd.command, step: cmd.step, status: cmd.status, skipped: cmd.skipped})
+
+    new window.bootstrap.Tab(btn)
+}
+
+// A streamed change of the build log: a new entry, a new status or new lines of a running step
+function applyBuildChange(change) {
+    const index = change.index
+    if (change.entry) {
+        if (index === buildLogViews.length) {
+            addBuildTab(change.entry, true)
+        } else if (index > buildLogViews.length && socket && wsConnected) {
+            // missed an entry: get the whole log again
+            socket.emit("request_logs", {tentacle: currentTentacle, log_type: "build"})
+        }
+        return
+    }
+    const view = buildLogViews[index]
+    if (!view) return
+    if (change.status) {
+        const cmd = buildLogEntries[index]
+        cmd.status = change.status
+        const btn = document.getElementById(`build-command-${index}-tab`)
+        if (btn) btn.textContent = buildTabLabel(cmd, index)
+    }
+    if (Array.isArray(change.lines)) view.append(change.lines, change.offset ?? null)
+}
 
-    const container = contentElement.parentElement;
-    if (container) container.scrollTop = container.scrollHeight;
+function updateStartLogs(logs) {
+    if (!startLogView) return;
+    logs = Array.isArray(logs) ? logs : [];
+    startLogView.reset(logs.length, logs, 0);
 }
 
 function showRestartModal(tentacleName) {
@@ -508,8 +626,7 @@ function initWebSocket(forceReconnect = false) {
     socket.on("connect", () => {
         wsConnected = true;
         console.info("WS connected");
-        socket.emit("request_status");
-        refreshData();
+        socket.emit("request_status", {since: statusVersion, epoch: statusEpoch});
         toggleConnectionStatusBadge(true);
     });
 
@@ -519,14 +636,16 @@ function initWebSocket(forceReconnect = false) {
         toggleConnectionStatusBadge(false);
     });
 
-    socket.on("status_update", (data) => {
+    socket.on("status_delta", (delta) => {
+        if (!delta) return;
+        applyStatusDelta(delta);
+    });
+
+    socket.on("startup_update", renderStartup);
+
+    socket.on("queue_update", (data) => {
         if (!data) return;
-        if (Array.isArray(data.tentacles)) {
-            renderTentacleTable(data.tentacles);
-        } else if (data.tentacle) {
-            updateTentacleStatus(data.tentacle, data.build_status, data.start_status);
-        }
-        refreshData();
+        updateBuildQueue(data.queue);
     });
 
     socket.on("logs_update", (data) => {
@@ -536,8 +655,16 @@ function initWebSocket(forceReconnect = false) {
         const payload = data.logs;
 
         if (data.stream === true) {
-            if (logType === "start" && payload && payload.output) {
-                appendStartLogLine(payload.output);
+            if (logType === "build" && payload && payload.index !== undefined) {
+                applyBuildChange(payload);
+                return;
+            }
+            if (logType === "start" && payload && startLogView) {
+                if (Array.isArray(payload.lines)) {
+                    startLogView.append(payload.lines, payload.offset ?? null);
+                } else if (payload.output) {
+                    startLogView.append([payload.output]);
+                }
             }
             return;
         }
@@ -555,8 +682,9 @@ function initWebSocket(forceReconnect = false) {
         toggleConnectionStatusBadge(false);
     });
 
-    socket.on("system_logs_update", (log_entry) => {
-        addSystemLogLine(log_entry.message, log_entry.log_type, log_entry.time)
+    socket.on("system_logs_update", (data) => {
+        if (!data || !Array.isArray(data.logs)) return;
+        systemLogView.append(data.logs, data.offset ?? null);
     })
 }
 
@@ -572,6 +700,14 @@ function escapeHtml(unsafe) {
         .replace(/'/g, "&#039;");
 }
 
+function formatDuration(seconds) {
+    if (!seconds || seconds < 1) return "now";
+    if (seconds < 60) return `${Math.round(seconds)}s`;
+    const minutes = Math.floor(seconds / 60);
+    if (minutes < 60) return `${minutes}m ${Math.round(seconds % 60)}s`;
+    return `${Math.floor(minutes / 60)}h ${minutes % 60}m`;
+}
+
 function showNotification(message, type = "info") {
     const notification = document.createElement("div");
     notification.className = `alert alert-${type} alert-dismissible fade show position-fixed`;
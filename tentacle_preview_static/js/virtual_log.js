@@ -0,0 +1,234 @@
+// virtual_log.js — виртуализированный просмотр логов: в DOM только видимые строки.
+//
+// Lines live in fixed-size pages. Pages the user scrolls to are fetched with `loadRange(offset, limit)`
+// (which must resolve to {lines, total}); only `maxPages` pages are kept, so memory stays flat however
+// long the log is. Streamed lines are queued and applied once per animation frame.
+
+class VirtualLog {
+    constructor(container, options = {}) {
+        this.container = container;
+        this.loadRange = options.loadRange || null;
+        this.renderLine = options.renderLine || VirtualLog.renderText;
+        this.pageSize = options.pageSize || 500;
+        this.maxPages = options.maxPages || 40;
+        this.overscan = options.overscan || 20;
+        this.emptyText = options.emptyText || "No logs available";
+
+        this.total = 0;
+        this.pages = new Map(); // page index -> lines, in LRU order
+        this.loading = new Set();
+        this.pendingAppends = [];
+        this.lineHeight = 0;
+        this.stickToBottom = true;
+        this.frame = null;
+        this.generation = 0; // bumps on reset, so stale page loads are dropped
+
+        this.container.innerHTML = "";
+        this.container.classList.add("virtual-log");
+        this.spacer = document.createElement("div");
+        this.spacer.className = "virtual-log-spacer";
+        this.rows = document.createElement("div");
+        this.rows.className = "virtual-log-rows";
+        this.spacer.appendChild(this.rows);
+        this.container.appendChild(this.spacer);
+
+        this.onScroll = () => {
+            const bottom = this.container.scrollTop + this.container.clientHeight;
+            this.stickToBottom = bottom >= this.container.scrollHeight - Math.max(this.lineHeight, 1) * 2;
+            this.schedule();
+        };
+        this.container.addEventListener("scroll", this.onScroll, {passive: true});
+
+        // hidden tabs and modals have no size yet: render once they get one
+        this.resizeObserver = new ResizeObserver(() => this.schedule());
+        this.resizeObserver.observe(this.container);
+    }
+
+    static renderText(line) {
+        const row = document.createElement("div");
+        row.textContent = line;
+        return row;
+    }
+
+    destroy() {
+        this.container.removeEventListener("scroll", this.onScroll);
+        this.resizeObserver.disconnect();
+        if (this.frame !== null) cancelAnimationFrame(this.frame);
+        this.generation++;
+    }
+
+    // Starts over with `total` lines on the server; `tail` may hold the last lines already fetched.
+    reset(total, tail = [], tailOffset = total - tail.length) {
+        this.generation++;
+        this.total = total;
+        this.pages.clear();
+        this.loading.clear();
+        this.pendingAppends = [];
+        this.stickToBottom = true;
+        this.storeLines(tailOffset, tail);
+        this.schedule();
+    }
+
+    // All lines known up front (no server paging), e.g. one build command's output.
+    setLines(lines) {
+        this.maxPages = Infinity;
+        this.reset(lines.length, lines, 0);
+    }
+
+    // Streamed lines; `offset` is the index of the first one, if the server sent it.
+    append(lines, offset = null) {
+        if (!lines || lines.length === 0) return;
+        this.pendingAppends.push({lines, offset});
+        this.schedule();
+    }
+
+    scrollToTop() {
+        this.stickToBottom = false;
+        this.container.scrollTop = 0;
+        this.schedule();
+    }
+
+    schedule() {
+        if (this.frame === null) {
+            this.frame = requestAnimationFrame(() => {
+                this.frame = null;
+                this.render();
+            });
+        }
+    }
+
+    applyAppends() {
+        for (const {lines, offset} of this.pendingAppends) {
+            if (offset === 0 && this.total > 0) {
+                this.reset(0); // the process was restarted and its log starts over
+            }
+            // lines we already have are simply overwritten with the same text
+            const start = offset === null ? this.total : offset;
+            this.storeLines(start, lines, true);
+            this.total = Math.max(this.total, start + lines.length);
+        }
+        this.pendingAppends = [];
+    }
+
+    storeLines(offset, lines, onlyCached = false) {
+        for (let i = 0; i < lines.length; i++) {
+            const index = offset + i;
+            const pageIndex = Math.floor(index / this.pageSize);
+            let page = this.pages.get(pageIndex);
+            if (!page) {
+                // streamed lines only extend pages we hold or start new ones; the rest is fetched on demand
+                if (onlyCached && index % this.pageSize !== 0) continue;
+                page = [];
+                this.pages.set(pageIndex, page);
+            }
+            page[index % this.pageSize] = lines[i];
+        }
+        this.evictPages(new Set());
+    }
+
+    getLine(index) {
+        const pageIndex = Math.floor(index / this.pageSize);
+        const page = this.pages.get(pageIndex);
+        if (!page) return undefined;
+        // touch: move to the end of the LRU order
+        this.pages.delete(pageIndex);
+        this.pages.set(pageIndex, page);
+        return page[index % this.pageSize];
+    }
+
+    evictPages(visible) {
+        for (const pageIndex of this.pages.keys()) {
+            if (this.pages.size <= this.maxPages) break;
+            if (!visible.has(pageIndex)) this.pages.delete(pageIndex);
+        }
+    }
+
+    measureLineHeight() {
+        let sample;
+        for (const page of this.pages.values()) {
+            sample = page.find(line => line !== undefined);
+            if (sample !== undefined) break;
+        }
+        const probe = sample === undefined ? VirtualLog.renderText("Mg") : this.renderLine(sample, 0);
+        probe.classList.add("virtual-log-row");
+        probe.style.visibility = "hidden";
+        this.rows.appendChild(probe);
+        const height = probe.getBoundingClientRect().height;
+        probe.remove();
+        return height;
+    }
+
+    render() {
+        this.applyAppends();
+
+        const viewport = this.container.clientHeight;
+        if (viewport === 0) return; // not visible yet
+
+        if (this.total === 0) {
+            this.spacer.style.height = "";
+            this.rows.style.transform = "";
+            this.rows.replaceChildren(Object.assign(document.createElement("div"), {
+                className: "virtual-log-empty text-muted",
+                textContent: this.emptyText,
+            }));
+            return;
+        }
+
+        if (!this.lineHeight) this.lineHeight = this.measureLineHeight() || 18;
+
+        this.spacer.style.height = `${this.total * this.lineHeight}px`;
+        if (this.stickToBottom) {
+            this.container.scrollTop = this.container.scrollHeight;
+        }
+
+        const first = Math.max(0, Math.floor(this.container.scrollTop / this.lineHeight) - this.overscan);
+        const last = Math.min(this.total, Math.ceil((this.container.scrollTop + viewport) / this.lineHeight) + this.overscan);
+
+        const visiblePages = new Set();
+        const missingPages = new Set();
+        const fragment = document.createDocumentFragment();
+        for (let index = first; index < last; index++) {
+            const pageIndex = Math.floor(index / this.pageSize);
+            visiblePages.add(pageIndex);
+            const line = this.getLine(index);
+            let row;
+            if (line === undefined) {
+                missingPages.add(pageIndex);
+                row = document.createElement("div");
+                row.className = "virtual-log-pending";
+                row.textContent = "…";
+            } else {
+                row = this.renderLine(line, index);
+            }
+            row.classList.add("virtual-log-row");
+            row.style.height = `${this.lineHeight}px`;
+            fragment.appendChild(row);
+        }
+        this.rows.style.transform = `translateY(${first * this.lineHeight}px)`;
+        this.rows.replaceChildren(fragment);
+
+        this.evictPages(visiblePages);
+        for (const pageIndex of missingPages) {
+            this.loadPage(pageIndex);
+        }
+    }
+
+    async loadPage(pageIndex) {
+        if (!this.loadRange || this.loading.has(pageIndex)) return;
+        this.loading.add(pageIndex);
+        const generation = this.generation;
+        try {
+            const {lines, total} = await this.loadRange(pageIndex * this.pageSize, this.pageSize);
+            if (generation !== this.generation) return;
+            // a smaller total only means the response predates lines we already got streamed;
+            // restarts are detected by a streamed batch starting at offset 0
+            this.total = Math.max(this.total, total);
+            this.storeLines(pageIndex * this.pageSize, lines);
+            this.schedule();
+        } catch (err) {
+            console.error("VirtualLog: failed to load lines", err);
+        } finally {
+            if (generation === this.generation) this.loading.delete(pageIndex);
+        }
+    }
+}
@@ -0,0 +1,128 @@
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from pathlib import Path
+
+from TentaclePreview import output
+from TentaclePreview.tentacle import Tentacle
+
+output.ENABLED_LOG_LEVELS = []
+
+PYTHON = f'"{sys.executable}" -c'
+
+
+def make_tentacle(build, path: Path = None) -> Tentacle:
+    """A tentacle without a repository: enough to normalize and run build steps"""
+    tenty = Tentacle.__new__(Tentacle)
+    tenty.remote_branch = types.SimpleNamespace(name="main")
+    tenty._path = path or Path(tempfile.mkdtemp())
+    tenty._commands = {"start": "true", "build": build}
+    tenty._host, tenty._port = "127.0.0.1", 0
+    tenty._head_sha = "a" * 40
+    tenty._built_commit = None
+    tenty._step_commits = {}
+    tenty._build_lock = threading.Lock()
+    tenty._build_processes = {}
+    tenty._cancel_build = False
+    tenty._process = None
+    tenty._log_file = None
+    tenty.last_active = 0.0
+    tenty.is_build_success = None
+    tenty.is_start_success = None
+    tenty.build_output = []
+    return tenty
+
+
+class BuildStepsTest(unittest.TestCase):
+    def steps(self, build):
+        return [(step["name"], step["run"], step["needs"]) for step in make_tentacle(build)._build_steps()]
+
+    def test_single_command(self):
+        self.assertEqual(self.steps("make"), [("step-1", "make", [])])
+        self.assertEqual(self.steps({"run": "make", "inputs": ["src/**"]}), [("step-1", "make", [])])
+
+    def test_list_is_a_chain(self):
+        self.assertEqual(self.steps(["npm ci", "", "npm run build"]),
+                         [("step-1", "npm ci", []), ("step-3", "npm run build", ["step-1"])])
+
+    def test_list_with_names_and_needs(self):
+        build = [{"name": "deps", "run": "npm ci"},
+                 {"name": "lint", "run": "npm run lint", "needs": []},
+                 {"run": "npm run build", "needs": "deps"}]
+        self.assertEqual(self.steps(build), [("deps", "npm ci", []), ("lint", "npm run lint", []),
+                                             ("step-3", "npm run build", ["deps"])])
+
+    def test_steps_mapping_is_a_graph(self):
+        build = {"steps": {"run": {"run": "make"}, "test": {"run": "make test", "needs": "run"}, "docs": "make docs"}}
+        self.assertEqual(self.steps(build), [("run", "make", []), ("test", "make test", ["run"]),
+                                             ("docs", "make docs", [])])
+
+    def test_invalid_configs(self):
+        for build in ({"deps": {"run": "npm ci"}}, {"steps": ["npm ci"]},
+                      {"steps": {"build": {"run": "make", "needs": ["missing"]}}}):
+            with self.subTest(build=build), self.assertRaises(ValueError):
+                make_tentacle(build)._build_steps()
+
+
+class BuildGraphTest(unittest.TestCase):
+    def build(self, tenty):
+        tenty.build()
+        return {entry["step"]: entry for entry in tenty.get_logs("build") if "step" in entry}
+
+    def test_needs_run_first(self):
+        tenty = make_tentacle({"steps": {
+            "check": {"run": f"{PYTHON} \"import os, sys; sys.exit(not os.path.exists('made'))\"", "needs": "make"},
+            "make": f"{PYTHON} \"open('made', 'w').close(); print('made it')\"",
+        }})
+        entries = self.build(tenty)
+
+        self.assertTrue(tenty.is_build_success)
+        self.assertEqual({name: entry["status"] for name, entry in entries.items()},
+                         {"make": "success", "check": "success"})
+        self.assertEqual(entries["make"]["output"], "made it")
+
+    def test_failed_need_cancels_dependents(self):
+        tenty = make_tentacle({"steps": {
+            "deps": f"{PYTHON} \"raise SystemExit(3)\"",
+            "build": {"run": f"{PYTHON} \"print('unreachable')\"", "needs": "deps"},
+        }})
+        entries = self.build(tenty)
+
+        self.assertFalse(tenty.is_build_success)
+        self.assertEqual(entries["deps"]["status"], "failed")
+        self.assertEqual(entries["build"]["status"], "cancelled")
+        self.assertIn("step 'deps' failed", entries["build"]["output"])
+
+    def test_cycle_runs_nothing(self):
+        tenty = make_tentacle({"steps": {"a": {"run": "true", "needs": "b"}, "b": {"run": "true", "needs": "a"}}})
+        entries = self.build(tenty)
+
+        self.assertFalse(tenty.is_build_success)
+        self.assertEqual({entry["status"] for entry in entries.values()}, {"cancelled"})
+        self.assertIn("cycle", entries["a"]["output"])
+
+    def test_unchanged_step_is_skipped(self):
+        tenty = make_tentacle({"steps": {
+            "deps": {"run": f"{PYTHON} \"open('deps', 'w').close()\"", "inputs": ["lock"], "outputs": ["deps"]},
+            "build": {"run": f"{PYTHON} \"print('built')\"", "needs": "deps"},
+        }})
+        self.build(tenty)
+        entries = self.build(tenty)  # same commit: the inputs of deps did not change
+
+        self.assertTrue(tenty.is_build_success)
+        self.assertEqual(entries["deps"]["status"], "skipped")
+        self.assertEqual(entries["build"]["status"], "success")
+
+    def test_state_gets_a_copy_of_step_commits(self):
+        tenty = make_tentacle(f"{PYTHON} \"pass\"")
+        tenty.build()
+        state = tenty.to_state()
+
+        self.assertEqual(list(state["step_commits"].values()), [tenty.head_sha])
+        self.assertIsNot(state["step_commits"], tenty._step_commits)
+
+
+if __name__ == "__main__":
+    unittest.main()
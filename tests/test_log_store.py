@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+
+from TentaclePreview.log_store import LogStore, regex_literals
+
+
+class RegexLiteralsTest(unittest.TestCase):
+    def test_plain_literals(self):
+        self.assertEqual(regex_literals(r"connection refused"), ["connection refused"])
+        self.assertEqual(regex_literals(r"took \d+ms in handler"), ["took ", "ms in handler"])
+
+    def test_groups_are_not_required(self):
+        self.assertEqual(regex_literals(r"(foo)?barbaz"), ["barbaz"])
+        self.assertEqual(regex_literals(r"foo(?:bar)?qux"), ["foo", "qux"])
+        self.assertEqual(regex_literals(r"ECONN(REFUSED)?"), ["ECONN"])
+        self.assertEqual(regex_literals(r"error(?=: disk)"), ["error"])
+
+    def test_quantified_char_is_not_required(self):
+        self.assertEqual(regex_literals(r"colou?r"), ["colo"])
+        self.assertEqual(regex_literals(r"abcd{0,2}"), ["abc"])
+
+    def test_alternation_gives_nothing(self):
+        self.assertEqual(regex_literals(r"timeout|refused"), [])
+
+
+class LogStoreSearchTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.store = LogStore(self._dir.name)
+
+    def tearDown(self):
+        self.store.close()
+        self._dir.cleanup()
+
+    def search(self, query, **kwargs):
+        return [result["text"] for result in self.store.search(query, regex=True, context=0, **kwargs)["results"]]
+
+    def test_optional_groups_match(self):
+        self.store.append("main", "stdout", ["ECONN reset", "fooqux", "foobarqux", "barbaz"], ts=1.0)
+
+        self.assertEqual(self.search(r"ECONN(REFUSED)?"), ["ECONN reset"])
+        self.assertEqual(sorted(self.search(r"foo(?:bar)?qux")), ["foobarqux", "fooqux"])
+        self.assertEqual(self.search(r"(foo)?barbaz"), ["barbaz"])
+
+    def test_limit_keeps_newest_matches(self):
+        for i in range(10):
+            self.store.append("main", "stdout", [f"line {i}"], ts=float(i))
+
+        self.assertEqual(self.search(r"line \d", limit=3), ["line 9", "line 8", "line 7"])
+
+    def test_deleted_source_is_not_searched(self):
+        self.store.append("feature/x", "build", ["npm ERR! missing script"], ts=1.0)
+        self.store.append("main", "build", ["npm ERR! missing script"], ts=2.0)
+        self.store.delete_source("feature/x")
+
+        results = self.store.search("npm ERR!", context=0)["results"]
+        self.assertEqual([result["source"] for result in results], ["main"])
+
+
+if __name__ == "__main__":
+    unittest.main()
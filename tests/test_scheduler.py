@@ -0,0 +1,95 @@
+import threading
+import unittest
+
+from TentaclePreview import output
+from TentaclePreview.scheduler import BuildScheduler
+
+output.ENABLED_LOG_LEVELS = []
+
+
+class BuildSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = BuildScheduler(max_parallel=1, poll_interval=0.01)
+        self.ran = []
+        self.gate = threading.Event()
+        started = threading.Event()
+
+        def blocker():  # keeps the only worker busy until the test lets the queue run
+            started.set()
+            self.gate.wait()
+
+        self.scheduler.submit("blocker", blocker)
+        self.assertTrue(started.wait(5))
+
+    def tearDown(self):
+        self.gate.set()
+
+    def job(self, name):
+        return lambda: self.ran.append(name)
+
+    def run_queue(self, *futures):
+        self.gate.set()
+        for future in futures:
+            future.result(timeout=5)
+
+    def test_priority_order(self):
+        default = self.scheduler.submit("default", self.job("default"))
+        viewed = self.scheduler.submit("viewed", self.job("viewed"))
+        explicit = self.scheduler.submit("explicit", self.job("explicit"), explicit=True)
+        later = self.scheduler.submit("later", self.job("later"))
+        self.scheduler.touch("viewed")
+
+        self.run_queue(default, viewed, explicit, later)
+        self.assertEqual(self.ran, ["explicit", "viewed", "default", "later"])
+
+    def test_snapshot_positions(self):
+        self.scheduler.submit("a", self.job("a"))
+        self.scheduler.submit("b", self.job("b"), explicit=True)
+
+        snapshot = self.scheduler.snapshot()
+        self.assertEqual(snapshot["blocker"]["state"], "building")
+        self.assertEqual((snapshot["b"]["state"], snapshot["b"]["position"]), ("queued", 1))
+        self.assertEqual(snapshot["a"]["position"], 2)
+
+    def test_submit_replaces_queued_job(self):
+        first = self.scheduler.submit("branch", self.job("first"))
+        second = self.scheduler.submit("branch", self.job("second"), reason="restart", explicit=True)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.scheduler.snapshot()["branch"]["reason"], "restart")
+        self.run_queue(second)
+        self.assertEqual(self.ran, ["second"])
+
+    def test_claim_refuses_queued_and_running(self):
+        self.scheduler.submit("queued", self.job("queued"))
+
+        self.assertFalse(self.scheduler.claim("blocker"))
+        self.assertFalse(self.scheduler.claim("queued"))
+        self.assertTrue(self.scheduler.claim("idle"))
+        self.assertFalse(self.scheduler.claim("idle"))  # claimed already
+
+    def test_claimed_branch_waits_for_release(self):
+        self.assertTrue(self.scheduler.claim("branch"))
+        claimed = self.scheduler.submit("branch", self.job("branch"))
+        other = self.scheduler.submit("other", self.job("other"))
+
+        self.run_queue(other)
+        self.assertEqual(self.ran, ["other"])
+        self.assertFalse(claimed.done())
+
+        self.scheduler.release("branch")
+        claimed.result(timeout=5)
+        self.assertEqual(self.ran, ["other", "branch"])
+
+    def test_failed_job_sets_exception(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        future = self.scheduler.submit("failing", fail)
+        self.gate.set()
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()